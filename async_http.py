@@ -0,0 +1,208 @@
+# /**
+#   ******************************************************************************
+#   * @file    async_http.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Minimal non-blocking HTTP/1.1 client for the clock.
+#   *
+#   *          urequests blocks the whole program until the server answers.
+#   *          This client runs on the event loop, so the display keeps
+#   *          ticking while a request is in flight; wrap calls in
+#   *          uasyncio.wait_for() to bound them.
+#   *
+#   *          HttpClient keeps one persistent connection to its host, so the
+#   *          TLS handshake - the most expensive thing the clock does - is
+#   *          paid once instead of on every poll. When the server dropped the
+#   *          idle connection, the request is sent again on a new one - only
+#   *          if no response came at all, so a streamed body is never fed to
+#   *          its sink twice.
+#   *
+#   ******************************************************************************
+#   */
+from compat import asyncio
+
+
+def parse_url(url):
+    # Returns (scheme, host, port, path).
+    scheme, _, rest = url.partition("://")
+    host, slash, path = rest.partition("/")
+    path = slash + path if slash else "/"
+    port = 443 if scheme in ("https", "wss") else 80
+    if ":" in host:
+        host, port = host.rsplit(":", 1)
+        port = int(port)
+    return scheme, host, port, path
+
+
+def host_header(scheme, host, port):
+    if port == (443 if scheme in ("https", "wss") else 80):
+        return host
+    return "%s:%d" % (host, port)
+
+
+CHUNK_SIZE = 256 # streamed bodies are read in pieces of at most this many bytes
+
+
+async def read_head(reader):
+    # Returns (status, headers) of a response; header names lowercased.
+    line = await reader.readline()
+    if not line:
+        raise OSError("connection closed")
+    status = int(line.split(None, 2)[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if not line or line == b"\r\n":
+            break
+        name, _, value = line.decode().partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return status, headers
+
+
+async def _stream(reader, size, sink, done=False):
+    # Passes size bytes (-1: up to EOF) to sink; once sink returned True the rest is just drained.
+    while size != 0:
+        data = await reader.read(CHUNK_SIZE if size < 0 else min(size, CHUNK_SIZE))
+        if not data:
+            if size > 0:
+                raise EOFError("body cut short")
+            break
+        if size > 0:
+            size -= len(data)
+        if not done:
+            done = sink(data)
+        elif size < 0:
+            break # the connection is closed afterwards anyway
+    return done
+
+
+async def read_body(reader, headers, sink=None):
+    # Returns the body, or streams it to sink(chunk) and returns None.
+    chunked = headers.get("transfer-encoding", "").lower() == "chunked"
+    if "content-length" in headers and not chunked:
+        size = int(headers["content-length"])
+        if sink is None:
+            return await reader.readexactly(size)
+        await _stream(reader, size, sink)
+        return None
+    if not chunked:
+        headers["connection"] = "close" # the body ends with the connection
+        if sink is None:
+            return await reader.read(-1)
+        await _stream(reader, -1, sink)
+        return None
+    body = b""
+    done = False
+    while True:
+        size = int((await reader.readline()).split(b";")[0], 16)
+        if size == 0:
+            await reader.readline()
+            break
+        if sink is None:
+            body += await reader.readexactly(size)
+        else:
+            done = await _stream(reader, size, sink, done)
+        await reader.readline()
+    return None if sink is not None else body
+
+
+async def read_response(reader, sink=None):
+    # Returns (status, headers, body); body is None when it was streamed to sink.
+    status, headers = await read_head(reader)
+    return status, headers, await read_body(reader, headers, sink)
+
+
+async def write_request(writer, method, host, path, headers, body, keep_alive):
+    req = "%s %s HTTP/1.1\r\nHost: %s\r\nConnection: %s\r\n" % (method, path, host, "keep-alive" if keep_alive else "close")
+    if headers:
+        for name in headers:
+            req += "%s: %s\r\n" % (name, headers[name])
+    if body is not None:
+        req += "Content-Length: %d\r\n" % len(body)
+    writer.write(req.encode() + b"\r\n")
+    if body is not None:
+        writer.write(body)
+    await writer.drain()
+
+
+class HttpClient:
+    def __init__(self, url, ssl=None):
+        # url only needs the scheme, host and port; ssl overrides the TLS context.
+        self.scheme, self.host, self.port, _ = parse_url(url)
+        if ssl is None and self.scheme == "https":
+            ssl = True
+        self._ssl = ssl
+        self._host_header = host_header(self.scheme, self.host, self.port)
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock() # one request at a time on the shared connection
+        self.handshakes = 0 # connections opened - TCP+TLS handshakes for https
+        self.requests = 0
+        self.reused = 0 # requests served on an already open connection
+        self.reconnects = 0 # reused connections found dead and replaced
+
+    @property
+    def connected(self):
+        return self._writer is not None
+
+    def _drop(self):
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except OSError:
+                pass
+        self._reader = None
+        self._writer = None
+
+    async def close(self):
+        writer = self._writer
+        self._drop()
+        if writer is not None:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def request(self, method, path, headers=None, body=None, sink=None):
+        # Returns (status, headers, body). path may also be a full URL of this host.
+        # With sink, the response body is passed to sink(chunk) piece by piece
+        # instead (body is None); sink returns True once it has seen enough.
+        if "://" in path:
+            path = parse_url(path)[3]
+        async with self._lock:
+            return await self._request(method, path, headers, body, sink)
+
+    async def _request(self, method, path, headers, body, sink):
+        self.requests += 1
+        while True:
+            reused = self._writer is not None
+            if not reused:
+                self._reader, self._writer = await asyncio.open_connection(self.host, self.port, ssl=self._ssl)
+                self.handshakes += 1
+            try:
+                await write_request(self._writer, method, self._host_header, path, headers, body, True)
+                status, resp_headers = await read_head(self._reader)
+            except (OSError, EOFError, ValueError):
+                self._drop()
+                if reused:
+                    # The server closed the idle connection, try once on a fresh one.
+                    # Only up to here: once the body is read, sink has seen some of it.
+                    self.reconnects += 1
+                    continue
+                raise
+            except BaseException:
+                # Cancelled (e.g. by wait_for) half way: the stream state is unknown.
+                self._drop()
+                raise
+            try:
+                resp_body = await read_body(self._reader, resp_headers, sink)
+            except BaseException:
+                # Cut short, cancelled or sink failed: no retry, the caller sees why.
+                self._drop()
+                raise
+            if reused:
+                self.reused += 1
+            if resp_headers.get("connection", "").lower() == "close":
+                await self.close()
+            return status, resp_headers, resp_body
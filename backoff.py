@@ -0,0 +1,46 @@
+# /**
+#   ******************************************************************************
+#   * @file    backoff.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Exponential, jittered backoff between reconnect attempts.
+#   *
+#   *          The wait doubles on every failed attempt, from min_ms up to
+#   *          max_ms, and each one is spread over +-25% so that several
+#   *          clocks don't retry in step. A connection that stayed up for
+#   *          stable_ms was a healthy one, not a flapping one: the next wait
+#   *          starts from min_ms again. Used by the WiFi supervisor and the
+#   *          HA push connection.
+#   *
+#   ******************************************************************************
+#   */
+import random
+
+import compat
+
+
+class Backoff:
+    def __init__(self, min_ms, max_ms, stable_ms, ticks_ms=compat.ticks_ms):
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.stable_ms = stable_ms
+        self._ticks_ms = ticks_ms
+        self.ms = 0 # the current backoff, without the jitter; 0 when none
+        self._up_at = None
+
+    def next_ms(self):
+        # The wait after another failed attempt.
+        self._up_at = None
+        self.ms = min(max(self.ms * 2, self.min_ms), self.max_ms)
+        return self.ms - self.ms // 4 + random.getrandbits(16) * (self.ms // 2) // 65536
+
+    def up(self):
+        # The connection is up.
+        self._up_at = self._ticks_ms()
+
+    def settle(self):
+        # Resets the backoff once the connection has been up for stable_ms;
+        # called while it is up, or once it is gone again.
+        if self.ms and self._up_at is not None and compat.ticks_diff(self._ticks_ms(), self._up_at) >= self.stable_ms:
+            self.ms = 0
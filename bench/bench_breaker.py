@@ -0,0 +1,95 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_breaker.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host simulation: a Home Assistant outage, restart vs circuit breaker.
+#   *
+#   *          Twelve hours of temperature polling on a simulated clock, with HA
+#   *          gone for a while in the middle (every request times out). The old
+#   *          reconnect_on_ha_gone behaviour restarted the network on every
+#   *          failure; temperature_task with the breaker keeps the link and
+#   *          only marks the values stale. Prints the requests, restarts, the
+#   *          time the clock face was gone and the breaker counters.
+#   *          Run from the repository root: python3 bench/bench_breaker.py
+#   *
+#   ******************************************************************************
+#   */
+import sys
+
+sys.path.insert(0, ".")
+
+import event_log
+from circuit_breaker import CircuitBreaker
+
+HOURS = 12
+SYNC_S = 900 # temperature_sync_time_sec
+RETRY_S = 60 # temperature_task retry after a failure
+TIMEOUT_S = 20 # ha_srv_timeout
+# The old restart: noticing it, the 5 s countdown, radio off/on, the join, NTP.
+RESTART_S = 1 + 5 + 2 + 3 + 1
+
+
+def old_policy(dead):
+    t = 0
+    requests = restarts = face_off = 0
+    while t < HOURS * 3600:
+        t += SYNC_S
+        requests += 1
+        while dead(t) and t < HOURS * 3600:
+            # The failed request, a restart, and the initial sync asks HA again.
+            t += TIMEOUT_S + RESTART_S
+            face_off += RESTART_S + TIMEOUT_S
+            restarts += 1
+            requests += 1
+    return requests, restarts, face_off, None, None
+
+
+def breaker_policy(dead, threshold=3, cooldown_s=300):
+    now = [0]
+    events = event_log.EventLog(ticks_ms=lambda: now[0] * 1000)
+    breaker = CircuitBreaker("HA", threshold, cooldown_s * 1000, ticks_ms=lambda: now[0] * 1000, events=events, source=event_log.HA)
+    t = 0
+    requests = stale = 0
+    back_at = None
+    while t < HOURS * 3600:
+        step = RETRY_S if breaker.failed else SYNC_S
+        if breaker.failed:
+            stale += step
+        t += step
+        now[0] = t
+        if not breaker.allow():
+            continue
+        requests += 1
+        if dead(t):
+            t += TIMEOUT_S
+            breaker.failure()
+        else:
+            if breaker.failed and back_at is None:
+                back_at = t
+            breaker.success()
+    return requests, 0, 0, stale, breaker
+
+
+def main():
+    print("HA outage   policy      requests  restarts  face gone s  stale s  opens  half-opens  closes  rejected")
+    for start_h, hours in ((2, 0.25), (2, 2), (1, 8)):
+        dead = lambda t: start_h * 3600 <= t < (start_h + hours) * 3600
+        requests, restarts, face_off, _, _ = old_policy(dead)
+        print("%5.2f h     %-10s %9d %9d %12d" % (hours, "restart", requests, restarts, face_off))
+        requests, restarts, face_off, stale, b = breaker_policy(dead)
+        print("%5.2f h     %-10s %9d %9d %12d %8d %6d %11d %7d %9d" % (hours, "breaker", requests, restarts, face_off, stale,
+                                                                     b.opens, b.half_opens, b.closes, b.rejected))
+        assert b.closed and b.closes == 1 # closed again once HA was back
+        assert b.half_opens == b.opens # one probe per cool-down
+        codes = [record[1] for record in b.events.records()]
+        assert codes.count(event_log.BREAKER_OPEN) == b.opens and codes.count(event_log.BREAKER_CLOSED) == 1
+        # Stale at most the outage plus the longest cool-down and a poll.
+        assert stale <= hours * 3600 + b.max_cooldown_ms // 1000 + SYNC_S
+    # Cool-downs double while HA stays away: an 8 hour outage costs a handful of requests.
+    assert b.failures < 20
+
+
+if __name__ == "__main__":
+    main()
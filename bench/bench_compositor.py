@@ -0,0 +1,143 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_compositor.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host check: the LCD compositor.
+#   *
+#   *          Scrolls a long message through a 16 column region and compares
+#   *          its I2C traffic with putstr() of every step, cycles more glyphs
+#   *          than the 8 CGRAM slots through the LRU, shows text beyond
+#   *          U+00FF as '?', and runs the clock (hal_sim) with the ha_sensors
+#   *          pages taking turns with the face, with and without seconds.
+#   *          Run from the repository root: python3 bench/bench_compositor.py
+#   *
+#   ******************************************************************************
+#   */
+import sys
+
+sys.path.insert(0, ".")
+sys.path.insert(0, "tools")
+
+import config_compiler
+import hal_sim
+import lcd_compositor
+from lcd_compositor import Compositor, GlyphCache, Region, RIGHT, SCROLL_GAP, SCROLL_HOLD
+from lcd_framebuf import LcdFrameBuffer, LCD_TX_PER_OP, LCD_BYTES_PER_TX
+
+MESSAGE = "Please use DHCP due to a MP bug."
+
+
+def screen(lcd, row=0):
+    return lcd.screen({slot: hal_sim.GLYPH_TEXT.get(lcd.cgram[slot], "?") for slot in range(8)})[row]
+
+
+def scrolling():
+    lcd = hal_sim.VirtualLcd()
+    fb = LcdFrameBuffer(lcd)
+    c = Compositor(fb, GlyphCache(fb))
+    c.add_page("status", [Region("status0", 0, 0, 16), Region("status1", 0, 1, 16)])
+    c.show("status")
+    c.set("status0", MESSAGE)
+    c.set("status1", "short")
+    c.draw()
+    fb.flush()
+    assert c.scrolling and screen(lcd) == MESSAGE[:16] and screen(lcd, 1) == "short" + " " * 11
+    before = lcd.i2c_bytes
+    period = len(MESSAGE) + SCROLL_GAP
+    shown = []
+    for _ in range(SCROLL_HOLD + period):
+        c.scroll()
+        c.draw()
+        fb.flush()
+        shown.append(screen(lcd))
+    sent = lcd.i2c_bytes - before
+    loop = MESSAGE + " " * SCROLL_GAP
+    assert shown[SCROLL_HOLD - 1] == MESSAGE[:16] # held at the start
+    for step in range(period):
+        assert shown[SCROLL_HOLD + step] == ((loop * 2)[step + 1:step + 17]), step
+    assert screen(lcd, 1) == "short" + " " * 11 # the other row is left alone
+    # putstr() of the window every step: a move, then a character and a move per cell.
+    naive = period * (1 + 2 * 16) * LCD_TX_PER_OP * LCD_BYTES_PER_TX
+    print("scrolling %d characters once through 16 columns: %d I2C bytes, %d with putstr(), %d%%" % (
+        len(MESSAGE), sent, naive, 100 * sent // naive))
+    assert sent < naive // 2
+
+
+def lru():
+    lcd = hal_sim.VirtualLcd()
+    fb = LcdFrameBuffer(lcd)
+    glyphs = GlyphCache(fb)
+    glyphs.preload((lcd_compositor.DEGREES, lcd_compositor.WIFI, lcd_compositor.NOWIFI, lcd_compositor.STALE))
+    c = Compositor(fb, glyphs)
+    c.add_page("face", [Region("wifi", 15, 0, 1), Region("value", 9, 1, 7, RIGHT)])
+    c.show("face")
+    c.set("wifi", "\x01")
+    codes = sorted(lcd_compositor.GLYPHS)
+    for n in range(3 * len(codes)):
+        code = codes[n % len(codes)]
+        if code == lcd_compositor.WIFI:
+            continue
+        c.set("value", "21" + chr(code) + "C")
+        c.draw()
+        fb.flush()
+        assert screen(lcd, 1) == " " * 12 + "21" + hal_sim.GLYPH_TEXT[lcd_compositor.GLYPHS[code]] + "C", n
+        assert screen(lcd)[15] == "W", n # never evicted, it is on the screen
+    assert len(codes) > 8 and glyphs.evictions > 0
+    # More glyphs at once than there are slots: the ones that don't fit are blank.
+    c.add_page("many", [Region("all", 0, 0, 16)])
+    c.show("many")
+    c.set("all", "".join(chr(code) for code in codes))
+    c.draw()
+    fb.flush()
+    assert screen(lcd)[:len(codes)].count(" ") == len(codes) - 8
+    print("glyphs: %d loads, %d evictions for %d glyphs in 8 slots" % (glyphs.loads, glyphs.evictions, len(codes)))
+
+
+def wide():
+    # Characters no text byte holds show as '?', the others as they are.
+    region = Region("value", 0, 0, 8)
+    assert region.set("5\u2192\xe9")
+    assert bytes(region.text[:region.length]) == b"5?\xe9"
+    assert not region.set("5\u2191\xe9")
+    assert config_compiler.ha_sensors([{'entity': 'sensor.wind', 'suffix': '\u2192'}])
+    assert not config_compiler.ha_sensors([{'entity': 'sensor.wind', 'label': 'Caf\xe9'}])
+
+
+def pages(show_seconds):
+    # The pages turn on their own timer, also between the minute ticks
+    # without seconds.
+    sensors = [{'entity': 'weather.forecast_home', 'attribute': 'temperature', 'suffix': '\x00C', 'label': 'Outside'},
+               {'entity': 'sensor.living_room_humidity', 'suffix': '%\x04'},
+               {'entity': 'sensor.kitchen', 'suffix': '\x00C', 'label': '\x05Kitchen'}]
+    sim = hal_sim.Simulation({"ha_sensors": sensors, "display_page_sec": 5, "show_seconds": show_seconds})
+    seen = []
+    for k in range(40):
+        sim.at(1 + k / 7200, lambda sim: seen.append(sim.screen()))
+    sim.run(1.01)
+    s = sim.summary()
+    sim.close()
+    print("pages, show_seconds = %d:" % show_seconds)
+    for rows in seen[:12]:
+        print("  " + " | ".join(rows))
+    faces = [rows for rows in seen if rows[1][2] == ":"]
+    firsts = [rows for rows in seen if rows[0].startswith("Outside ")]
+    lasts = [rows for rows in seen if rows[0].startswith("hKitchen ")]
+    assert faces and firsts and lasts and len(faces) + len(firsts) + len(lasts) == len(seen)
+    assert all(rows[0].endswith(" 22°C") and rows[1].endswith(" 22%d") for rows in firsts)
+    assert len(set(rows[1][:8] for rows in firsts)) > 1 # living_room_humidity scrolls
+    assert all(rows[0].endswith(" 22°C") and rows[1] == " " * 16 for rows in lasts) # an odd one out: alone on its page
+    assert s["speedup"] > 1000
+
+
+def main():
+    scrolling()
+    lru()
+    wide()
+    pages(1)
+    pages(0)
+
+
+if __name__ == "__main__":
+    main()
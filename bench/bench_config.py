@@ -0,0 +1,151 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_config.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host check: the config compiler.
+#   *
+#   *          Checks that tools/config_compiler.py names every bad setting,
+#   *          and that settings.py gives main.py the same values from
+#   *          config_compiled as from config.py and secrets.py. Then times
+#   *          the import of settings.py both ways in fresh interpreters, with
+#   *          its peak heap: config.py and secrets.py compiled from source
+#   *          and derived, as the Pico does with .py files, against
+#   *          config_compiled as bytecode, the stand-in for the .mpy. And
+#   *          that main.py imports with config_compiled alone, and with a
+#   *          config.py from before the newer settings.
+#   *          Run from the repository root: python3 bench/bench_config.py
+#   *
+#   ******************************************************************************
+#   */
+import json
+import os
+import py_compile
+import shutil
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, ".")
+sys.path.insert(0, "tools")
+
+import config_compiler
+import tz_rules
+
+RUNS = 15
+SENSORS = "[{'entity':'weather.forecast_home', 'attribute':'temperature', 'suffix':'\\x00C'}, {'entity':'sensor.outdoor_humidity', 'suffix':'%\\x04', 'label':'Humidity'}]"
+# Settings a config.py from before them doesn't have.
+OLD_MISSING = ("dst_rule", "lcd_layout", "ha_sensors")
+# In a fresh interpreter: the modules main.py imports anyway, then settings.
+BOOT = """
+import json, sys, time, tracemalloc
+import json_stream, tz_rules, ha_sensors
+tracemalloc.start()
+start = time.perf_counter()
+import settings
+took = time.perf_counter() - start
+peak = tracemalloc.get_traced_memory()[1]
+values = {name: value for name, value in vars(settings).items() if not name.startswith("_") and not callable(value) and not isinstance(value, type(sys))}
+print(json.dumps([took, peak, repr(sorted(values.items()))]))
+"""
+# main.py with only config_compiled on the board: no config.py, no secrets.py
+# (CPython's own secrets module must not stand in for it either).
+MAIN_ALONE = """
+import sys
+sys.modules.update(config=None, secrets=None)
+import main
+print(main.ha_headers["Authorization"][:7])
+"""
+
+
+def write_config(directory, extra=""):
+    with open("config_dist.py") as f:
+        config = f.read()
+    with open(os.path.join(directory, "config.py"), "w") as f:
+        f.write(config + "\nha_sensors = " + SENSORS + "\n" + extra)
+    shutil.copy("secrets_dist.py", os.path.join(directory, "secrets.py"))
+
+
+def check():
+    directory = tempfile.mkdtemp()
+    write_config(directory, "show_seconds = 2\nha_api_temperature_json_path = \"attributes.temperature\"\ndst_rule = \"cet\"\n"
+                            "lcd_layout = {'i2c2:0x27': {}}\nha_sensors[1]['suffix'] = '%\\x1f'\nshow_secs = 1\n")
+    values, errors, warnings = config_compiler.compile_config(os.path.join(directory, "config.py"), os.path.join(directory, "secrets.py"))
+    for line in errors + warnings:
+        print("  " + line)
+    assert values is None
+    for name in ("show_seconds", "ha_api_temperature_json_path", "dst_rule", "lcd_layout", "ha_sensors"):
+        assert [line for line in errors if line.startswith("config.py: %s = " % name)], name
+    assert warnings == ["config.py: show_secs is not a setting, left out"]
+    # 'pages' is a flag, not a page name.
+    assert config_compiler.lcd_layout({'i2c0:0x27': {'pages': 'clock'}})
+    assert config_compiler.lcd_layout({'i2c0:0x27': {'sensors': 1}})
+    assert not config_compiler.lcd_layout({'i2c0:0x27': {'sensors': [0], 'pages': 0}})
+    # No WiFi, no NTP: the SSID is needed without sync_weather too.
+    config = config_compiler.load(os.path.join(directory, "config.py"))
+    config.update(show_seconds=1, ha_api_temperature_json_path="['attributes']['temperature']", dst_rule="eu", lcd_layout={})
+    config['ha_sensors'][1]['suffix'] = '%'
+    config['sync_weather'] = 0
+    secrets = config_compiler.load(os.path.join(directory, "secrets.py"))
+    assert not config_compiler.check_all(config, secrets)[0]
+    secrets['WIFI_SSID'] = ""
+    assert config_compiler.check_all(config, secrets)[0] == ["secrets.py: WIFI_SSID is empty"]
+
+
+def boot(directory):
+    # [import seconds, peak heap bytes, the values] of settings.py.
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([directory, os.getcwd()]), PYTHONDONTWRITEBYTECODE="1")
+    out = subprocess.check_output([sys.executable, "-c", BOOT], env=env, cwd=directory)
+    return json.loads(out)
+
+
+def compare():
+    source = tempfile.mkdtemp()
+    write_config(source)
+    compiled = tempfile.mkdtemp()
+    assert config_compiler.main(["--config", os.path.join(source, "config.py"), "--secrets", os.path.join(source, "secrets.py"),
+                                 "--out", os.path.join(compiled, "config_compiled.py")]) == 0
+    # Only the bytecode on the device, like an .mpy.
+    py_compile.compile(os.path.join(compiled, "config_compiled.py"), os.path.join(compiled, "config_compiled.pyc"), doraise=True)
+    os.remove(os.path.join(compiled, "config_compiled.py"))
+    results = {}
+    for name, directory in (("config.py + secrets.py", source), ("config_compiled", compiled)):
+        runs = [boot(directory) for _ in range(RUNS)]
+        took = sorted(run[0] for run in runs)[RUNS // 2]
+        peak = max(run[1] for run in runs)
+        results[name] = (took, peak, runs[0][2])
+        print("%-24s import %6.2f ms median, peak heap %6d bytes" % (name, 1000 * took, peak))
+    (took, peak, values), (took_compiled, peak_compiled, values_compiled) = results.values()
+    assert values == values_compiled # the same settings either way
+    assert took_compiled < took and peak_compiled < peak
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([compiled, os.getcwd()]), PYTHONDONTWRITEBYTECODE="1")
+    assert subprocess.check_output([sys.executable, "-c", MAIN_ALONE], env=env, cwd=compiled) == b"Bearer \n"
+
+
+def old_config():
+    # A config.py without the settings added since: settings.py takes them
+    # from config_dist.py, the compiler names them.
+    directory = tempfile.mkdtemp()
+    write_config(directory)
+    path = os.path.join(directory, "config.py")
+    with open(path) as f:
+        lines = [line for line in f if not line.startswith(OLD_MISSING)]
+    with open(path, "w") as f:
+        f.writelines(lines)
+    values = dict(eval(boot(directory)[2]))
+    assert values["dst_rule"] == tz_rules.RULES["eu"] and values["lcd_layout"] == {} and values["ha_sensors"] == []
+    values, errors, warnings = config_compiler.compile_config(path, os.path.join(directory, "secrets.py"))
+    assert values is None
+    for name in OLD_MISSING:
+        assert "config.py: %s is missing (see config_dist.py)" % name in errors, name
+
+
+def main():
+    check()
+    compare()
+    old_config()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_discipline.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host simulation: RTC drift discipline vs fixed resync intervals.
+#   *
+#   *          A simulated RTC drifts by a base rate plus a daily temperature
+#   *          swing. Over 60 days it is kept in time by fixed 7-day and 1-day
+#   *          resyncs, and by ClockDiscipline (drift correction between
+#   *          syncs, adaptive interval), with a reboot half way to show the
+#   *          persisted estimate at work. Prints syncs, RTC corrections and
+#   *          the worst and typical error.
+#   *          Run from the repository root: python3 bench/bench_discipline.py
+#   *
+#   ******************************************************************************
+#   */
+import math
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, ".")
+
+from clock_discipline import ClockDiscipline
+from state_store import StateStore
+
+DAYS = 60
+STEP_S = 60 # ntp_task wakes up once a minute
+TARGET_MS = 200
+NTP_NOISE_MS = 3 # offset measurement error
+SET_NOISE_MS = 2 # error of an RTC write on a second boundary
+
+
+def drift_ppm(t, base):
+    return base + 3 * math.sin(2 * math.pi * t / 86400)
+
+
+def simulate(base_ppm, interval_s=None, path=None, reboot_at=None):
+    # interval_s: fixed resync interval without correction; None: ClockDiscipline.
+    random.seed(1)
+    make = lambda: ClockDiscipline(TARGET_MS, 3600, 604800, StateStore(path) if path else None)
+    discipline = make() if interval_s is None else None
+    error = random.uniform(-SET_NOISE_MS, SET_NOISE_MS) # RTC minus true time, ms
+    last_sync = 0
+    syncs = 1
+    corrections = 0
+    worst = 0
+    over = 0
+    abs_sum = 0
+    steps = DAYS * 86400 // STEP_S
+    if discipline:
+        discipline.synced(0, None)
+    for i in range(1, steps + 1):
+        t = i * STEP_S
+        error += drift_ppm(t, base_ppm) * STEP_S / 1000
+        if reboot_at is not None and t == reboot_at:
+            corrections += discipline.corrections
+            discipline.store.flush(force=True)
+            discipline = make() # the estimate comes back from the file
+            syncs += 1
+            discipline.synced(t, None) # the boot-time sync
+            error = random.uniform(-SET_NOISE_MS, SET_NOISE_MS)
+        rtc_s = t + int(error // 1000)
+        if discipline:
+            ms = discipline.due_correction(rtc_s)
+            if ms:
+                error -= ms + random.uniform(-SET_NOISE_MS, SET_NOISE_MS)
+                discipline.corrected(rtc_s, ms)
+            due = discipline.next_sync_in(rtc_s) == 0
+        else:
+            due = t - last_sync >= interval_s
+        worst = max(worst, abs(error))
+        abs_sum += abs(error)
+        over += abs(error) > TARGET_MS
+        if due:
+            offset = -error + random.uniform(-NTP_NOISE_MS, NTP_NOISE_MS)
+            if discipline:
+                discipline.synced(rtc_s, int(offset))
+            error = random.uniform(-SET_NOISE_MS, SET_NOISE_MS)
+            last_sync = t
+            syncs += 1
+    if discipline:
+        corrections += discipline.corrections
+        if discipline.store:
+            discipline.store.flush(force=True)
+    return syncs, corrections, worst, abs_sum / steps, over * 100 / steps, discipline
+
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), "state.json")
+    print("RTC drift   policy                    syncs  RTC fixes  worst ms   mean ms  over %d ms" % TARGET_MS)
+    for base in (2, 20, 60):
+        for name, kwargs in (("fixed 7 days", {"interval_s": 7 * 86400}), ("fixed 1 day", {"interval_s": 86400}),
+                             ("discipline", {"path": path, "reboot_at": DAYS * 86400 // 2})):
+            if os.path.exists(path):
+                os.remove(path)
+            syncs, corrections, worst, mean, over, d = simulate(base, **kwargs)
+            print("%6d ppm  %-24s %6d %10d %9.0f %9.1f %9.2f%%" % (base, name, syncs, corrections, worst, mean, over))
+            if d:
+                assert worst < 2 * TARGET_MS and mean < TARGET_MS / 2
+                assert abs(d.drift_ppm - base) < 3
+    # A reboot keeps the estimate: the first hour after it is already corrected.
+    simulate(20, path=path)
+    fresh = ClockDiscipline(TARGET_MS, 3600, 604800, StateStore(path))
+    print("after a reboot: drift %.1f ppm, next sync in %d s" % (fresh.drift_ppm, fresh.interval_s))
+    assert abs(fresh.drift_ppm - 20) < 3 and fresh.interval_s > 3600
+
+
+if __name__ == "__main__":
+    main()
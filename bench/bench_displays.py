@@ -0,0 +1,129 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_displays.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host check: several LCDs on one clock.
+#   *
+#   *          Runs the clock (hal_sim) with three LCDs on two buses: one on
+#   *          a slow bus, one unplugged for a while. Prints each one's I2C
+#   *          traffic and how long after the tick its frame was complete,
+#   *          with the frames sent in slices (lcd_displays.SLICE_OPS) and
+#   *          whole, and checks that every LCD shows the time and its own
+#   *          values, the unplugged one again once it is back.
+#   *          Run from the repository root: python3 bench/bench_displays.py
+#   *
+#   ******************************************************************************
+#   */
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+import hal_sim
+from lcd_displays import SLICE_OPS
+from lcd_framebuf import LCD_TX_PER_OP
+
+SLOW = "i2c1:0x26" # a long cable: 10 times the 400 kHz transfer time
+FAST = "i2c0:0x27"
+UNPLUGGED = "i2c1:0x3f"
+US_PER_TRANSFER = 50 # two bytes at 400 kHz, with start and stop
+SENSORS = [{'entity': 'weather.forecast_home', 'attribute': 'temperature', 'suffix': '\x00C', 'label': 'Outside'},
+           {'entity': 'sensor.humidity', 'suffix': '%', 'label': 'Humidity'}]
+# The slow one has a page of its sensors, so it repaints every 5 s.
+LAYOUT = {FAST: {'sensors': [0], 'pages': 0}, SLOW: {'sensors': [1]}, UNPLUGGED: {'sensors': [0, 1], 'pages': 0}}
+
+
+def time_frames(sim, delays):
+    # Per LCD, the simulated ms from the start of the draw to its frame sent.
+    main = sim.main
+    start = [0]
+    draw = main.displays.draw
+
+    def timed_draw():
+        start[0] = sim.clock.mono
+        draw()
+    main.displays.draw = timed_draw
+    for d in main.displays.displays:
+        delays[d.name] = []
+
+        def timed_flush(budget=-1, d=d, flush=d.fb.flush):
+            sent = flush(budget)
+            if sent and not d.fb.pending:
+                delays[d.name].append(1000 * (sim.clock.mono - start[0]))
+            return sent
+        d.fb.flush = timed_flush
+
+
+def shows_time(sim, name):
+    main = sim.main
+    t = int(sim.clock.true_time())
+    local = [time.gmtime(s + 60 * main.time_shift_minutes + main.tz.dst_offset(s)) for s in (t - 1, t)]
+    rows = sim.screen(name)
+    return rows[1][:8] in ["%02d:%02d:%02d" % (tm[3], tm[4], tm[5]) for tm in local]
+
+
+def run(slice_ops):
+    sim = hal_sim.Simulation({"ha_sensors": SENSORS, "lcd_layout": LAYOUT, "display_page_sec": 5}, lcds=(SLOW, FAST, UNPLUGGED))
+    for name, device in sim.board.lcd_devices.items():
+        device.us_per_transfer = US_PER_TRANSFER * (10 if name == SLOW else 1)
+    delays = {}
+    checks = []
+
+    def start(sim):
+        sim.main.displays.slice_ops = slice_ops
+        time_frames(sim, delays)
+
+    def unplug(sim):
+        sim.board.lcd_devices[UNPLUGGED].present = False
+
+    def plug(sim):
+        sim.board.lcd_devices[UNPLUGGED].present = True
+
+    def check(sim):
+        checks.append({name: (shows_time(sim, name), sim.screen(name)) for name in sim.board.lcd_devices})
+    sim.at(0.01, start)
+    sim.at(0.25, unplug)
+    sim.at(0.3, check)
+    sim.at(0.5, plug)
+    sim.at(0.6, check)
+    sim.run(0.6 + 1 / 7200)
+    s = sim.summary()
+    displays = {d.name: d for d in sim.main.displays.displays}
+    sim.close()
+    print("slices of %s LCD ops:" % (slice_ops if slice_ops > 0 else "all the"))
+    for name in (FAST, SLOW, UNPLUGGED):
+        d = displays[name]
+        frames = sorted(delays[name])
+        print("  %-10s %8d I2C B/h  frame sent after %5.1f ms mean, %5.1f ms max  %3d errors %d reopens   %s" % (
+            name, s["i2c_bytes_by_lcd"][name] / s["simulated_h"], sum(frames) / len(frames), frames[-1], d.errors, d.reopens,
+            " | ".join(checks[-1][name][1])))
+    return s, displays, delays, checks
+
+
+def main():
+    s, displays, sliced, checks = run(SLICE_OPS)
+    _, _, whole, _ = run(-1)
+    # Every LCD shows the time, and its own values.
+    out, back = checks
+    assert out[FAST][0] and back[FAST][0] and back[UNPLUGGED][0]
+    assert out[FAST][1][1].endswith(" 22°C") and back[FAST][1][1].endswith(" 22°C")
+    assert back[UNPLUGGED][1][1][-4:] in ("22°C", " 22%")
+    for rows in checks: # the face or its sensor page
+        shown, screen = rows[SLOW]
+        assert screen[1].endswith(" 22%") if shown else screen[0] == "Humidity     22%"
+    assert displays[UNPLUGGED].errors >= 1 and displays[UNPLUGGED].reopens >= 1
+    assert displays[FAST].errors == 0 and displays[SLOW].errors == 0
+    # The unplugged one cost next to nothing while it was out.
+    assert s["i2c_bytes_by_lcd"][UNPLUGGED] < s["i2c_bytes_by_lcd"][FAST]
+    # In slices, the slow LCD ahead of the fast one holds it up by a slice
+    # at most, whole by its frame (a page is twice a slice).
+    slice_ms = SLICE_OPS * LCD_TX_PER_OP * 10 * US_PER_TRANSFER / 1000
+    print("a slice of %s: %.1f ms" % (SLOW, slice_ms))
+    assert max(sliced[FAST]) < slice_ms + 2 < max(whole[FAST])
+    assert max(sliced[FAST]) < max(sliced[SLOW])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_event_log.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host check: the event log.
+#   *
+#   *          Times log() against a print() of the same diagnostic to a slow
+#   *          console and checks that logging allocates nothing, that the ring
+#   *          overwrites the oldest events, that flush() and lines_from_file()
+#   *          give the events back with their times, that a failed flash
+#   *          write keeps the events for the next flush, and that a simulated
+#   *          WiFi outage shows up in the log served at /log.
+#   *          Run from the repository root: python3 bench/bench_event_log.py
+#   *
+#   ******************************************************************************
+#   */
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, ".")
+
+import event_log
+import hal_sim
+from bench_metrics import free_port, scrape
+from compat import ticks_us, ticks_diff
+
+N = 10000
+BAUD = 115200 # the Pico's USB serial is faster, a UART console is not
+
+
+class SlowConsole:
+    # Takes as long as the bytes would at BAUD.
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, text):
+        self.bytes += len(text)
+        due = time.perf_counter() + len(text) * 10 / BAUD
+        while time.perf_counter() < due:
+            pass
+
+    def flush(self):
+        pass
+
+
+def cost():
+    log = event_log.EventLog(128)
+    start = ticks_us()
+    for i in range(N):
+        log.log(event_log.NTP_SYNCED, 0, i, 20)
+    logged = ticks_diff(ticks_us(), start) / N
+    console = SlowConsole()
+    start = ticks_us()
+    for i in range(100):
+        print("Using %s: offset %d ms, round trip %d ms" % ("pool.ntp.org", i, 20), file=console)
+    printed = ticks_diff(ticks_us(), start) / 100
+    tracemalloc.start()
+    log.log(event_log.RTC_SET, 1, 2, 3) # the first call may allocate
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(N):
+        log.log(event_log.RTC_SET, i, -i, 1 << 40)
+    grown = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print("log() %.2f us, print() at %d baud %.0f us; %d bytes grown over %d events, ring %d bytes" % (
+        logged, BAUD, printed, grown, N, len(log.buf)))
+    assert grown < 256
+    assert logged * 10 < printed
+
+
+def ring():
+    ticks = [0]
+    log = event_log.EventLog(4, lambda: ticks[0])
+    for i in range(6):
+        ticks[0] = 1000 * i
+        log.log(event_log.WIFI_STATE, i % len(event_log.WIFI_STATES))
+    assert log.logged == 6 and log.lost == 2
+    assert [r[2] for r in log.records()] == [2, 3, 4, 5]
+    assert [r[0] for r in log.records(5)] == [5000]
+    lines = log.text().splitlines()
+    assert lines[0] == "(2 older events lost)" and lines[1].endswith("WiFi: " + event_log.WIFI_STATES[2])
+    log.log(event_log.NTP_SYNCED, 1, 1 << 40, -3) # clamped
+    assert list(log.lines())[-1].endswith("offset more than 24 days, round trip -3 ms")
+    assert event_log.format_event(event_log.WIFI_UP, event_log.ip_number("192.168.0.10"), event_log.ip_number("192.168.0.1"), 0) \
+        == "WiFi: up, IP 192.168.0.10, gateway 192.168.0.1"
+    assert event_log.format_event(event_log.RTC_SET, 12, -150, 3600) == "RTC set 12 ms after the second, drift -1.50 ppm, next sync in 3600 s"
+    assert event_log.format_event(99, 1, 2, 3) == "event 99 (1, 2, 3)"
+    assert event_log.wifi_status(-3) == "failed due to incorrect password"
+
+
+def flash():
+    ticks = [0]
+    log = event_log.EventLog(64, lambda: ticks[0])
+    path = os.path.join(tempfile.mkdtemp(), "events.bin")
+    now = int(time.time())
+    for i in range(40):
+        ticks[0] = 60000 * i
+        log.log(event_log.HA_SYNCED, 1, 2000 + i)
+        if i == 20:
+            assert log.flush(path, batch=32) == 0 # not a batch yet
+    ticks[0] = 60000 * 40
+    assert log.flush(path, batch=32) == 40 and log.flush(path, force=True) == 0
+    log.log(event_log.HA_TIMEOUT)
+    assert log.flush(path, force=True) == 1
+    lines = list(event_log.lines_from_file(path))
+    assert len(lines) == 41 and lines[-1].endswith("HA: request timed out")
+    # 40 minutes before the anchor, to the second.
+    assert lines[0] == "%s HA: 1 value(s), the first 20.00" % event_log._when(now - 40 * 60) or \
+        lines[0] == "%s HA: 1 value(s), the first 20.00" % event_log._when(now + 1 - 40 * 60)
+    log.flush(path, max_bytes=0, force=True) # nothing new: the file stays
+    log.log(event_log.HA_TIMEOUT)
+    log.flush(path, max_bytes=0, force=True)
+    assert os.path.exists(path + ".old") and len(list(event_log.lines_from_file(path))) == 1
+    # The flash refuses the write: nothing is lost, the next flush has it all.
+    for i in range(3):
+        log.log(event_log.HA_TIMEOUT)
+    assert log.flush(os.path.join(path, "no", "such", "dir"), force=True) == 0 and log.flush_failures == 1
+    assert log.flush(path, force=True) == 3 and log.flush_failures == 1
+    assert len(list(event_log.lines_from_file(path))) == 4
+
+
+def simulated():
+    port = free_port()
+    sim = hal_sim.Simulation({"metrics_port": port})
+
+    def wifi_down(sim):
+        sim.ap.up = False
+        sim.ap.drop()
+
+    def wifi_up(sim):
+        sim.ap.up = True
+    sim.at(0.5, wifi_down)
+    sim.at(0.75, wifi_up)
+    served = []
+    sim.at(1, lambda sim: served.append(asyncio.ensure_future(scrape(port, "/log"))))
+    sim.run(1.001)
+    status, text = served[0].result()
+    sim.close()
+    print(text)
+    assert status.endswith("200 OK")
+    assert "WiFi: up, IP " in text and "NTP: host #0" in text and "HA: 1 value(s)" in text
+    assert text.count("WiFi: up, IP ") == 2 # joined, dropped, joined again
+
+
+def main():
+    cost()
+    ring()
+    flash()
+    simulated()
+
+
+if __name__ == "__main__":
+    main()
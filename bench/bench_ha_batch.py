@@ -0,0 +1,90 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_ha_batch.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host benchmark: requests and bytes per refresh vs sensor count.
+#   *
+#   *          A local HA stand-in answers both /api/states/<entity> and
+#   *          /api/template. For 1..8 sensors it compares one state request
+#   *          per sensor against the single batched template request.
+#   *          Run from the repository root: python3 bench/bench_ha_batch.py
+#   *
+#   ******************************************************************************
+#   */
+import json
+import sys
+
+sys.path.insert(0, ".")
+
+import async_http
+from compat import asyncio
+from ha_sensors import HaSensors
+
+# A realistic state document is mostly attributes the clock never shows.
+STATE = {"entity_id": "", "state": "21.5", "attributes": {"unit_of_measurement": "°C", "device_class": "temperature",
+         "state_class": "measurement", "friendly_name": "Outdoor sensor"}, "last_changed": "2026-10-18T10:00:00+00:00",
+         "last_updated": "2026-10-18T10:00:00+00:00", "context": {"id": "01HXXXXXXXXXXXXXXXXXXXXXXX", "parent_id": None, "user_id": None}}
+
+
+class StandIn:
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+
+    async def handle(self, reader, writer):
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            method, path, _ = line.decode().split(" ", 2)
+            length = 0
+            while True:
+                header = await reader.readline()
+                if header in (b"\r\n", b""):
+                    break
+                if header.lower().startswith(b"content-length:"):
+                    length = int(header.split(b":")[1])
+            body = await reader.readexactly(length) if length else b""
+            self.requests += 1
+            self.bytes += len(line) + length
+            if path == "/api/template":
+                template = json.loads(body)["template"]
+                answer = "\n".join("21.5" for _ in template.split("\n")).encode()
+            else:
+                state = dict(STATE)
+                state["entity_id"] = path.rsplit("/", 1)[1]
+                answer = json.dumps(state).encode()
+            response = b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n" % len(answer) + answer
+            self.bytes += len(response)
+            writer.write(response)
+            await writer.drain()
+        writer.close()
+
+
+async def main():
+    stand_in = StandIn()
+    server = await asyncio.start_server(stand_in.handle, "127.0.0.1", 0)
+    url = "http://127.0.0.1:%d/" % server.sockets[0].getsockname()[1]
+    headers = {"Authorization": "Bearer x"}
+    print("sensors  per-entity: requests  bytes | batched: requests  bytes")
+    for count in (1, 2, 4, 8):
+        sensors = [{'entity': "sensor.s%d" % i, 'suffix': "\x00C"} for i in range(count)]
+        client = async_http.HttpClient(url)
+        stand_in.requests = stand_in.bytes = 0
+        for sensor in sensors:
+            status, _, body = await client.request("GET", "/api/states/" + sensor['entity'], headers)
+            float(json.loads(body)["state"])
+        single = (stand_in.requests, stand_in.bytes)
+        stand_in.requests = stand_in.bytes = 0
+        batch = HaSensors(sensors, headers)
+        assert await batch.fetch(client)
+        assert batch.cache.values == [21.5] * count
+        print("%7d %20d %6d | %17d %6d" % (count, single[0], single[1], stand_in.requests, stand_in.bytes))
+        await client.close()
+    server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
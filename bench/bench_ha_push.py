@@ -0,0 +1,244 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_ha_push.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host check: HA push mode against a local WebSocket stub.
+#   *
+#   *          The stub speaks the bits of the HA WebSocket API the clock
+#   *          uses (auth, subscribe_trigger, ping) and follows a script per
+#   *          connection: serve events and drop, refuse, go silent, serve.
+#   *          Prints the connection timeline, so reconnects, the growing
+#   *          backoff and the ping timeout are visible, and the push latency.
+#   *          A stub that stalls in the middle of a frame head gets a new
+#   *          connection, not a ping into the half-read frame; so does one
+#   *          that sends JSON that is no object.
+#   *          Last, a pushed value is on the LCD (hal_sim) within a second,
+#   *          also between the minute ticks without seconds.
+#   *          Run from the repository root: python3 bench/bench_ha_push.py
+#   *
+#   ******************************************************************************
+#   */
+import base64
+import hashlib
+import json
+import struct
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+import hal_sim
+import ws_client
+from compat import asyncio
+from ha_push import HaPush, SUB_ID
+
+TOKEN = "secret"
+ENTITY = "weather.forecast_home"
+GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# What the stub does on each connection, in order; the last one repeats.
+SCRIPT = [
+    ("events", [10.0, 10.5, 11.0], "drop"),
+    ("refuse",),
+    ("refuse",),
+    ("refuse",),
+    ("events", [12.0], "silent"), # stops answering, even the pings
+    ("events", [13.0], "stay"),
+]
+# The first two bytes of a frame head, then nothing for a ping interval.
+STALL_SCRIPT = [
+    ("stall", [14.0], "stay"),
+    ("events", [15.0], "stay"),
+]
+# A JSON list where auth_required belongs.
+JUNK_SCRIPT = [
+    ("junk",),
+    ("events", [16.0], "stay"),
+]
+
+
+def event(value):
+    state = {"entity_id": ENTITY, "state": "cloudy", "attributes": {"temperature": value, "humidity": 80}}
+    return {"id": SUB_ID, "type": "event", "event": {"variables": {"trigger": {
+        "platform": "state", "entity_id": ENTITY, "from_state": state, "to_state": state}}, "context": {"id": "x"}}}
+
+
+class Stub:
+    def __init__(self, script=SCRIPT):
+        self.script = script
+        self.connections = []
+        self.sent_at = {}
+        self.open = 0 # handlers still running
+
+    async def send(self, writer, message):
+        await ws_client.write_frame(writer, ws_client.OP_TEXT, json.dumps(message).encode(), mask=False)
+
+    async def recv(self, reader, writer):
+        while True:
+            fin, opcode, length, key = await ws_client.read_frame_head(reader)
+            payload = await ws_client.read_payload(reader, length, key)
+            if opcode == ws_client.OP_TEXT:
+                return json.loads(bytes(payload))
+
+    async def handle(self, reader, writer):
+        step = self.script[min(len(self.connections), len(self.script) - 1)]
+        self.connections.append((time.monotonic(), step[0]))
+        self.open += 1
+        try:
+            key = None
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"sec-websocket-key:"):
+                    key = line.split(b":", 1)[1].strip()
+            if step[0] == "refuse":
+                writer.write(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\n\r\n")
+                return
+            accept = base64.b64encode(hashlib.sha1(key + GUID).digest())
+            writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+            if step[0] == "junk":
+                await self.send(writer, ["auth_required"])
+                await reader.read() # till the client hangs up
+                return
+            await self.send(writer, {"type": "auth_required", "ha_version": "2026.10.0"})
+            auth = await self.recv(reader, writer)
+            if auth.get("access_token") != TOKEN:
+                await self.send(writer, {"type": "auth_invalid", "message": "Invalid access token or password"})
+                return
+            await self.send(writer, {"type": "auth_ok", "ha_version": "2026.10.0"})
+            sub = await self.recv(reader, writer)
+            assert sub["type"] == "subscribe_trigger" and sub["trigger"]["entity_id"] == ENTITY
+            await self.send(writer, {"id": sub["id"], "type": "result", "success": True, "result": None})
+            for value in step[1]:
+                await asyncio.sleep(0.05)
+                self.sent_at[value] = time.monotonic()
+                if step[0] == "stall":
+                    payload = json.dumps(event(value)).encode()
+                    assert len(payload) >= 126 # so a 16-bit length follows the first two bytes
+                    frame = struct.pack("!BBH", 0x80 | ws_client.OP_TEXT, 126, len(payload)) + payload
+                    writer.write(frame[:2])
+                    await writer.drain()
+                    await asyncio.sleep(0.5)
+                    writer.write(frame[2:])
+                    await writer.drain()
+                    continue
+                await self.send(writer, event(value))
+            if step[2] == "drop":
+                return
+            while True:
+                message = await self.recv(reader, writer)
+                if message["type"] == "ping" and step[2] == "stay":
+                    await self.send(writer, {"id": message["id"], "type": "pong"})
+        except (OSError, EOFError):
+            pass
+        finally:
+            writer.close()
+            self.open -= 1
+
+
+async def main():
+    stub = Stub()
+    server = await asyncio.start_server(stub.handle, "127.0.0.1", 0)
+    url = "http://127.0.0.1:%d/api/states/%s" % (server.sockets[0].getsockname()[1], ENTITY)
+    push = HaPush(url, TOKEN, ENTITY, "['attributes']['temperature']", ping_ms=300, backoff_min_ms=50, backoff_max_ms=400)
+    received = []
+    latencies = []
+    resubscribed = []
+
+    def on_value(value):
+        received.append(value)
+        latencies.append((time.monotonic() - stub.sent_at[value]) * 1000)
+
+    async def on_subscribed():
+        resubscribed.append(time.monotonic())
+
+    task = asyncio.create_task(push.run(on_value, on_subscribed))
+    while 13.0 not in received:
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(1) # a few ping rounds on the good connection
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    start = stub.connections[0][0]
+    print("connection  at ms  stub")
+    for i, (at, what) in enumerate(stub.connections):
+        print("%10d %6d  %s" % (i + 1, (at - start) * 1000, what))
+    print("values: %s, push latency max %.1f ms" % (received, max(latencies)))
+    print("connects %d, failures %d, pings %d, resubscribed %d times" % (push.connects, push.failures, push.pings, len(resubscribed)))
+    assert received == [10.0, 10.5, 11.0, 12.0, 13.0]
+    assert len(stub.connections) == 6 and push.subscribed is False
+    gaps = [b[0] - a[0] for a, b in zip(stub.connections[1:4], stub.connections[2:5])]
+    assert gaps[0] < gaps[1] < gaps[2], gaps # the backoff grows while HA refuses
+
+    wrong = HaPush(url, "wrong", ENTITY, "['attributes']['temperature']", ping_ms=300, backoff_min_ms=50)
+    await asyncio.wait_for(wrong.run(on_value), 2) # gives up instead of retrying
+    print("wrong token: auth_failed %s after %d connect(s)" % (wrong.auth_failed, wrong.connects))
+    assert wrong.auth_failed and wrong.connects == 1
+    server.close()
+
+
+async def bad_first(script, value):
+    # A push client against a stub whose first connection goes wrong, till
+    # value came over the second one; returns (values, client, pings by then).
+    stub = Stub(script)
+    server = await asyncio.start_server(stub.handle, "127.0.0.1", 0)
+    url = "http://127.0.0.1:%d/api/states/%s" % (server.sockets[0].getsockname()[1], ENTITY)
+    push = HaPush(url, TOKEN, ENTITY, "['attributes']['temperature']", ping_ms=300, backoff_min_ms=50, backoff_max_ms=400)
+    received = []
+    task = asyncio.create_task(push.run(received.append))
+    await asyncio.wait_for(until(lambda: value in received), 5)
+    pings = push.pings
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    await asyncio.wait_for(until(lambda: not stub.open), 2) # a stalled one is still asleep
+    server.close()
+    return received, push, pings
+
+
+async def stalled():
+    # A timeout part way through a frame head ends the connection: a ping
+    # there would leave the next read in the middle of the frame.
+    received, push, pings = await bad_first(STALL_SCRIPT, 15.0)
+    print("stalled frame head: values %s, connects %d, pings %d" % (received, push.connects, pings))
+    assert received == [15.0] and push.connects == 2 and pings == 0
+
+
+async def not_an_object():
+    # Valid JSON that is no object is a protocol error: the client reconnects.
+    received, push, _ = await bad_first(JUNK_SCRIPT, 16.0)
+    print("JSON list for a message: values %s, connects %d, failures %d" % (received, push.connects, push.failures))
+    assert received == [16.0] and push.connects == 2 and push.failures == 1
+
+
+async def until(condition):
+    while not condition():
+        await asyncio.sleep(0.01)
+
+
+def shown():
+    # The push at 20 s past a minute, the LCD looked at 0.5 s before and after.
+    sim = hal_sim.Simulation({"show_seconds": 0})
+    seen = []
+    at = 1 + 20 / 3600
+    sim.at(at - 0.5 / 3600, lambda sim: seen.append(sim.screen()[1]))
+    sim.at(at, lambda sim: sim.main.on_pushed_temperature(30.5))
+    sim.at(at + 0.5 / 3600, lambda sim: seen.append(sim.screen()[1]))
+    sim.run(at + 0.01)
+    sim.close()
+    print("pushed 30.5 between the minute ticks: %r, then %r" % tuple(seen))
+    assert seen[0].endswith(" 22°C") and seen[1].endswith(" 30°C") and seen[0][:5] == seen[1][:5]
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+    asyncio.run(stalled())
+    asyncio.run(not_an_object())
+    shown()
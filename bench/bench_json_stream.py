@@ -0,0 +1,145 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_json_stream.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host benchmark: streaming extractor vs json.loads + eval.
+#   *
+#   *          Builds weather.forecast_home state documents with growing
+#   *          forecast arrays and reads one value out of them both ways,
+#   *          reporting the heap high-water mark and the parse time. Then
+#   *          the same documents are served by a local HTTP stand-in, with
+#   *          Content-Length and chunked bodies, through HttpClient's sink.
+#   *          Run from the repository root: python3 bench/bench_json_stream.py
+#   *
+#   ******************************************************************************
+#   */
+import json
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+import async_http
+from compat import asyncio
+from json_stream import JsonPathExtractor
+
+PATHS = ("['attributes']['temperature']", "['last_updated']") # early and at the very end
+REPEAT = 20
+
+
+def forecast_home(entries):
+    forecast = []
+    for i in range(entries):
+        forecast.append({"condition": "partlycloudy", "datetime": "2026-10-%02dT%02d:00:00+00:00" % (18 + i // 24, i % 24),
+                         "wind_bearing": 212.4, "cloud_coverage": 57.8, "temperature": 12.3 + i % 7, "templow": 6.1,
+                         "wind_speed": 14.4, "precipitation": 0.2, "humidity": 81})
+    return {"entity_id": "weather.forecast_home", "state": "partlycloudy",
+            "attributes": {"temperature": 11.6, "dew_point": 8.4, "temperature_unit": "°C", "humidity": 80,
+                           "cloud_coverage": 62.5, "pressure": 1012.3, "pressure_unit": "hPa", "wind_bearing": 218.7,
+                           "wind_speed": 15.8, "wind_speed_unit": "km/h", "visibility_unit": "km",
+                           "precipitation_unit": "mm", "forecast": forecast,
+                           "attribution": "Weather forecast from met.no, delivered by the Norwegian Meteorological Institute.",
+                           "friendly_name": "Forecast Home", "supported_features": 3},
+            "last_changed": "2026-10-18T06:00:00+00:00", "last_updated": "2026-10-18T10:21:00.123456+00:00",
+            "context": {"id": "01HXXXXXXXXXXXXXXXXXXXXXXX", "parent_id": None, "user_id": None}}
+
+
+def heap_probe():
+    # Same as in bench_render.py: (allocated, reset, stop).
+    try:
+        import tracemalloc
+        tracemalloc.start()
+        return lambda: tracemalloc.get_traced_memory()[1], tracemalloc.reset_peak, tracemalloc.stop
+    except ImportError: # MicroPython unix port
+        import gc
+        gc.disable()
+        return gc.mem_alloc, gc.collect, gc.enable
+
+
+def chunks(body, size=async_http.CHUNK_SIZE):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def legacy(pieces, path):
+    # What the clock did: the whole body in RAM, parsed, then the path eval'ed.
+    response = json.loads(b"".join(pieces))
+    return eval("response" + path, {"__builtins__": None}, {'response': response})
+
+
+def streamed(extractor):
+    def parse(pieces, path):
+        extractor.reset()
+        for piece in pieces:
+            if extractor.feed(piece):
+                break
+        return extractor.value
+    return parse
+
+
+def measure(parse, pieces, path):
+    allocated, reset, stop = heap_probe()
+    base = allocated()
+    reset()
+    value = parse(pieces, path)
+    peak = allocated() - base
+    stop()
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        parse(pieces, path)
+    return value, peak, (time.perf_counter() - start) * 1000 / REPEAT
+
+
+def compare():
+    print("forecast  body B  path                            | json+eval: peak B    ms | stream: peak B    ms  read B")
+    for entries in (0, 24, 96, 240):
+        body = json.dumps(forecast_home(entries)).encode()
+        pieces = chunks(body)
+        for path in PATHS:
+            extractor = JsonPathExtractor(path)
+            old_value, old_peak, old_ms = measure(legacy, pieces, path)
+            new_value, new_peak, new_ms = measure(streamed(extractor), pieces, path)
+            assert old_value == new_value, (old_value, new_value)
+            print("%8d %7d  %-31s | %15d %6.2f | %12d %6.2f %7d" % (entries, len(body), path, old_peak, old_ms,
+                                                                    new_peak, new_ms, extractor.bytes_seen))
+
+
+async def handle(reader, writer):
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        entries = int(line.split(b" ")[1].rsplit(b"/", 1)[1])
+        body = json.dumps(forecast_home(entries)).encode()
+        if entries % 2:
+            writer.write(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n")
+            for piece in chunks(body, 1000):
+                writer.write(b"%x\r\n" % len(piece) + piece + b"\r\n")
+            writer.write(b"0\r\n\r\n")
+        else:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+        await writer.drain()
+    writer.close()
+
+
+async def over_http():
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    client = async_http.HttpClient("http://127.0.0.1:%d/" % server.sockets[0].getsockname()[1])
+    extractor = JsonPathExtractor(PATHS[0])
+    for entries in (24, 25, 240, 241): # odd counts are sent chunked
+        extractor.reset()
+        status, _, body = await client.request("GET", "/api/states/%d" % entries, sink=extractor.feed)
+        assert status == 200 and body is None and extractor.value == 11.6
+    # The rest of each body was drained, so all requests shared one connection.
+    print("over HTTP: %d requests, %d connection(s)" % (client.requests, client.handshakes))
+    assert client.handshakes == 1
+    await client.close()
+    server.close()
+
+
+if __name__ == "__main__":
+    compare()
+    asyncio.run(over_http())
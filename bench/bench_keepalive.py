@@ -0,0 +1,163 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_keepalive.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host benchmark: HA polling with and without keep-alive.
+#   *
+#   *          Runs a local Home Assistant stand-in over plain HTTP and, when
+#   *          the openssl command is available, over HTTPS with a throwaway
+#   *          self-signed certificate. The stand-in drops every connection
+#   *          after DROP_AFTER requests, like a server idle timeout would,
+#   *          so the transparent reconnect is exercised too. Last, a body
+#   *          cut short on a reused connection must fail the request rather
+#   *          than feed the sink again on a new one.
+#   *          Run from the repository root: python3 bench/bench_keepalive.py
+#   *
+#   ******************************************************************************
+#   */
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+
+import async_http
+from compat import asyncio
+
+POLLS = 20
+DROP_AFTER = 8
+BODY = b'{"state": "sunny", "attributes": {"temperature": 21.5}}'
+PATH = "/api/states/weather.forecast_home"
+
+
+class StandIn:
+    def __init__(self):
+        self.connections = 0
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        served = 0
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                while (await reader.readline()) not in (b"\r\n", b""):
+                    pass
+                served += 1
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n" % len(BODY) + BODY)
+                await writer.drain()
+                if served >= DROP_AFTER:
+                    break
+        except (ConnectionError, ssl.SSLError):
+            pass
+        writer.close()
+
+
+def self_signed_context(workdir):
+    key = os.path.join(workdir, "key.pem")
+    cert = os.path.join(workdir, "cert.pem")
+    try:
+        subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=127.0.0.1",
+                        "-keyout", key, "-out", cert], check=True, capture_output=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    server = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    server.load_cert_chain(cert, key)
+    client = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    client.check_hostname = False
+    client.verify_mode = ssl.CERT_NONE
+    return server, client
+
+
+async def poll_one_shot(url, client_ssl):
+    scheme, host, port, path = async_http.parse_url(url)
+    reader, writer = await asyncio.open_connection(host, port, ssl=client_ssl)
+    try:
+        await async_http.write_request(writer, "GET", host, path, None, None, False)
+        return await async_http.read_response(reader)
+    finally:
+        writer.close()
+
+
+async def run(scheme, server_ssl, client_ssl):
+    stand_in = StandIn()
+    server = await asyncio.start_server(stand_in.handle, "127.0.0.1", 0, ssl=server_ssl)
+    url = "%s://127.0.0.1:%d%s" % (scheme, server.sockets[0].getsockname()[1], PATH)
+    start = time.perf_counter()
+    for i in range(POLLS):
+        await poll_one_shot(url, client_ssl)
+    one_shot_ms = 1000 * (time.perf_counter() - start) / POLLS
+    one_shot_connections = stand_in.connections
+    stand_in.connections = 0
+    client = async_http.HttpClient(url, ssl=client_ssl)
+    start = time.perf_counter()
+    for i in range(POLLS):
+        status, headers, body = await client.request("GET", PATH)
+        assert status == 200 and body == BODY
+    keep_alive_ms = 1000 * (time.perf_counter() - start) / POLLS
+    await client.close()
+    server.close()
+    print("%-5s one-shot: %6.2f ms/poll, %2d connections | keep-alive: %6.2f ms/poll, %2d handshakes, %2d reused, %d reconnects (server saw %d)" % (
+        scheme, one_shot_ms, one_shot_connections, keep_alive_ms, client.handshakes, client.reused, client.reconnects, stand_in.connections))
+
+
+async def cut_short():
+    # The second response on the connection breaks off half way through the body.
+    connections = []
+
+    async def handle(reader, writer):
+        connections.append(writer)
+        for half in (False, True):
+            await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b""):
+                pass
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n" % len(BODY) + (BODY[:10] if half else BODY))
+            await writer.drain()
+        writer.close()
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    client = async_http.HttpClient("http://127.0.0.1:%d" % server.sockets[0].getsockname()[1])
+    fed = []
+    await client.request("GET", PATH, sink=fed.append)
+    del fed[:]
+    try:
+        await client.request("GET", PATH, sink=fed.append)
+    except EOFError:
+        pass
+    else:
+        raise AssertionError("a cut body passed")
+    assert fed == [BODY[:10]] and client.reconnects == 0 and len(connections) == 1
+    # Nor is the request sent again when the sink itself fails.
+    await client.request("GET", PATH)
+
+    def bad_sink(data):
+        raise ValueError("sink")
+    try:
+        await client.request("GET", PATH, sink=bad_sink)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("the sink's exception was swallowed")
+    assert len(connections) == 2 and client.reconnects == 0 and not client.connected
+    server.close()
+    print("cut body: sink fed once, the request failed without a resend")
+
+
+async def main():
+    await run("http", None, None)
+    await cut_short()
+    with tempfile.TemporaryDirectory() as workdir:
+        server_ssl, client_ssl = self_signed_context(workdir)
+        if server_ssl is None:
+            print("https skipped: openssl is not available")
+        else:
+            await run("https", server_ssl, client_ssl)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
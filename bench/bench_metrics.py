@@ -0,0 +1,189 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_metrics.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host check: the metrics endpoint, and what the metrics cost.
+#   *
+#   *          Runs the clock for two simulated hours (hal_sim) with the
+#   *          metrics endpoint on, scrapes it like Prometheus would and
+#   *          checks the numbers against the simulation: ticks, NTP syncs, HA
+#   *          fetches, I2C bytes, the power ledger at /power. An HA outage
+#   *          takes the HA breaker through its transitions, and the breaker
+#   *          counters follow them. Then times a
+#   *          display tick with and without the instrumentation
+#   *          display_task adds, and a scrape. Last, a client that
+#   *          connects and sends nothing is cut off in time.
+#   *          Run from the repository root: python3 bench/bench_metrics.py
+#   *
+#   ******************************************************************************
+#   */
+import asyncio
+import socket
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+import hal_sim
+import bench_suite
+import metrics
+
+TICKS = 3600
+
+
+def free_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+async def scrape(port, path="/metrics"):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET " + path.encode() + b" HTTP/1.1\r\nHost: clock\r\n\r\n")
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return head.split(b"\r\n")[0].decode(), body.decode()
+
+
+def parse(text):
+    # {name or name{labels}: value}, checking the exposition format on the way.
+    samples = {}
+    kinds = {}
+    for line in text.splitlines():
+        if not line:
+            continue
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split()
+            kinds[name] = kind
+            continue
+        if line.startswith("# HELP "):
+            continue
+        name, value = line.rsplit(" ", 1)
+        base = name.split("{")[0]
+        assert base in kinds or base.rsplit("_", 1)[0] in kinds, "no TYPE for " + name
+        samples[name] = float(value)
+    return samples
+
+
+def endpoint():
+    port = free_port()
+    sim = hal_sim.Simulation({"metrics_port": port}, crystal_ppm=15)
+    scraped = []
+    # One callback: the loop calls timers due at the same time in no set order.
+    sim.at(2, lambda sim: scraped.extend([asyncio.ensure_future(scrape(port)), asyncio.ensure_future(scrape(port, "/")),
+                                          asyncio.ensure_future(scrape(port, "/power"))]))
+    sim.run(2.001)
+    status, text = scraped[0].result()
+    missing, _ = scraped[1].result()
+    _, ledger = scraped[2].result()
+    main = sim.main
+    sim.close()
+    m = parse(text)
+    for name in sorted(m):
+        if "_bucket" not in name:
+            print("  %-36s %g" % (name, m[name]))
+    assert status.endswith("200 OK") and missing.endswith("404 Not Found")
+    assert abs(m["clock_tick_seconds_count"] - 2 * 3600) < 30
+    assert m['clock_tick_seconds_bucket{le="+Inf"}'] == m["clock_tick_seconds_count"]
+    assert m["clock_ntp_syncs_total"] == sim.ntp.requests and m["clock_ntp_failures_total"] == 0
+    assert m["clock_ha_fetches_total"] == sim.ha.requests and m["clock_ha_fetch_seconds_count"] == sim.ha.requests
+    assert 0 < m["clock_i2c_bytes_total"] <= main.fb.bytes_sent
+    assert m["clock_wifi_up"] == 1 and m["clock_wifi_connects_total"] == 1
+    assert m["clock_tick_overruns_total"] == 0
+    assert "clock_mem_free_low_bytes" not in m # CPython has no gc.mem_free()
+    total = ledger.splitlines()[-1].split()
+    assert total[0] == "total" and abs(int(total[1]) - 2 * 3600000) < 1000 and m["clock_power_mah_total"] > 0
+    return main
+
+
+class Uninstrumented:
+    # Stands in for main's tick histogram and its clock: display_task without the metrics.
+    def observe(self, value):
+        pass
+
+    def ticks_us(self):
+        return 0
+
+
+def breakers():
+    # HA away for 0.1 h to 1 h: three failed polls open the breaker, trials
+    # go through after the cool-downs, the first one after HA is back closes it.
+    port = free_port()
+    sim = hal_sim.Simulation({"metrics_port": port})
+    scraped = []
+    sim.at(0.1, lambda sim: setattr(sim.ha, "down", True))
+    sim.at(1, lambda sim: setattr(sim.ha, "down", False))
+    sim.at(1.6, lambda sim: scraped.append(asyncio.ensure_future(scrape(port))))
+    sim.run(1.601)
+    breaker = sim.main.ha_breaker
+    ntp_breaker = sim.main.ntp_breaker
+    sim.close()
+    m = parse(scraped[0].result()[1])
+    counts = [(name, m["clock_ha_breaker_%s_total" % name], m["clock_ntp_breaker_%s_total" % name]) for name in ("opens", "half_opens", "closes", "rejected")]
+    print("HA outage, 0.1 h to 1 h:  " + ", ".join("%s %d (NTP %d)" % c for c in counts))
+    for name, ha, ntp in counts:
+        assert ha == getattr(breaker, name) and ntp == getattr(ntp_breaker, name) == 0
+    assert m["clock_ha_breaker_opens_total"] >= 1 and m["clock_ha_breaker_closes_total"] == 1
+    assert m["clock_ha_breaker_half_opens_total"] >= 1 and m["clock_ha_breaker_rejected_total"] > 0
+
+
+def per_tick_us(main, instrumented):
+    bare = Uninstrumented()
+    m_tick, main_ticks_us = main.m_tick, main.ticks_us
+    if not instrumented:
+        main.m_tick, main.ticks_us = bare, bare.ticks_us
+    start = time.perf_counter() # the real clock, hal_sim has time.monotonic()
+    bench_suite.run_ticks(main, TICKS)
+    took = (time.perf_counter() - start) * 1000000 / TICKS
+    main.m_tick, main.ticks_us = m_tick, main_ticks_us
+    return took
+
+
+def overhead(main):
+    # display_task with and without its instrumentation, best of five.
+    bare = []
+    instrumented = []
+    for n in range(5):
+        bare.append(per_tick_us(main, False))
+        instrumented.append(per_tick_us(main, True))
+    bare = min(bare)
+    instrumented = min(instrumented)
+    start = time.perf_counter()
+    for _ in range(100):
+        text = main.registry.render()
+    render = (time.perf_counter() - start) * 10000
+    main.sim.close()
+    print("tick %.1f us bare, %.1f us instrumented: %.1f us or %.4f%% of the 1 s tick; scrape %.0f us, %d bytes" % (
+        bare, instrumented, instrumented - bare, (instrumented - bare) / 10000, render, len(text)))
+    assert instrumented - bare < 20 # per second, on the host
+
+
+async def silent_client():
+    metrics.REQUEST_TIMEOUT_S = 0.2
+    registry = metrics.Registry()
+    port = free_port()
+    server = await registry.serve(port, "127.0.0.1")
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    start = time.monotonic()
+    closed = await asyncio.wait_for(reader.read(), 2) # EOF once the server gives up on us
+    took = time.monotonic() - start
+    writer.close()
+    server.close()
+    print("silent client closed after %.2f s" % took)
+    assert closed == b"" and registry.timeouts == 1 and registry.requests == 0 and took < 1
+
+
+def main():
+    endpoint()
+    breakers()
+    overhead(bench_suite.import_main())
+    asyncio.run(silent_client())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_ntp.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host benchmark: concurrent NTP queries against local stand-ins.
+#   *
+#   *          UDP NTP stand-ins on 127.0.0.1 (hal_sim's NtpStub) serve a
+#   *          clock shifted by a known offset, with injected network
+#   *          delays: a dead host, slow and fast ones, an asymmetric one and
+#   *          an unsynchronised one. Shows the time the sync takes next to
+#   *          what the sequential one-host-at-a-time loop would need, and
+#   *          the offset error, and that dead hosts are waited for without
+#   *          polling.
+#   *          Then sets a fake RTC both the old way (the integer seconds of
+#   *          the answer, right away) and with set_at_boundary(), and
+#   *          reports how far from the server clock each one ends up, also
+#   *          when the loop was blocked past the second it waited for,
+#   *          once or several times, without a longer busy-wait.
+#   *          Run from the repository root: python3 bench/bench_ntp.py
+#   *
+#   ******************************************************************************
+#   */
+import random
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+import compat
+import hal_sim
+import ntp_client
+from compat import asyncio
+
+OFFSET_MS = 2500 # the stand-ins' clock runs this much ahead of ours
+TIMEOUT_S = 20 # ntp_srv_timeout
+
+
+class ShiftedClock:
+    # What the stand-ins serve: our clock, OFFSET_MS ahead.
+    def true_time(self):
+        return time.time() + OFFSET_MS / 1000
+
+
+def stand_in(delay_in_ms=0, delay_out_ms=0, answer=True, stratum=2):
+    # The query "arrives" after delay_in_ms, the answer after another delay_out_ms.
+    stub = hal_sim.NtpStub(ShiftedClock(), delay_in_ms + delay_out_ms, delay_out_ms, stratum)
+    stub.down = not answer
+    return stub
+
+
+async def serve(loop, stand_in):
+    transport, _ = await loop.create_datagram_endpoint(lambda: stand_in, local_addr=("127.0.0.1", 0))
+    return transport, "127.0.0.1:%d" % transport.get_extra_info("sockname")[1]
+
+
+def precise_ms():
+    return int(time.time() * 1000)
+
+
+async def scenario(name, stand_ins, timeout_s=TIMEOUT_S):
+    loop = asyncio.get_event_loop()
+    served = [await serve(loop, s) for s in stand_ins]
+    hosts = [host for _, host in served]
+    start = time.monotonic()
+    best, samples = await ntp_client.query_all(hosts, timeout_s * 1000, precise_ms)
+    took = (time.monotonic() - start) * 1000
+    for transport, _ in served:
+        transport.close()
+    # The old loop waited up to the full timeout on every host before the first one that answers.
+    first_ok = next((i for i, s in enumerate(stand_ins) if not s.down and s.stratum), len(stand_ins))
+    answered = [s for s in stand_ins[:first_ok + 1] if not s.down and s.stratum]
+    sequential = timeout_s * 1000 * first_ok + (answered[0].delay_ms if answered else 0)
+    error = best.offset_ms - OFFSET_MS if best else None
+    print("%-34s %9.0f %14.0f  %-4s %7s %6s" % (name, took, sequential, "-" if best is None else hosts.index(best.host),
+                                               "-" if best is None else best.delay_ms, error))
+    return best, samples, took
+
+
+async def main():
+    print("scenario                            took ms  sequential ms  best delay ms error ms")
+    best, _, _ = await scenario("one fast host", [stand_in(10, 10)])
+    assert abs(best.offset_ms - OFFSET_MS) <= 5
+    best, _, took = await scenario("dead host first, fast second", [stand_in(answer=False), stand_in(10, 10)])
+    assert best is not None and abs(best.offset_ms - OFFSET_MS) <= 5 and took < 200
+    best, _, took = await scenario("slow host + dead host", [stand_in(75, 75), stand_in(answer=False)])
+    # About a round trip and the grace after it, not the timeout.
+    assert best is not None and took < (1 + ntp_client.GRACE_RTTS) * 150 + 200, took
+    best, samples, _ = await scenario("slow first, fast second", [stand_in(300, 300), stand_in(20, 20)])
+    assert best.delay_ms < 100
+    best, samples, _ = await scenario("two slow: the better one wins", [stand_in(400, 400), stand_in(150, 150)])
+    assert len(samples) == 2 and best.delay_ms < 400
+    best, _, _ = await scenario("asymmetric path 200/0 ms", [stand_in(200, 0)])
+    # The offset error of a single sample is half the path asymmetry.
+    assert 80 <= best.offset_ms - OFFSET_MS <= 120
+    best, _, _ = await scenario("unsynchronised + dead + fast", [stand_in(stratum=0), stand_in(answer=False), stand_in(5, 5)])
+    assert best is not None
+    waits = []
+    wait_readable = compat.wait_readable
+    compat.wait_readable = lambda sock: waits.append(sock) or wait_readable(sock)
+    try:
+        best, _, _ = await scenario("all dead, 1 s timeout", [stand_in(answer=False), stand_in(answer=False)], timeout_s=1)
+    finally:
+        compat.wait_readable = wait_readable
+    assert best is None
+    assert len(waits) == 2 # a wait per socket for the whole second, not polled
+    await setting()
+
+
+async def setting(rounds=8):
+    # A whole-second RTC set at the moment t starts its second at t; the
+    # error is how far the server clock is from that second start.
+    loop = asyncio.get_event_loop()
+    old = []
+    new = []
+    for delay in (5, 30, 80):
+        for _ in range(rounds):
+            await asyncio.sleep(random.random()) # any phase of the second
+            transport, host = await serve(loop, stand_in(delay, delay))
+            best, _ = await ntp_client.query_all([host], 1000, precise_ms)
+            transport.close()
+            # Old: msg[40:44] - the transmit seconds - straight into the RTC.
+            transmit_s = (best.local_ms + best.offset_ms - delay) // 1000
+            old.append(time.time() * 1000 + OFFSET_MS - transmit_s * 1000)
+            set_at = []
+            await ntp_client.set_at_boundary(best, lambda t: set_at.append((t, time.time())))
+            t, at = set_at[0]
+            new.append(at * 1000 + OFFSET_MS - t * 1000)
+        print("RTC set, %2d ms each way: whole seconds %4.0f ms mean / %4.0f ms max, at boundary %4.1f ms mean / %4.1f ms max" % (
+            delay, sum(old[-rounds:]) / rounds, max(old[-rounds:]), sum(new[-rounds:]) / rounds, max(abs(e) for e in new[-rounds:])))
+    assert max(abs(e) for e in new) < 10
+    await blocked(1)
+    await blocked(3)
+
+
+async def blocked(misses):
+    # The first waits overrun the second by 100 ms (a lightsleep, a slow
+    # task): the next second is slept to, and the busy-wait stays SPIN_MS.
+    await asyncio.sleep((500 - (precise_ms() + OFFSET_MS) % 1000) % 1000 / 1000) # half a second ahead
+    best = ntp_client.NtpSample("stand-in", 1, OFFSET_MS, 0, compat.ticks_ms(), precise_ms())
+    asleep_ms = compat.asleep_ms
+    woken = []
+
+    async def overrun(ms):
+        await asleep_ms(ms)
+        if len(woken) < misses:
+            time.sleep(ntp_client.SPIN_MS / 1000 + 0.1)
+        woken.append(time.perf_counter())
+    compat.asleep_ms = overrun
+    set_at = []
+    try:
+        await ntp_client.set_at_boundary(best, lambda t: set_at.append((t, time.time(), time.perf_counter())))
+    finally:
+        compat.asleep_ms = asleep_ms
+    t, at, spun_until = set_at[0]
+    error = at * 1000 + OFFSET_MS - t * 1000
+    spun = 1000 * (spun_until - woken[-1])
+    print("RTC set after %d blocked wait(s): %d sleeps, %.1f ms error, busy-waited %.1f ms" % (misses, len(woken), error, spun))
+    assert len(woken) == misses + 1 and abs(error) < 10 and spun < ntp_client.SPIN_MS + 5
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,179 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_ntp_server.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host check: the SNTP server.
+#   *
+#   *          Checks the fields of the answers before and after the sync,
+#   *          then loads the server on 127.0.0.1 with bursts of concurrent
+#   *          client requests from another thread while a display stand-in
+#   *          ticks in the same event loop, and prints the response latency
+#   *          and how late the ticks got. Last, the simulated clock (hal_sim)
+#   *          serves the time to ntp_client once it is synced itself, and
+#   *          not right after its RTC was set.
+#   *          Run from the repository root: python3 bench/bench_ntp_server.py
+#   *
+#   ******************************************************************************
+#   */
+import asyncio
+import socket
+import struct
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+import hal_sim
+import ntp_client
+import ntp_server
+from ntp_client import NtpSample, NTP_DELTA
+from ntp_server import NtpServer, MAX_DISPERSION_MS
+
+CLIENTS = 200 # requests in a burst, each from its own socket
+BURSTS = 25
+TICK_MS = 50 # the display stand-in's period
+
+
+def query(transmit=b"\x01\x02\x03\x04\x05\x06\x07\x08"):
+    msg = bytearray(48)
+    msg[0] = 0x23 # version 4, client
+    msg[2] = 6 # poll
+    msg[40:48] = transmit
+    return msg
+
+
+def free_udp_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def fields():
+    now = [1700000000250]
+    server = NtpServer(lambda: now[0])
+    reply = bytes(server.answer(query(), now[0]))
+    assert reply[0] >> 6 == 3 and reply[1] == 0 and reply[12:16] == b"INIT" # not synced yet
+    assert ntp_client.parse_answer(reply, query()[40:48], now[0] // 1000) is None # a client skips it
+    server.synced(NtpSample("pool", 2, 5, 30, 0, 0, ("192.0.2.7", 123)), now[0] - 60000, 2)
+    now[0] += 10
+    reply = bytes(server.answer(query(), now[0] - 10))
+    leap_version_mode, stratum, poll, precision, delay, dispersion = struct.unpack("!BBBbII", reply[:12])
+    assert leap_version_mode == 0x24 and stratum == 3 and poll == 6 and precision == ntp_server.PRECISION
+    assert reply[12:16] == bytes((192, 0, 2, 7))
+    assert delay == (30 << 16) // 1000 and dispersion == (16 << 16) // 1000 # half the round trip, + 2 ppm of a minute
+    ref_s, ref_f = struct.unpack("!II", reply[16:24])
+    assert ref_s - NTP_DELTA == 1699999940 and ref_f == (250 << 32) // 1000
+    assert reply[24:32] == query()[40:48] # the client's transmit time comes back
+    stratum, t2, t3 = ntp_client.parse_answer(reply, query()[40:48], now[0] // 1000)
+    assert stratum == 3 and (t2, t3) == (250, 259) # ms into the second, with the fraction
+    # Unsynced once the time may be off by more than MAX_DISPERSION_MS.
+    days = MAX_DISPERSION_MS * 1000000 // 2 // 86400000 + 1
+    assert server.answer(query(), now[0] + days * 86400000)[0] >> 6 == 3
+    assert server.answer(b"\x24" + bytes(47), now[0]) is None # a server's answer, not a query
+    # Nor while the fraction of the second isn't known, e.g. right after the RTC was set.
+    now[0] = None
+    reply = server.answer(query(), None)
+    assert reply[0] >> 6 == 3 and reply[1] == 0 and reply[40:48] == bytes(8)
+    print("answers: stratum %d from %d, unsynced after %d days at 2 ppm" % (3, 2, days))
+
+
+def clients(port, latencies, lost):
+    # BURSTS times: all the sockets send at once, then wait for the answers.
+    socks = []
+    for i in range(CLIENTS):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.settimeout(1)
+        socks.append(sock)
+    try:
+        for burst in range(BURSTS):
+            sent = []
+            for i in range(CLIENTS):
+                transmit = struct.pack("!II", burst, i)
+                sent.append((transmit, time.perf_counter()))
+                socks[i].sendto(query(transmit), ("127.0.0.1", port))
+            for i in range(CLIENTS):
+                try:
+                    reply = socks[i].recv(48)
+                except socket.timeout:
+                    lost.append((burst, i))
+                    continue
+                assert reply[24:32] == sent[i][0]
+                latencies.append(1000 * (time.perf_counter() - sent[i][1]))
+            time.sleep(0.1)
+    finally:
+        for sock in socks:
+            sock.close()
+
+
+async def ticks(late, stop):
+    # A display loop stand-in: wakes on every TICK_MS boundary.
+    while not stop.is_set():
+        now = time.monotonic() * 1000
+        due = (now // TICK_MS + 1) * TICK_MS
+        await asyncio.sleep((due - now) / 1000)
+        late.append(time.monotonic() * 1000 - due)
+
+
+async def burst():
+    port = free_udp_port()
+    server = NtpServer(lambda: int(time.time() * 1000), port)
+    server.synced(NtpSample("pool", 1, 0, 20, 0, 0, ("192.0.2.1", 123)), int(time.time() * 1000))
+    server.open("127.0.0.1")
+    task = asyncio.create_task(server.serve())
+    late = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(ticks(late, stop))
+    await asyncio.sleep(0.2)
+    quiet = list(late)
+    del late[:]
+    latencies = []
+    lost = []
+    await asyncio.get_running_loop().run_in_executor(None, clients, port, latencies, lost)
+    # Our own client against it, along with a host that never answers.
+    best, samples = await ntp_client.query_all(["127.0.0.1:%d" % port, "127.0.0.1:%d" % free_udp_port()], 1000)
+    stop.set()
+    await ticker
+    task.cancel()
+    server.close()
+    latencies.sort()
+    n = len(latencies)
+    print("%d bursts of %d requests: %d answered, %d lost; latency %.2f ms median, %.2f ms 99%%, %.2f ms max" % (
+        BURSTS, CLIENTS, n, len(lost), latencies[n // 2], latencies[n * 99 // 100], latencies[-1]))
+    print("display ticks every %d ms: %.2f ms late at most (%.2f ms when quiet)" % (TICK_MS, max(late), max(quiet)))
+    print("ntp_client: %r" % best)
+    assert len(lost) <= CLIENTS * BURSTS // 100 and server.answers >= n
+    assert latencies[n * 99 // 100] < 50
+    assert max(late) < 20
+    assert best.stratum == 2 and abs(best.offset_ms) <= best.delay_ms // 2 + 2 and best.addr[0] == "127.0.0.1" # polled every 5 ms
+
+
+def simulated():
+    port = free_udp_port()
+    sim = hal_sim.Simulation({"ntp_server_port": port})
+    answers = []
+
+    def ask(sim):
+        answers.append(asyncio.ensure_future(ntp_client.query_all(["127.0.0.1:%d" % port], 1000)))
+    sim.at(0.0001, ask) # before the clock's own sync
+    sim.at(0.5, ask)
+    sim.run(0.501)
+    server = sim.main.time_server
+    sim.close()
+    before, after = [a.result()[0] for a in answers]
+    print("simulated clock: %r before its sync, %r after" % (before, after))
+    assert before is None and server.unsynced >= 1
+    assert after.stratum == 3 and abs(after.offset_ms) <= after.delay_ms // 2 + 2 # the stub is stratum 2
+
+
+def main():
+    fields()
+    asyncio.run(burst())
+    simulated()
+
+
+if __name__ == "__main__":
+    main()
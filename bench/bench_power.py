@@ -0,0 +1,126 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_power.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host simulation: a day of the clock on a fake clock, power ledger.
+#   *
+#   *          Runs the display tick (TickScheduler sleeping through
+#   *          PowerManager) for 24 simulated hours with an HA poll every
+#   *          15 minutes and an NTP sync every 4 hours, and prints the
+#   *          estimated ledger for: everything on, WLAN power-save only, and
+#   *          the full low-power mode (radio off between fetches, lightsleep
+#   *          meanwhile, backlight off from 23:00 to 7:00). Then a week
+#   *          booked minute by minute, over the ticks_ms wrap.
+#   *          Run from the repository root: python3 bench/bench_power.py
+#   *
+#   ******************************************************************************
+#   */
+import sys
+
+sys.path.insert(0, ".")
+
+import compat
+import power as pm
+from tick_scheduler import TickScheduler
+
+DAY_S = 86400
+HA_EVERY_S = 900
+NTP_EVERY_S = 14400
+TICK_WORK_MS = 3 # render, frame buffer diff and flush
+TICK_I2C_BYTES = 48 # a couple of changed cells per second
+JOIN_MS = 3000 # WiFi join and DHCP after the radio comes on
+FETCH_MS = 1000
+
+
+class FakeClock:
+    def __init__(self):
+        self.ms = 0
+
+    def ticks_ms(self):
+        return self.ms & (compat.TICKS_PERIOD - 1)
+
+    def time(self):
+        return self.ms // 1000
+
+    def sleep_ms(self, ms):
+        self.ms += ms
+
+
+def simulate(name, power_save=False, windows=False, night=None):
+    clock = FakeClock()
+    i2c = [0]
+    power = pm.PowerManager(night, 600, clock.sleep_ms if windows else None, clock.ticks_ms, clock.sleep_ms, lambda: i2c[0])
+    scheduler = TickScheduler(1, clock.time, clock.ticks_ms, compat.ticks_diff, power.sleep_ms)
+    idle = pm.RADIO_SAVE if power_save else pm.RADIO_ON
+    power.set_radio(idle)
+    next_ha = HA_EVERY_S
+    next_ntp = NTP_EVERY_S
+    radio_on_at = None # windows: when the radio comes back on
+    fetches = 0
+    while clock.ms < DAY_S * 1000:
+        now_s = clock.time()
+        if radio_on_at is not None and now_s >= radio_on_at:
+            power.set_radio(pm.RADIO_ON)
+            radio_on_at = None
+        if now_s >= next_ha or now_s >= next_ntp:
+            assert power.radio != pm.RADIO_OFF, "the radio was off for a fetch"
+            power.set_radio(pm.RADIO_ON)
+            clock.sleep_ms(FETCH_MS) # awaited, the CPU is awake meanwhile
+            fetches += 1
+            if now_s >= next_ha:
+                next_ha += HA_EVERY_S
+            if now_s >= next_ntp:
+                next_ntp += NTP_EVERY_S
+            power.set_radio(idle)
+            if windows:
+                off_s = power.radio_off_for(clock.time(), min(next_ha, next_ntp))
+                if off_s:
+                    power.set_radio(pm.RADIO_OFF)
+                    radio_on_at = clock.time() + off_s
+                    # Back on early enough to join before the fetch.
+                    assert radio_on_at + JOIN_MS // 1000 <= min(next_ha, next_ntp)
+        on = power.backlight_due((0, 0, 0, now_s // 3600 % 24))
+        if on != power.backlight:
+            power.set_backlight(on)
+        clock.sleep_ms(TICK_WORK_MS)
+        i2c[0] += TICK_I2C_BYTES
+        scheduler.wait()
+    ledger, total = power.ledger()
+    print("%-38s %7.1f mAh/day %6.2f mA  lightsleep %5.1f%%  radio off %5.1f%%  backlight %5.1f%%  fetches %d" % (
+        name, total, total / 24, 100 * power.cpu_sleep_ms / power.elapsed_ms, 100 * power.radio_ms[pm.RADIO_OFF] / power.elapsed_ms,
+        100 * power.backlight_ms / power.elapsed_ms, fetches))
+    return power, total
+
+
+def main():
+    # The backlight schedule, also over midnight.
+    p = pm.PowerManager((23, 7))
+    assert [p.backlight_due((0, 0, 0, h)) for h in (22, 23, 0, 6, 7, 12)] == [True, False, False, False, True, True]
+    p = pm.PowerManager((1, 5))
+    assert [p.backlight_due((0, 0, 0, h)) for h in (0, 1, 4, 5)] == [True, False, False, True]
+    # Radio windows: only gaps long enough, ending RADIO_WAKE_S before the fetch.
+    assert p.radio_off_for(0, 900) == 900 - pm.RADIO_WAKE_S and p.radio_off_for(0, 500) == 0
+    _, everything = simulate("everything on")
+    _, save = simulate("WLAN power-save", True)
+    power, low = simulate("low-power mode, night 23-7", True, True, (23, 7))
+    ledger, _ = power.ledger()
+    for part, ms, mah in ledger:
+        print("  %-16s %10d ms %8.2f mAh" % (part, ms, mah))
+    assert low < save < everything
+    # The ledger accounts for the whole day, the backlight was off for 8 hours of it.
+    assert abs(power.elapsed_ms - DAY_S * 1000) < 2000
+    assert abs(power.backlight_ms - 16 * 3600 * 1000) < 2000
+    # A week with no change of state, booked every minute: past the ticks_ms wrap.
+    clock = FakeClock()
+    p = pm.PowerManager(ticks_ms=clock.ticks_ms)
+    for _ in range(7 * 24 * 60):
+        clock.sleep_ms(60000)
+        p.advance()
+    assert p.elapsed_ms == 7 * DAY_S * 1000 and p.radio_ms[pm.RADIO_ON] == p.elapsed_ms
+    assert p.text().splitlines()[-1].split()[:2] == ["total", str(7 * DAY_S * 1000)]
+
+
+if __name__ == "__main__":
+    main()
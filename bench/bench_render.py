@@ -0,0 +1,120 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_render.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host benchmark: per-tick allocations of the clock face rendering.
+#   *
+#   *          Fails when rendering the date and time allocates anything.
+#   *          Run from the repository root: python3 bench/bench_render.py
+#   *
+#   ******************************************************************************
+#   */
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from clock_render import ClockRenderer
+from lcd_framebuf import LcdFrameBuffer
+
+TICKS = 5 * 3600 # one hour of the old fixed 200 ms display cycle
+
+
+class NullLcd:
+    def clear(self):
+        pass
+
+    def move_to(self, x, y):
+        pass
+
+    def hal_write_data(self, data):
+        pass
+
+
+def legacy_tick(t):
+    # The string building the main loop did before clock_render.
+    wday = ""
+    if(t[6] == 0):
+        wday = "Mo"
+    elif(t[6] == 1):
+        wday = "Tu"
+    elif(t[6] == 2):
+        wday = "We"
+    elif(t[6] == 3):
+        wday = "Th"
+    elif(t[6] == 4):
+        wday = "Fr"
+    elif(t[6] == 5):
+        wday = "Sa"
+    elif(t[6] == 6):
+        wday = "Su"
+    new_date = ""+str((("0"+str(t[2])) if (t[2]<10) else str(t[2])))+"/"+str((("0"+str(t[1])) if (t[1]<10) else str(t[1])))+"/"+str(t[0])+"  "+wday+"\n"
+    new_time = ""+str((("0"+str(t[3])) if (t[3]<10) else str(t[3])))+":"+str((("0"+str(t[4])) if (t[4]<10) else str(t[4])))+ ((":"+str((("0"+str(t[5])) if (t[5]<10) else str(t[5]))) ) if 1 else "")
+    return new_date, new_time
+
+
+def renderer_tick(t, renderer):
+    renderer.render_date(t)
+    renderer.render_time(t)
+
+
+def flush_tick(t, fb, renderer):
+    if renderer.render_date(t):
+        fb.write_bytes(0,0,renderer.date_line,renderer.date_len)
+    renderer.render_time(t)
+    fb.write_bytes(0,1,renderer.time_line,renderer.time_len)
+    fb.flush()
+
+
+def heap_probe():
+    # Returns (allocated, reset, stop): the heap high-water mark since the
+    # last reset(), on either CPython or the MicroPython unix port.
+    try:
+        import tracemalloc
+        tracemalloc.start()
+        return lambda: tracemalloc.get_traced_memory()[1], tracemalloc.reset_peak, tracemalloc.stop
+    except ImportError: # MicroPython unix port
+        import gc
+        gc.disable()
+        return gc.mem_alloc, gc.collect, gc.enable
+
+
+def run(name, tick, frames):
+    allocated, reset, stop = heap_probe()
+    reset()
+    allocating_ticks = 0
+    total = 0
+    start = time.perf_counter() if hasattr(time, "perf_counter") else time.time()
+    for t in frames:
+        before = allocated()
+        tick(t)
+        used = allocated() - before
+        if used > 0:
+            allocating_ticks += 1
+            total += used
+        reset()
+    stop()
+    elapsed = (time.perf_counter() if hasattr(time, "perf_counter") else time.time()) - start
+    print("%-10s %8.2f us/tick  %6d of %d ticks allocated, %d bytes/tick" % (name, 1e6 * elapsed / len(frames), allocating_ticks, len(frames), total // len(frames)))
+    return total
+
+
+def main():
+    base = time.mktime((2026, 10, 18, 23, 30, 0, 0, 0, 0))
+    # Frames are precomputed, so only the rendering is measured.
+    frames = [time.localtime(base + i // 5) for i in range(TICKS)]
+    run("legacy", legacy_tick, frames)
+    renderer = ClockRenderer(1, 1, 1, 0, 1)
+    assert run("renderer", lambda t: renderer_tick(t, renderer), frames) == 0, "rendering allocates"
+    fb = LcdFrameBuffer(NullLcd())
+    fb.clear()
+    renderer = ClockRenderer(1, 1, 1, 0, 1)
+    for t in frames:
+        flush_tick(t, fb, renderer)
+    print("frame buffer: %d LCD ops sent, %d saved (%d I2C bytes saved) over %d ticks" % (fb.ops_sent, fb.ops_saved, fb.bytes_saved, len(frames)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_scheduler.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host benchmark: tick scheduler latency against a simulated clock.
+#   *
+#   *          The simulated RTC runs at a configurable ppm offset and phase
+#   *          against ticks_ms, and every sleep overshoots a little, like a
+#   *          real wakeup does. Fails when a tick with seconds shown takes
+#   *          WAKEUPS_MAX wakeups or more, or a tick comes LATE_MAX_MS late.
+#   *          Run from the repository root: python3 bench/bench_scheduler.py
+#   *
+#   ******************************************************************************
+#   */
+import sys
+
+sys.path.insert(0, ".")
+
+from tick_scheduler import TickScheduler
+
+SCENARIOS = (
+    # period_s, RTC phase (s), RTC rate (ppm), ticks
+    (1, 0.37, 50, 3 * 3600),
+    (1, 0.99, -200, 3600),
+    (1, 0.50, 0, 3600),
+    (60, 0.90, -30, 600),
+    (60, 0.10, 300, 300),
+)
+OVERSHOOT_S = 0.0003
+WAKEUPS_MAX = 2 # per tick, with seconds shown
+LATE_MAX_MS = 50 # the first ticks included, before the rate is learned
+
+
+class SimClock:
+    def __init__(self, phase, ppm):
+        self.t = 0.0
+        self.phase = phase
+        self.ppm = ppm
+
+    def ticks_ms(self):
+        return int(self.t * 1000)
+
+    def rtc(self):
+        return int(self.t * (1 + self.ppm * 1e-6) + self.phase)
+
+    def sleep_ms(self, ms):
+        self.t += ms / 1000 + OVERSHOOT_S
+
+    def flip_time(self, s):
+        # Simulated instant at which the RTC turned to second s.
+        return (s - self.phase) / (1 + self.ppm * 1e-6)
+
+
+def main():
+    print("period  ppm  wakeups/tick  true latency max (steady) ms  reported mean/max/jitter ms  rate ppm")
+    for period_s, phase, ppm, ticks in SCENARIOS:
+        clock = SimClock(phase, ppm)
+        scheduler = TickScheduler(period_s, clock.rtc, clock.ticks_ms, lambda a, b: a - b, clock.sleep_ms)
+        latency_max = 0
+        worst = 0
+        steady_max = 0
+        for i in range(ticks):
+            s = scheduler.wait()
+            latency = (clock.t - clock.flip_time(s)) * 1000
+            worst = max(worst, latency)
+            if i > 2:
+                latency_max = max(latency_max, latency)
+            if i > ticks // 2:
+                steady_max = max(steady_max, latency)
+        print("%6d %4d %13.3f %14.2f (%6.2f) %16.2f/%d/%.2f %10d" % (
+            period_s, ppm, scheduler.wakeups / scheduler.ticks, latency_max, steady_max,
+            scheduler.late_mean_ms, scheduler.late_max_ms, scheduler.jitter_ms, scheduler.rate_ppm))
+        if period_s == 1:
+            assert scheduler.wakeups / scheduler.ticks < WAKEUPS_MAX, "too many wakeups per tick"
+        assert worst < LATE_MAX_MS and scheduler.late_max_ms < LATE_MAX_MS, "a tick came too late"
+    print("(the old loop woke 5 times per tick with seconds shown, latency up to 200 ms)")
+
+
+if __name__ == "__main__":
+    main()
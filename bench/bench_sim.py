@@ -0,0 +1,99 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_sim.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host simulation: main.py for hours of virtual time on a SimBoard.
+#   *
+#   *          Runs the whole clock (hal_sim.Simulation) in a few scenarios: a
+#   *          quiet day with a fast crystal, a WiFi outage followed by an HA
+#   *          outage, and the low-power mode. Prints for each the simulated
+#   *          hours, the real seconds they took, the LCD's I2C traffic, the
+#   *          NTP and HA requests and how far the RTC is off the true time at
+#   *          the end, and checks that the LCD shows the right time. Last,
+#   *          HA refusing the token counts as a failed fetch, not a bad path,
+#   *          and ha_push with ha_sensors is logged and falls back to polling.
+#   *          Run from the repository root: python3 bench/bench_sim.py
+#   *
+#   ******************************************************************************
+#   */
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+import event_log
+import hal_sim
+
+
+def shown_right(sim):
+    # The time row against the true local time (the tick may be a second behind).
+    main = sim.main
+    t = int(sim.clock.true_time())
+    local = [time.gmtime(s + 60 * main.time_shift_minutes + main.tz.dst_offset(s)) for s in (t - 1, t)]
+    return sim.screen()[1][:8] in ["%02d:%02d:%02d" % (tm[3], tm[4], tm[5]) for tm in local]
+
+
+def scenario(name, hours, sim):
+    sim.run(hours)
+    right = shown_right(sim)
+    screen = sim.screen()
+    sim.close()
+    s = sim.summary()
+    print("%-24s %6.1f %7.2f %8d %9d %6d %6d %7d %9.1f %8.1f   %s" % (
+        name, s["simulated_h"], s["real_s"], s["speedup"], s["i2c_bytes_per_h"], s["ntp_requests"], s["ha_requests"],
+        s["wifi_connects"], s["rtc_error_ms"], s["drift_ppm"], " | ".join(screen)))
+    assert right, "the LCD shows the wrong time"
+    return s, screen
+
+
+def outages(sim):
+    def wifi_down(sim):
+        sim.ap.up = False
+        sim.ap.drop()
+
+    def wifi_up(sim):
+        sim.ap.up = True
+
+    def ha_down(sim):
+        sim.ha.down = True
+
+    def ha_up(sim):
+        sim.ha.down = False
+    sim.at(1, wifi_down)
+    sim.at(1.25, wifi_up)
+    sim.at(3, ha_down)
+    sim.at(4, ha_up)
+    return sim
+
+
+def main():
+    print("scenario                 sim h  real s  speedup  I2C B/h    NTP     HA  joins  RTC err ms drift ppm   LCD")
+    s, _ = scenario("quiet day, +30 ppm", 24, hal_sim.Simulation(crystal_ppm=30))
+    assert abs(s["rtc_error_ms"]) < 200 # ntp_target_ms
+    assert abs(s["drift_ppm"] - 30) < 3
+    assert s["ha_requests"] >= 24 * 4 and s["ha_connections"] == 1 # polled over one kept-alive connection
+    assert s["speedup"] > 1000
+    s, screen = scenario("WiFi, then HA outage", 6, outages(hal_sim.Simulation(crystal_ppm=-20)))
+    assert s["wifi_drops"] == 1 and s["wifi_connects"] > 2
+    assert "W" in screen[0] and "~" not in screen[0] # back, and the values are fresh again
+    s, _ = scenario("low-power, night 23-7", 6, hal_sim.Simulation({"power_save": 1, "backlight_night": (23, 7)}, crystal_ppm=10))
+    assert s["lightsleeps"] > 0 and abs(s["rtc_error_ms"]) < 200
+    sim = hal_sim.Simulation()
+    sim.at(0.5, lambda sim: setattr(sim.ha, "error", b"401 Unauthorized"))
+    s, screen = scenario("HA answers 401", 2, sim)
+    codes = [record[1] for record in sim.main.events.records()]
+    assert event_log.HA_FAILED in codes and event_log.HA_BAD_PATH not in codes
+    assert sim.main.ha_breaker.failures > 0 and "~" in screen[0]
+    # ha_push with ha_sensors: logged once, and the values are polled.
+    sim = hal_sim.Simulation({"ha_push": 1, "ha_sensors": [{'entity': 'sensor.outdoor_humidity', 'suffix': '%'}]})
+    sim.run(0.5)
+    codes = [record[1] for record in sim.main.events.records()]
+    sim.close()
+    assert codes.count(event_log.HA_PUSH_UNSUPPORTED) == 1 and sim.main.ha_push_client is None
+    assert sim.ha.requests > 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_slow_ha.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host check: the display keeps ticking while HA is slow.
+#   *
+#   *          Runs main.py on the host simulator (hal_sim) with an HA
+#   *          stand-in that takes its time to answer: SLOW_S, within
+#   *          ha_srv_timeout, then longer than it. The temperature is
+#   *          polled every POLL_S by main.py's own fetch path while
+#   *          display_task ticks the seconds (the breaker kept shut, so the
+#   *          polls go on). Checks that a tick came every second of the
+#   *          window, none of them late by more than LATE_MAX_MS, and that
+#   *          the time shown was right whenever a fetch was in flight.
+#   *          Run from the repository root: python3 bench/bench_slow_ha.py
+#   *
+#   ******************************************************************************
+#   */
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+import event_log
+import hal_sim
+
+SLOW_S = 3
+TIMEOUT_S = 5 # ha_srv_timeout
+POLL_S = 60 # temperature_sync_time_sec
+WINDOW_S = (100, 400) # seconds after the boot when the ticks are counted
+LATE_MAX_MS = 50
+
+
+def shown_right(sim):
+    # The time row against the true local time (the tick may be a second behind).
+    main = sim.main
+    t = int(sim.clock.true_time())
+    local = [time.gmtime(s + 60 * main.time_shift_minutes + main.tz.dst_offset(s)) for s in (t - 1, t)]
+    return sim.screen()[1][:8] in ["%02d:%02d:%02d" % (tm[3], tm[4], tm[5]) for tm in local]
+
+
+def scenario(name, delay_s):
+    sim = hal_sim.Simulation({"ha_srv_timeout": TIMEOUT_S, "temperature_sync_time_sec": POLL_S, "ha_failure_threshold": 1000})
+    sim.ha.delay_s = delay_s
+    start, end = WINDOW_S
+    counted = []
+    right = []
+
+    def window_start(sim):
+        sim.main.scheduler.reset_stats()
+        counted.append(sim.ha.requests)
+        counted.append(sim.main.events.logged)
+
+    def in_flight(sim):
+        if sim.ha.held:
+            right.append(shown_right(sim))
+    sim.at(start / 3600, window_start)
+    for at in range(start, end):
+        sim.at((at + 0.5) / 3600, in_flight) # half way between two ticks
+    sim.run(end / 3600)
+    main = sim.main
+    scheduler = main.scheduler
+    requests = sim.ha.requests - counted[0]
+    codes = [record[1] for record in main.events.records(counted[1])]
+    sim.close()
+    ticks = scheduler.ticks
+    print("%-28s %6d %10d %8d %7d %9d %12d   %d/%d" % (name, ticks, end - start, requests, codes.count(event_log.HA_SYNCED),
+                                                  codes.count(event_log.HA_TIMEOUT), scheduler.late_max_ms, right.count(True), len(right)))
+    assert requests >= (end - start) // POLL_S - 1, "HA was not polled during the window"
+    assert abs(ticks - (end - start)) <= 1, "display ticks were missed"
+    assert scheduler.late_max_ms < LATE_MAX_MS, "a display tick was late"
+    assert right and all(right), "the LCD showed the wrong time during a fetch"
+    return codes
+
+
+def main():
+    print("HA answers after              ticks   window s  HA reqs  synced  timeouts  late max ms   right in flight")
+    codes = scenario("%d s (timeout %d s)" % (SLOW_S, TIMEOUT_S), SLOW_S)
+    assert event_log.HA_SYNCED in codes and event_log.HA_TIMEOUT not in codes
+    codes = scenario("%d s (timeout %d s)" % (2 * TIMEOUT_S, TIMEOUT_S), 2 * TIMEOUT_S)
+    assert event_log.HA_TIMEOUT in codes and event_log.HA_SYNCED not in codes
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_suite.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Benchmark and regression suite for main.py's hot and periodic paths.
+#   *
+#   *          Sets main.py up on the host simulator (hal_sim, without
+#   *          main.main()) and runs main.display_task itself for an hour of
+#   *          ticks, the virtual clock moving a period on every wait of the
+#   *          scheduler: CPU time per tick, bytes allocated per tick, the
+#   *          heap high-water mark and the I2C bytes per second. Then the
+#   *          parts of a tick on their own - local_tz_time(), the date and
+#   *          time rendering, the temperature text and the frame buffer
+#   *          flush - and the round trips of q_set_time()'s query against
+#   *          an NTP stand-in with a real delay, and of
+#   *          get_current_temperature_async() against the HA one.
+#   *
+#   *          hal_sim needs CPython. On the MicroPython unix port the suite
+#   *          runs the parts of a tick alone, built the way main.py builds
+#   *          them, on an LCD that only counts bytes; allocations are then
+#   *          gc.mem_alloc() growth with the GC off, on CPython the
+#   *          tracemalloc peak per tick. The numbers compare only with a
+#   *          baseline of the same Python, bench/baselines/<implementation>.json;
+#   *          a run compares with it and exits with 1 on a regression,
+#   *          --save writes it. The CPython run ends with the MicroPython
+#   *          one, when the port is installed (micropython on the PATH, or
+#   *          $MICROPYTHON), and says so when it is skipped.
+#   *          Run from the repository root: python3 bench/bench_suite.py [--save]
+#   *
+#   ******************************************************************************
+#   */
+import gc
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from compat import asyncio
+from lcd_framebuf import LCD_TX_PER_OP, LCD_BYTES_PER_TX
+
+if sys.implementation.name == "micropython":
+    hal_sim = None # see parts_alone()
+    BASELINES = "bench/baselines"
+
+    def now_us():
+        return time.ticks_us()
+
+    def since_us(start):
+        return time.ticks_diff(time.ticks_us(), start)
+else:
+    import shutil
+    import subprocess
+    import tracemalloc
+    import hal_sim
+    BASELINES = hal_sim.REPO + "/bench/baselines" # hal_sim runs main.py in a temporary directory
+
+    # The real clock: hal_sim has time.monotonic() and the ticks.
+    def now_us():
+        return time.perf_counter() * 1000000
+
+    def since_us(start):
+        return time.perf_counter() * 1000000 - start
+
+TICKS = 3600 # display ticks measured, an hour with seconds shown
+HA_EVERY = 900 # ticks between new temperatures
+ROUNDS = 5 # NTP and HA requests measured
+NTP_DELAY_MS = 10 # the NTP stand-in's round trip, in real time
+
+# metric: (factor, slack) - a run fails when value > baseline * factor + slack.
+# Times are noisy, byte counts are not.
+LIMITS = {
+    "tick_us": (2.0, 50),
+    "local_tz_time_us": (2.0, 20),
+    "render_us": (2.0, 20),
+    "temperature_us": (2.0, 20),
+    "flush_us": (2.0, 20),
+    "alloc_b_per_tick": (1.1, 16),
+    "heap_peak_b": (1.2, 4096),
+    "i2c_bytes_per_s": (1.05, 1),
+    "status_i2c_bytes": (1.05, 1),
+    "ntp_rtt_ms": (2.0, 10),
+    "ha_rtt_ms": (2.0, 10),
+}
+
+
+def import_main():
+    # main.py set up on a hal_sim board, with the stand-ins serving; the
+    # bench drives its parts itself, main.main() doesn't run.
+    sim = hal_sim.Simulation({"sync_weather": 1, "ha_sensors": [], "ha_push": 0, "power_save": 0}, ntp_delay_ms=0)
+    main = sim.setup()
+    main.sim = sim
+    main.wlan = sim.board.network.WLAN()
+    main.values_wake = asyncio.Event()
+    main.compositor.show("clock")
+    return main
+
+
+class Enough(Exception):
+    pass
+
+
+def run_ticks(main, n, between=None):
+    # Runs main.display_task() for n ticks, each wait of the scheduler moving
+    # the virtual clock on by a period; between(i) is called when tick i is
+    # done, before the clock moves on to the next one.
+    clock = main.sim.clock
+    scheduler = main.scheduler
+    done = [0]
+
+    async def wait_async(limit_ms=None, wake=None):
+        done[0] += 1
+        i = done[0]
+        if between is not None:
+            between(i)
+        if i >= n:
+            raise Enough()
+        clock.advance(scheduler.period_s)
+        scheduler.last_s = clock.rtc()
+        if i % HA_EVERY == 0:
+            main.ha_values.set(0, 20 + i // HA_EVERY % 2 * 0.5) # a new value to show
+        return scheduler.last_s
+
+    scheduler.wait_async = wait_async
+    try:
+        main.sim.loop.run_until_complete(main.display_task())
+    except Enough:
+        pass
+    finally:
+        del scheduler.wait_async
+
+
+def per_call_us(fn, n=1000):
+    start = now_us()
+    for _ in range(n):
+        fn()
+    return since_us(start) / n
+
+
+def hot_paths(main):
+    results = {}
+    main.sim.board.set_rtc(main.sim.clock.true_time())
+    main.network_ok = True
+    # CPU time, the whole tick and its parts.
+    period = main.scheduler.period_s
+    start = now_us()
+    run_ticks(main, TICKS)
+    results["tick_us"] = since_us(start) / TICKS
+    # I2C traffic of the steady clock face, after the first tick painted it all.
+    lcd = main.lcd
+    before = []
+    run_ticks(main, TICKS + 1, lambda i: before.append(lcd.i2c_bytes) if i == 1 else None)
+    results["i2c_bytes_per_s"] = (lcd.i2c_bytes - before[0]) / (TICKS * period)
+    results["local_tz_time_us"] = per_call_us(lambda: main.local_tz_time(False, main.daylight_time_savings, 60*main.time_shift_minutes))
+    t = time.localtime()
+    renderer = main.renderer
+
+    def render():
+        renderer.invalidate()
+        renderer.render_date(t)
+        renderer.render_time(t)
+    results["render_us"] = per_call_us(render)
+
+    def temperature():
+        main.compositor.set("value", main.ha_values.text(0))
+        main.compositor.regions["value"].dirty = True
+        main.compositor.draw()
+    results["temperature_us"] = per_call_us(temperature)
+
+    def flush():
+        main.fb.invalidate() # every cell again: the worst case
+        main.fb.flush()
+    results["flush_us"] = per_call_us(flush, 200)
+    before = lcd.i2c_bytes
+    main.show_status("Wifi connection:\nFail. Retry: 60s")
+    results["status_i2c_bytes"] = lcd.i2c_bytes - before
+    main.compositor.show("clock")
+    # Allocations and the heap high-water mark.
+    gc.collect()
+    transient = [0]
+    last = [0]
+
+    def between(i):
+        # The peak during tick i over what was there when it started.
+        current, peak = tracemalloc.get_traced_memory()
+        if i > 1:
+            transient[0] += peak - last[0]
+        last[0] = current
+        tracemalloc.reset_peak()
+    tracemalloc.start()
+    run_ticks(main, TICKS + 1, between)
+    results["alloc_b_per_tick"] = transient[0] / TICKS
+    results["heap_peak_b"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return results
+
+
+async def ha_round_trips(main):
+    # get_current_temperature_async() against hal_sim's HaStub; the median.
+    rtt = []
+    for _ in range(ROUNDS):
+        start = now_us()
+        value = await main.get_current_temperature_async(main.ha_api_url_temperature, main.ha_headers, main.ha_api_temperature_json_path)
+        rtt.append(since_us(start) / 1000)
+        assert value == main.sim.ha.temperature, "no HA answer"
+    rtt.sort()
+    return {"ha_rtt_ms": rtt[ROUNDS // 2]}
+
+
+class WallClock:
+    # What the NTP stand-in serves outside the simulation.
+    def true_time(self):
+        return time.time()
+
+
+async def ntp_round_trips(main):
+    # q_set_time()'s query against an NtpStub NTP_DELAY_MS away, on a real
+    # event loop: hal_sim's would skip the delay with every other wait. The
+    # median; setting the RTC on a second boundary is a wait, not a round trip.
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(lambda: hal_sim.NtpStub(WallClock(), NTP_DELAY_MS), local_addr=("127.0.0.1", 0))
+    host = "127.0.0.1:%d" % transport.get_extra_info("sockname")[1]
+    rtt = []
+    try:
+        for _ in range(ROUNDS):
+            start = now_us()
+            best, _ = await main.ntp_client.query_all([host], 1000 * main.ntp_srv_timeout)
+            rtt.append(since_us(start) / 1000)
+            assert best is not None, "no NTP answer"
+    finally:
+        transport.close()
+    rtt.sort()
+    return {"ntp_rtt_ms": rtt[ROUNDS // 2]}
+
+
+class CountingLcd:
+    # The bus traffic of hal_sim's VirtualLcd, without the glass: a command
+    # or data byte is LCD_TX_PER_OP transfers of LCD_BYTES_PER_TX bytes.
+    def __init__(self):
+        self.i2c_bytes = 0
+
+    def _ops(self, n):
+        self.i2c_bytes += n * LCD_TX_PER_OP * LCD_BYTES_PER_TX
+
+    def clear(self):
+        self._ops(1)
+
+    def move_to(self, col, row):
+        self._ops(1)
+
+    def hal_write_data(self, data):
+        self._ops(1)
+
+    def custom_char(self, slot, pattern):
+        self._ops(2 + len(pattern))
+
+
+def parts_alone():
+    # MicroPython: the parts of a tick without main.py and hal_sim, the
+    # clock face built as main.py builds it for the defaults of config_dist.
+    from clock_render import ClockRenderer
+    from tz_rules import TzEngine
+    from lcd_framebuf import LcdFrameBuffer
+    from lcd_compositor import Compositor, GlyphCache, Region, RIGHT
+    from ha_sensors import HaValues, unit_suffix, FIELD_WIDTH
+    results = {}
+    tz = TzEngine(0, "eu")
+    renderer = ClockRenderer(True, True, True, False, True)
+    lcd = CountingLcd()
+    fb = LcdFrameBuffer(lcd)
+    compositor = Compositor(fb, GlyphCache(fb))
+    compositor.add_page("clock", [Region("date", 0, 0, renderer.date_len), Region("time", 0, 1, renderer.time_len),
+                                  Region("value", 16-FIELD_WIDTH, 1, FIELD_WIDTH, RIGHT)])
+    compositor.show("clock")
+    values = HaValues([unit_suffix("celsius")])
+    values.set(0, 21.5)
+    now = [int(time.time())]
+
+    def local_tz_time():
+        return time.localtime(now[0] + tz.dst_offset(now[0]))
+
+    def tick():
+        now[0] += 1
+        t = local_tz_time()
+        if renderer.render_date(t):
+            compositor.set("date", renderer.date_line, renderer.date_len)
+        renderer.render_time(t)
+        compositor.set("time", renderer.time_line, renderer.time_len)
+        if now[0] % HA_EVERY == 0:
+            values.set(0, 20 + now[0] // HA_EVERY % 2 * 0.5)
+            compositor.set("value", values.text(0))
+        compositor.draw()
+        fb.flush()
+    tick() # the first one paints it all
+    start = now_us()
+    for _ in range(TICKS):
+        tick()
+    results["tick_us"] = since_us(start) / TICKS
+    before = lcd.i2c_bytes
+    for _ in range(TICKS):
+        tick()
+    results["i2c_bytes_per_s"] = (lcd.i2c_bytes - before) / TICKS
+    results["local_tz_time_us"] = per_call_us(local_tz_time)
+    t = local_tz_time()
+
+    def render():
+        renderer.invalidate()
+        renderer.render_date(t)
+        renderer.render_time(t)
+    results["render_us"] = per_call_us(render)
+
+    def temperature():
+        compositor.set("value", values.text(0))
+        compositor.regions["value"].dirty = True
+        compositor.draw()
+    results["temperature_us"] = per_call_us(temperature)
+
+    def flush():
+        fb.invalidate()
+        fb.flush()
+    results["flush_us"] = per_call_us(flush, 200)
+    gc.collect()
+    gc.disable()
+    start = gc.mem_alloc()
+    for _ in range(TICKS):
+        tick()
+    results["heap_peak_b"] = gc.mem_alloc()
+    results["alloc_b_per_tick"] = (results["heap_peak_b"] - start) / TICKS
+    gc.enable()
+    return results
+
+
+def micropython_run():
+    # This suite on the MicroPython unix port; True when it passed or the
+    # port isn't there.
+    port = os.environ.get("MICROPYTHON") or shutil.which("micropython")
+    if not port:
+        print("MicroPython unix port not found (micropython on the PATH, or $MICROPYTHON): its run is skipped.")
+        return True
+    print("MicroPython unix port, %s:" % port)
+    return subprocess.call([port, "bench/bench_suite.py"] + sys.argv[1:], cwd=hal_sim.REPO) == 0
+
+
+def compare(results, baseline):
+    # Prints the table; returns the metrics that got worse than the limits allow.
+    failed = []
+    print("metric                 value   baseline      limit")
+    for name in sorted(results):
+        value = results[name]
+        if name in baseline and name in LIMITS:
+            factor, slack = LIMITS[name]
+            limit = baseline[name] * factor + slack
+            status = "" if value <= limit else "  REGRESSION"
+            if status:
+                failed.append(name)
+            print("%-18s %10.1f %10.1f %10.1f%s" % (name, value, baseline[name], limit, status))
+        else:
+            print("%-18s %10.1f          -          -" % (name, value))
+    return failed
+
+
+def main():
+    name = sys.implementation.name
+    path = "%s/%s.json" % (BASELINES, name)
+    if hal_sim is None:
+        results = parts_alone()
+    else:
+        bench_main = import_main()
+        results = hot_paths(bench_main)
+        results.update(bench_main.sim.loop.run_until_complete(ha_round_trips(bench_main)))
+        bench_main.sim.close()
+        results.update(asyncio.run(ntp_round_trips(bench_main)))
+    for key in results:
+        results[key] = round(results[key], 2)
+    failed = []
+    if "--save" in sys.argv:
+        with open(path, "w") as f:
+            json.dump(results, f)
+            f.write("\n")
+        print("Baseline saved to", path)
+        compare(results, {})
+    else:
+        try:
+            with open(path) as f:
+                baseline = json.load(f)
+        except OSError:
+            print("No baseline for %s yet, save one with --save." % name)
+            baseline = {}
+        failed = compare(results, baseline)
+        if failed:
+            print("Regressions:", ", ".join(failed))
+    if hal_sim is not None and not micropython_run():
+        failed.append("micropython")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
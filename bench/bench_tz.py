@@ -0,0 +1,87 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_tz.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host benchmark and 50 year check of the DST engine.
+#   *
+#   *          Compares tz_rules.TzEngine with the local_tz_time() logic the
+#   *          clock used before (two mktime() calls per tick), for every half
+#   *          hour and every transition second from 2000 to 2049.
+#   *          Run from the repository root: python3 bench/bench_tz.py
+#   *
+#   ******************************************************************************
+#   */
+import os
+import sys
+import time
+
+# The device RTC runs in UTC, make mktime() on the host do the same.
+os.environ["TZ"] = "UTC"
+if hasattr(time, "tzset"):
+    time.tzset()
+
+sys.path.insert(0, ".")
+
+from tz_rules import TzEngine
+
+FIRST_YEAR = 2000
+LAST_YEAR = 2049
+STEP_SEC = 1800
+
+
+def legacy_dst_offset(now):
+    year = time.localtime(now)[0]
+    HHMarch   = time.mktime((year,3 ,(31-(int(5*year/4+4))%7),1,0,0,0,0,0)) #Time of March change
+    HHOctober = time.mktime((year,10,(31-(int(5*year/4+1))%7),1,0,0,0,0,0)) #Time of October change
+    if (now <= HHMarch) or (now >= HHOctober):
+        return 0
+    return 3600
+
+
+def main():
+    engine = TzEngine(3600, "eu")
+    samples = []
+    starts = set()
+    for year in range(FIRST_YEAR, LAST_YEAR + 1):
+        start, end = engine.transitions(year)
+        legacy_start = time.mktime((year,3,(31-(int(5*year/4+4))%7),1,0,0,0,0,0))
+        legacy_end = time.mktime((year,10,(31-(int(5*year/4+1))%7),1,0,0,0,0,0))
+        if (start, end) != (legacy_start, legacy_end):
+            print("MISMATCH transitions %d: %s != %s" % (year, (start, end), (legacy_start, legacy_end)))
+            sys.exit(1)
+        starts.add(start)
+        samples.extend((start - 1, start + 1, end - 1, end, end + 1))
+    first = int(time.mktime((FIRST_YEAR, 1, 1, 0, 0, 0, 0, 0, 0)))
+    last = int(time.mktime((LAST_YEAR + 1, 1, 1, 0, 0, 0, 0, 0, 0)))
+    samples.extend(range(first, last, STEP_SEC))
+    samples.sort()
+    mismatches = 0
+    for now in samples:
+        # The legacy code kept the spring transition second itself in winter
+        # time; the engine switches exactly at the transition.
+        if now in starts:
+            continue
+        if engine.dst_offset(now) != legacy_dst_offset(now):
+            mismatches += 1
+    print("%d samples over %d years, %d mismatches, %d table recomputes" % (len(samples), LAST_YEAR - FIRST_YEAR + 1, mismatches, engine.recomputes))
+
+    # A tick is one second later than the last one, as in the display loop.
+    ticks = range(first, first + 200000)
+    start = time.perf_counter()
+    for now in ticks:
+        legacy_dst_offset(now)
+    legacy_us = 1e6 * (time.perf_counter() - start) / len(ticks)
+    engine = TzEngine(3600, "eu")
+    start = time.perf_counter()
+    for now in ticks:
+        engine.dst_offset(now)
+    engine_us = 1e6 * (time.perf_counter() - start) / len(ticks)
+    print("legacy %.3f us/tick, engine %.3f us/tick (%.0fx)" % (legacy_us, engine_us, legacy_us / engine_us))
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_warm_start.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host simulation: time to the first clock face, cold vs warm start.
+#   *
+#   *          Runs main.py on the host simulator (hal_sim), three boots in
+#   *          the same directory. The cold start has no state.json and shows
+#   *          the face only after WiFi and NTP; the warm start finds the
+#   *          state saved by the cold one and shows it at once. A last boot
+#   *          has a WiFi that never comes up and an RTC reset by a power
+#   *          loss: the face still shows, with the no-WiFi glyph, and with
+#   *          the stale marker, as the RTC is set from the saved time.
+#   *          Run from the repository root: python3 bench/bench_warm_start.py
+#   *
+#   ******************************************************************************
+#   */
+import sys
+
+sys.path.insert(0, ".")
+
+import event_log
+import hal_sim
+
+WIFI_UP_S = 2 # how long the access point takes to let us in
+CONFIG = {"sync_weather": 0, "ntp_srv_timeout": 2}
+
+
+def run(name, sim, seconds):
+    # Boots main.py for seconds of simulated time; returns (first face s,
+    # network up s, WiFi glyph, stale marker).
+    main = sim.setup()
+    face = []
+    flush = main.fb.flush
+
+    def timed_flush(budget=-1):
+        if not face and main.face_up: # the boot messages go through fb too
+            face.append(sim.clock.mono)
+        return flush(budget)
+    main.fb.flush = timed_flush
+    sim.run(seconds / 3600)
+    up = [record[0] / 1000 for record in main.events.records() if record[1] == event_log.WIFI_UP]
+    glyph = chr(main.fb.get(15, 0))
+    stale = chr(main.fb.get(14, 0))
+    sim.close()
+    print("%-26s %12s %14s   %s%s" % (name, "-" if not face else "%.2f" % face[0], "-" if not up else "%.2f" % up[0],
+                                      {"\x01": "WiFi", "\x02": "no WiFi"}.get(glyph, repr(glyph)), ", stale" if stale == "\x03" else ""))
+    return face[0] if face else None, up[0] if up else None, glyph, stale
+
+
+def main():
+    print("start                      first face s   network up s   glyph")
+    cold = hal_sim.Simulation(CONFIG, join_s=WIFI_UP_S)
+    cold_face, cold_net, _, _ = run("cold (no state.json)", cold, 30)
+    # A soft reset: the RTC keeps its time.
+    warm = hal_sim.Simulation(CONFIG, join_s=WIFI_UP_S, workdir=cold.workdir)
+    warm.clock.set_rtc(warm.clock.true_time())
+    warm_face, warm_net, glyph, stale = run("warm (state.json)", warm, 30)
+    # A power loss: the RTC is back at its reset time, behind the saved one.
+    down = hal_sim.Simulation(CONFIG, join_s=WIFI_UP_S, workdir=cold.workdir)
+    down.ap.up = False
+    down_face, _, down_glyph, down_stale = run("warm, WiFi never comes up", down, 3)
+    assert cold_face >= cold_net # the cold face waits for the network
+    assert warm_face < 0.1 and down_face < 0.1
+    assert glyph == "\x01" and down_glyph == "\x02"
+    assert stale == " " and down_stale == "\x03" # the restored time is not shown as a good one
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/bench_wifi.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host check: WifiSupervisor against scripted WiFi failures.
+#   *
+#   *          A stand-in network module plays a script of what each connect()
+#   *          leads to: a join after some time, a failure status, or a radio
+#   *          that hangs in "connecting" until it is switched off and on. The
+#   *          supervisor runs with the default config sped up SCALE times,
+#   *          next to a display tick. Prints the time until the link is back,
+#   *          the tries and radio resets it took and the longest pause of the
+#   *          display, next to what the old fixed-sleep reconnect needed.
+#   *          Run from the repository root: python3 bench/bench_wifi.py
+#   *
+#   ******************************************************************************
+#   */
+import math
+import sys
+import time
+import types
+
+sys.path.insert(0, ".")
+
+import wifi_supervisor
+from compat import asyncio
+
+SCALE = 50 # device seconds per host second
+# config_dist defaults, in device ms
+CONNECT_TIMEOUT_MS = 15000
+POLL_MS = 1000
+BACKOFF_MIN_MS = 5000
+BACKOFF_MAX_MS = 60000
+RESET_AFTER = 2
+wifi_supervisor.RESET_PAUSE_MS //= SCALE
+wifi_supervisor.STABLE_MS //= SCALE
+
+network = types.SimpleNamespace(STA_IF=0, AP_IF=1, STAT_IDLE=0, STAT_CONNECTING=1, STAT_WRONG_PASSWORD=-3,
+                                STAT_NO_AP_FOUND=-2, STAT_CONNECT_FAIL=-1, STAT_GOT_IP=3)
+
+
+def now_ms():
+    # Device ms.
+    return time.monotonic() * 1000 * SCALE
+
+
+class ScriptedWlan:
+    # One script entry per connect() call:
+    #   ("ok", ms)           joins after ms
+    #   ("fail", status, ms) gives up with status after ms
+    #   ("hang",)            stays "connecting" until the radio is switched off
+    script = []
+
+    def __init__(self, interface):
+        self.connects = 0
+        self._entry = None
+        self._since = 0
+        self._active = False
+
+    def active(self, on=None):
+        if on is not None:
+            self._active = on
+            if not on:
+                self._entry = None
+        return self._active
+
+    def connect(self, ssid, password):
+        self.connects += 1
+        self._entry = self.script.pop(0) if self.script else ("fail", network.STAT_NO_AP_FOUND, 0)
+        self._since = now_ms()
+
+    def disconnect(self):
+        self._entry = None
+
+    def drop(self):
+        self._entry = None
+
+    def ifconfig(self, config=None):
+        return ("192.168.0.10", "255.255.255.0", "192.168.0.1", "192.168.0.1")
+
+    def status(self):
+        e = self._entry
+        if e is None or not self._active:
+            return network.STAT_IDLE
+        if e[0] == "hang" or now_ms() - self._since < e[-1]:
+            return network.STAT_CONNECTING
+        return network.STAT_GOT_IP if e[0] == "ok" else e[1]
+
+    def isconnected(self):
+        return self.status() == network.STAT_GOT_IP
+
+
+network.WLAN = ScriptedWlan
+
+
+def old_path_s(script):
+    # The old reconnect: up to a second to notice, a 5 s countdown with the
+    # face gone, radio off/on with two 1 s sleeps, then up to two 15 s waits
+    # polled once a second. Every cycle re-initialised the radio.
+    total = 1
+    for e in script:
+        total += 5 + 2
+        if e[0] == "ok":
+            return total + math.ceil(e[1] / 1000)
+        total += 15 if e[0] == "fail" else 30
+    return None
+
+
+async def scenario(name, script, limit_s=900):
+    ScriptedWlan.script = list(script)
+    wifi = wifi_supervisor.WifiSupervisor(network, "ssid", "password", None, CONNECT_TIMEOUT_MS // SCALE, POLL_MS // SCALE,
+                                          BACKOFF_MIN_MS // SCALE, BACKOFF_MAX_MS // SCALE, RESET_AFTER)
+    wifi.radio_on()
+    wifi.wlan._entry = ("ok", 0) # the link is up...
+    states = []
+    task = asyncio.create_task(wifi.run(states.append))
+    await wifi.up.wait()
+    start = now_ms()
+    wifi.wlan.drop() # ...and drops
+    gaps = []
+    last = now_ms()
+    while not (wifi.up.is_set() and wifi.drops) and now_ms() - start < limit_s * 1000:
+        await asyncio.sleep(1 / SCALE) # the display tick
+        gaps.append(now_ms() - last)
+        last = now_ms()
+    took = (now_ms() - start) / 1000
+    task.cancel()
+    old = old_path_s(script)
+    print("%-30s %8.0f %8d %8d %6d %9.1f %9s" % (name, took, wifi.connects, wifi.failures, wifi.resets, max(gaps) / 1000,
+                                                 "-" if old is None else old))
+    return took, wifi, max(gaps) / 1000
+
+
+async def main():
+    print("scenario                       back in s    tries failures resets display gap s  old path s")
+    took, wifi, gap = await scenario("drop, AP answers at once", [("ok", 3000)])
+    assert took < 6 and wifi.resets == 0 and gap < 1.5
+    took, wifi, gap = await scenario("AP rebooting, 6 misses", [("fail", network.STAT_NO_AP_FOUND, 2000)] * 6 + [("ok", 3000)])
+    assert wifi.failures == 6 and wifi.resets == 3 and gap < 1.5
+    assert wifi.backoff.ms == BACKOFF_MAX_MS // SCALE # 5 s doubled on each miss, up to the cap
+    took, wifi, gap = await scenario("radio stuck until reset", [("hang",), ("ok", 3000)])
+    # connect() is not repeated while the radio still says "connecting".
+    assert wifi.resets == 1 and wifi.wlan.connects == 2 and gap < 1.5
+    took, wifi, gap = await scenario("wrong password, then fixed", [("fail", network.STAT_WRONG_PASSWORD, 1000)] * 8 + [("ok", 3000)])
+    # Jitter: the waits spread over +-25% of the backoff.
+    wifi = wifi_supervisor.WifiSupervisor(network, "ssid", "password", backoff_min_ms=1000)
+    waits = []
+    for _ in range(1000):
+        wifi.backoff.ms = 500 # doubled to 1000
+        waits.append(wifi.backoff.next_ms())
+    print("backoff of 1000 ms waits %d..%d ms" % (min(waits), max(waits)))
+    assert 750 <= min(waits) < 800 and 1200 < max(waits) <= 1250
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,639 @@
+# /**
+#   ******************************************************************************
+#   * @file    bench/hal_sim.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Host simulator: the clock's board on CPython, in virtual time.
+#   *
+#   *          SimBoard has the methods of hal.PicoBoard: a virtual 16x2 LCD
+#   *          that counts its I2C traffic, an RTC on a virtual clock that
+#   *          drifts as told, and a network module whose WLAN joins a scripted
+#   *          access point. NTP and HA stand-ins answer on real local sockets.
+#   *          VirtualClock takes over time.time(), time.monotonic() and
+#   *          time.sleep(), and the event loop skips the waits: when nothing
+#   *          is ready it moves the clock to the next timer at once, so hours
+#   *          of the clock run in seconds. Simulation wires it all up around
+#   *          main.py. Used by the bench scripts, import it from bench/.
+#   *
+#   ******************************************************************************
+#   */
+import asyncio
+import contextlib
+import copy
+import io
+import json
+import os
+import selectors
+import struct
+import sys
+import tempfile
+import time
+import types
+
+REPO = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if REPO not in sys.path:
+    sys.path.insert(0, REPO)
+
+from lcd_framebuf import LCD_TX_PER_OP, LCD_BYTES_PER_TX
+import lcd_compositor
+
+SIM_START_S = 1791547200 # true UTC when a simulation starts (2026-10-09 12:00)
+RTC_RESET_S = 1609459200 # what the RP2040 RTC holds after power-up (2021-01-01)
+READ_US = 10 # every monotonic clock read costs this much, so busy-waits end
+NTP_DELTA = 2208988800
+ENTITY = "weather.forecast_home"
+
+# The network module constants of the Pico W port.
+STA_IF = 0
+AP_IF = 1
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_WRONG_PASSWORD = -3
+STAT_NO_AP_FOUND = -2
+STAT_CONNECT_FAIL = -1
+STAT_GOT_IP = 3
+
+
+class VirtualClock:
+    # The time of the simulated board. mono is the board's crystal (ticks,
+    # time.monotonic()), running crystal_ppm fast against the true time
+    # the NTP stand-in serves. The RTC runs off the same crystal in whole
+    # seconds from where set_rtc() put it.
+    def __init__(self, start_s=SIM_START_S, crystal_ppm=0, rtc_s=RTC_RESET_S):
+        self.mono = 0.0
+        self.start_s = start_s
+        self.crystal_ppm = crystal_ppm
+        self._rtc_at = (0.0, rtc_s) # (mono, RTC seconds) of the last set
+        self.sleeps = 0 # blocking time.sleep() calls
+        self._saved = None
+
+    def true_time(self):
+        return self.start_s + self.mono / (1 + self.crystal_ppm / 1e6)
+
+    def rtc_exact(self):
+        mono, rtc_s = self._rtc_at
+        return rtc_s + self.mono - mono
+
+    def rtc(self):
+        return int(self.rtc_exact()) # time.time() on the device
+
+    def set_rtc(self, t):
+        self._rtc_at = (self.mono, int(t))
+
+    def monotonic(self):
+        self.mono += READ_US / 1e6
+        return self.mono
+
+    def advance(self, s):
+        if s > 0:
+            self.mono += s
+
+    def sleep(self, s):
+        self.sleeps += 1
+        self.advance(s)
+
+    def install(self):
+        # Module level: everything looking the functions up at call time sees them.
+        self._saved = (time.time, time.monotonic, time.sleep, time.localtime, time.gmtime)
+        localtime, gmtime = time.localtime, time.gmtime
+        time.time = self.rtc
+        time.monotonic = self.monotonic
+        time.sleep = self.sleep
+        time.localtime = lambda t=None: localtime(self.rtc() if t is None else t)
+        time.gmtime = lambda t=None: gmtime(self.rtc() if t is None else t)
+
+    def uninstall(self):
+        time.time, time.monotonic, time.sleep, time.localtime, time.gmtime = self._saved
+
+
+class VirtualSelector:
+    # The event loop's selector: real sockets are checked without waiting,
+    # and when nothing is ready the loop's timeout passes in virtual time.
+    def __init__(self, clock, selector=None):
+        self.clock = clock
+        self._selector = selector or selectors.DefaultSelector()
+        self.skipped_s = 0.0
+
+    def select(self, timeout=None):
+        events = self._selector.select(0)
+        if events or timeout == 0:
+            return events
+        if timeout is None:
+            return self._selector.select(None) # no timers: only a socket can wake the loop
+        self.clock.advance(timeout)
+        self.skipped_s += timeout
+        return []
+
+    def __getattr__(self, name):
+        return getattr(self._selector, name)
+
+
+def new_event_loop(clock):
+    return asyncio.SelectorEventLoop(VirtualSelector(clock))
+
+
+class VirtualLcd:
+    # The HD44780 behind the PCF8574 backpack, as far as pico_i2c_lcd.I2cLcd
+    # drives it. Every command or data byte is LCD_TX_PER_OP transfers of
+    # LCD_BYTES_PER_TX bytes on the bus; a backlight change is one transfer.
+    # With a clock, every transfer takes us_per_transfer of simulated time;
+    # unplugged (present False), every write fails like on the Pico.
+    LINE = 40 # DDRAM bytes per line
+
+    def __init__(self, rows=2, cols=16, clock=None, us_per_transfer=0):
+        self.clock = clock
+        self.us_per_transfer = us_per_transfer
+        self.present = True
+        self.rows = rows
+        self.cols = cols
+        self.ddram = [bytearray(b" " * self.LINE) for _ in range(rows)]
+        self.cgram = [bytes(8)] * 8
+        self.backlight = True
+        self.cursor = False
+        self.blink = False
+        self._addr = (0, 0) # (row, col) the next data byte goes to
+        self.cursor_x = 0
+        self.cursor_y = 0
+        self.implied_newline = False
+        self.commands = 0
+        self.data = 0
+        self.transfers = 0
+
+    def _transfer(self, n):
+        if not self.present:
+            raise OSError(5) # EIO, nothing acknowledges
+        self.transfers += n
+        if self.clock is not None and self.us_per_transfer:
+            self.clock.advance(n * self.us_per_transfer / 1000000)
+
+    def reset(self):
+        # The initialisation I2cLcd does: the glass blank, the CGRAM garbage.
+        self._transfer(6 * LCD_TX_PER_OP)
+        self.commands += 6
+        for line in self.ddram:
+            line[:] = b" " * self.LINE
+        self.cgram = [bytes(8)] * 8
+        self._addr = (0, 0)
+        self.cursor_x = 0
+        self.cursor_y = 0
+        self.backlight = True
+        return self
+
+    @property
+    def ops(self):
+        return self.commands + self.data
+
+    @property
+    def i2c_bytes(self):
+        return self.transfers * LCD_BYTES_PER_TX
+
+    def _command(self):
+        self._transfer(LCD_TX_PER_OP)
+        self.commands += 1
+
+    def hal_write_data(self, data):
+        self._transfer(LCD_TX_PER_OP)
+        self.data += 1
+        row, col = self._addr
+        self.ddram[row][col] = data
+        col += 1
+        if col == self.LINE: # two-line mode: the first line continues on the second
+            row, col = (row + 1) % self.rows, 0
+        self._addr = (row, col)
+
+    def move_to(self, cursor_x, cursor_y):
+        self.cursor_x = cursor_x
+        self.cursor_y = cursor_y
+        self._command()
+        self._addr = (cursor_y, cursor_x)
+
+    def clear(self):
+        self._command()
+        for line in self.ddram:
+            line[:] = b" " * self.LINE
+        self.move_to(0, 0)
+
+    def putchar(self, char):
+        # What LcdApi.putchar() does, down to the move after every character.
+        if char == "\n":
+            if self.implied_newline:
+                self.implied_newline = False
+            else:
+                self.cursor_x = self.cols
+        else:
+            self.hal_write_data(ord(char))
+            self.cursor_x += 1
+        if self.cursor_x >= self.cols:
+            self.cursor_x = 0
+            self.cursor_y += 1
+            self.implied_newline = char != "\n"
+        if self.cursor_y >= self.rows:
+            self.cursor_y = 0
+        self.move_to(self.cursor_x, self.cursor_y)
+
+    def putstr(self, string):
+        for char in string:
+            self.putchar(char)
+
+    def custom_char(self, location, charmap):
+        self._command()
+        self._transfer(8 * LCD_TX_PER_OP)
+        self.cgram[location & 7] = bytes(charmap)
+        self.data += 8
+        self.move_to(self.cursor_x, self.cursor_y)
+
+    def backlight_on(self):
+        self._transfer(1)
+        self.backlight = True
+
+    def backlight_off(self):
+        self._transfer(1)
+        self.backlight = False
+
+    def show_cursor(self):
+        self.cursor = True
+        self._command()
+
+    def hide_cursor(self):
+        self.cursor = False
+        self._command()
+
+    def blink_cursor_on(self):
+        self.blink = True
+        self._command()
+
+    def blink_cursor_off(self):
+        self.blink = False
+        self._command()
+
+    def screen(self, glyphs=None):
+        # The visible text, one string per row; glyphs maps the custom
+        # characters (0-7) to something printable.
+        glyphs = glyphs or {}
+        return ["".join(glyphs.get(b, "?") if b < 8 else chr(b) for b in line[:self.cols]) for line in self.ddram]
+
+
+class SimAccessPoint:
+    # What the WLAN joins: up or not, how long a join takes, and drop()
+    # to throw every station off.
+    def __init__(self, join_s=3):
+        self.up = True
+        self.join_s = join_s
+        self.lost = 0 # bumped by every drop
+
+    def drop(self):
+        self.lost += 1
+
+
+class SimWlan:
+    ap = None # set on the subclass by sim_network()
+    PM_NONE = 0x10
+    PM_PERFORMANCE = 0xa11142
+    PM_POWERSAVE = 0x111022
+
+    def __init__(self, interface=STA_IF):
+        self._active = False
+        self._since = None # time.monotonic() of the last connect()
+        self._lost = 0
+        self._ip = ("192.168.0.10", "255.255.255.0", "192.168.0.1", "192.168.0.1")
+        self.pm = self.PM_NONE
+        self.connects = 0
+
+    def active(self, on=None):
+        if on is not None:
+            self._active = bool(on)
+            if not on:
+                self._since = None
+        return self._active
+
+    def config(self, *args, **kwargs):
+        if "pm" in kwargs:
+            self.pm = kwargs["pm"]
+
+    def connect(self, ssid, password):
+        self.connects += 1
+        self._since = time.monotonic()
+        self._lost = self.ap.lost
+
+    def disconnect(self):
+        self._since = None
+
+    def status(self):
+        if not self._active or self._since is None or self._lost != self.ap.lost:
+            return STAT_IDLE
+        if time.monotonic() - self._since < self.ap.join_s:
+            return STAT_CONNECTING
+        return STAT_GOT_IP if self.ap.up else STAT_NO_AP_FOUND
+
+    def isconnected(self):
+        return self.status() == STAT_GOT_IP
+
+    def ifconfig(self, config=None):
+        if config is not None and config != "dhcp":
+            self._ip = config
+        return self._ip
+
+    def ipconfig(self, key):
+        return ()
+
+
+def sim_network(ap):
+    # A network module whose WLAN joins ap.
+    network = types.ModuleType("network")
+    network.STA_IF, network.AP_IF = STA_IF, AP_IF
+    network.STAT_IDLE, network.STAT_CONNECTING, network.STAT_WRONG_PASSWORD = STAT_IDLE, STAT_CONNECTING, STAT_WRONG_PASSWORD
+    network.STAT_NO_AP_FOUND, network.STAT_CONNECT_FAIL, network.STAT_GOT_IP = STAT_NO_AP_FOUND, STAT_CONNECT_FAIL, STAT_GOT_IP
+    network.WLAN = type("WLAN", (SimWlan,), {"ap": ap})
+    return network
+
+
+class SimBoard:
+    # hal.PicoBoard on the host, with a VirtualLcd for each of lcds (names
+    # like hal.PicoBoard.lcds() gives them).
+    def __init__(self, clock, ap, lcds=("i2c0:0x27",)):
+        self.clock = clock
+        self.network = sim_network(ap)
+        self.lcd_devices = {}
+        for name in lcds:
+            self.lcd_devices[name] = VirtualLcd(clock=clock)
+        self.rtc_sets = 0
+        self.lightsleeps = 0
+
+    @property
+    def lcd_device(self):
+        # The first one.
+        return next(iter(self.lcd_devices.values()))
+
+    def lcds(self, rows=2, cols=16):
+        found = []
+        for name, device in self.lcd_devices.items():
+            if device.present:
+                found.append((name, device.reset(), device.reset))
+        return found
+
+    def set_rtc(self, t):
+        self.clock.set_rtc(t)
+        self.rtc_sets += 1
+
+    def lightsleep(self, ms):
+        self.lightsleeps += 1
+        self.clock.advance(ms / 1000)
+
+
+class NtpStub(asyncio.DatagramProtocol):
+    # Serves clock.true_time() after delay_ms round trip, half each way or
+    # delay_out_ms of it on the way back. While down it doesn't answer;
+    # stratum 0 is a server that is not synchronised itself.
+    def __init__(self, clock, delay_ms=20, delay_out_ms=None, stratum=2):
+        self.clock = clock
+        self.delay_ms = delay_ms
+        self.delay_out_ms = delay_ms / 2 if delay_out_ms is None else delay_out_ms
+        self.stratum = stratum
+        self.down = False
+        self.requests = 0
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.requests += 1
+        if self.down or len(data) < 48:
+            return
+        loop = asyncio.get_running_loop()
+        loop.call_later((self.delay_ms - self.delay_out_ms) / 1000, self._answer, data[40:48], addr)
+
+    def _answer(self, origin, addr):
+        t = self.clock.true_time()
+        s = int(t)
+        stamp = struct.pack("!II", s + NTP_DELTA, int((t - s) * (1 << 32)))
+        reply = bytes([0x24, self.stratum]) + bytes(22) + origin + stamp + stamp
+        asyncio.get_running_loop().call_later(self.delay_out_ms / 1000, self._send, reply, addr)
+
+    def _send(self, reply, addr):
+        if not self.transport.is_closing(): # the query may be over already
+            self.transport.sendto(reply, addr)
+
+
+class HaStub:
+    # Answers GET /api/states/<entity> with the weather entity and POST
+    # /api/template with the temperature for every line of the template,
+    # delay_s after the request; while down, requests are read but never
+    # answered, and with error set (e.g. b"401 Unauthorized") every request
+    # gets that status.
+    def __init__(self, temperature=21.5):
+        self.temperature = temperature
+        self.delay_s = 0
+        self.held = 0 # requests waiting out delay_s now
+        self.down = False
+        self.error = None
+        self.requests = 0
+        self.connections = 0
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def _serve(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                length = 0
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode().partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value)
+                body = b""
+                if length:
+                    body = await reader.readexactly(length)
+                self.requests += 1
+                if self.down:
+                    continue
+                path = line.split()[1].decode()
+                if self.error is not None:
+                    body = self.error.split(b" ", 1)[0] + b": " + self.error.split(b" ", 1)[1]
+                    status = self.error
+                elif path.startswith("/api/states/"):
+                    body = json.dumps({"entity_id": path[12:], "state": "sunny",
+                                       "attributes": {"temperature": self.temperature, "temperature_unit": "°C"}}).encode()
+                    status = b"200 OK"
+                elif path == "/api/template":
+                    lines = json.loads(body)["template"].count("\n") + 1
+                    body = "\n".join([str(self.temperature)] * lines).encode()
+                    status = b"200 OK"
+                else:
+                    body = b"{}"
+                    status = b"404 Not Found"
+                if self.delay_s:
+                    self.held += 1
+                    try:
+                        await asyncio.sleep(self.delay_s)
+                    finally:
+                        self.held -= 1
+                writer.write(b"HTTP/1.1 " + status + b"\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+                await writer.drain()
+        except (OSError, asyncio.IncompleteReadError, asyncio.CancelledError): # the simulation ends
+            pass
+        finally:
+            writer.close()
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+
+
+def config_module(name, base, overrides):
+    # A fresh copy of config_dist (or secrets_dist) with overrides.
+    module = types.ModuleType(name)
+    for key, value in vars(base).items():
+        if not key.startswith("__"):
+            setattr(module, key, copy.deepcopy(value))
+    for key, value in overrides.items():
+        setattr(module, key, value)
+    return module
+
+
+GLYPH_TEXT = {lcd_compositor.GLYPHS[code]: text for code, text in (
+    (lcd_compositor.DEGREES, "°"), (lcd_compositor.WIFI, "W"), (lcd_compositor.NOWIFI, "!"), (lcd_compositor.STALE, "~"),
+    (lcd_compositor.DROP, "d"), (lcd_compositor.HOUSE, "h"), (lcd_compositor.ARROW_UP, "^"), (lcd_compositor.ARROW_DOWN, "v"),
+    (lcd_compositor.THERMOMETER, "t"))}
+
+
+class Simulation:
+    # main.py on a SimBoard. run() continues where the last run() stopped;
+    # at(h, fn) calls fn(simulation) h simulated hours after the start.
+    # main.py runs in workdir (its state.json...), a new temporary one if None.
+    def __init__(self, config=None, crystal_ppm=0, join_s=3, ntp_delay_ms=20, start_s=SIM_START_S, lcds=("i2c0:0x27",), workdir=None):
+        self.clock = VirtualClock(start_s, crystal_ppm)
+        self.ap = SimAccessPoint(join_s)
+        self.board = SimBoard(self.clock, self.ap, lcds)
+        self.ntp = NtpStub(self.clock, ntp_delay_ms)
+        self.ha = HaStub()
+        self.config = config or {}
+        self.workdir = workdir
+        self.log = io.StringIO() # what main.py printed
+        self.main = None
+        self.loop = None
+        self.real_s = 0.0
+        self._events = []
+        self._task = None
+        self._cwd = None
+        self._modules = None
+
+    def at(self, hours, fn):
+        self._events.append((hours, fn))
+
+    def setup(self):
+        # main.py imported and set up on the board, the stand-ins serving,
+        # without running main.main(): for the benches that drive its parts.
+        self._cwd = os.getcwd()
+        self._modules = {name: sys.modules.get(name) for name in ("main", "settings", "config", "secrets", "config_compiled")}
+        self.clock.install() # before main.py's imports bind time functions as defaults
+        self.loop = new_event_loop(self.clock)
+        asyncio.set_event_loop(self.loop)
+        transport, _ = self.loop.run_until_complete(self.loop.create_datagram_endpoint(lambda: self.ntp, local_addr=("127.0.0.1", 0)))
+        ntp_port = transport.get_extra_info("sockname")[1]
+        ha_port = self.loop.run_until_complete(self.ha.start())
+        import config_dist
+        import secrets_dist
+        config = {
+            "wifi_ip_config": {'mode':'dhcp'},
+            "metrics_port": 0,
+            "ntp_host": ["127.0.0.1:%d" % ntp_port],
+            "ha_api_url_temperature": "http://127.0.0.1:%d/api/states/%s" % (ha_port, ENTITY),
+        }
+        config.update(self.config)
+        sys.modules["config"] = config_module("config", config_dist, config)
+        sys.modules["secrets"] = config_module("secrets", secrets_dist, {})
+        sys.modules["config_compiled"] = None # the config above, not a compiled one lying around
+        for name in ("main", "settings"):
+            sys.modules.pop(name, None)
+        if self.workdir is None:
+            self.workdir = tempfile.mkdtemp()
+        os.chdir(self.workdir)
+        with contextlib.redirect_stdout(self.log):
+            import main
+            main.setup(self.board)
+        self.main = main
+        return main
+
+    def _start(self):
+        if self.main is None:
+            self.setup()
+        main = self.main
+        for hours, fn in self._events:
+            self.loop.call_at(hours * 3600, fn, self)
+        self._task = self.loop.create_task(main.main())
+
+    def run(self, hours):
+        start = time.perf_counter()
+        if self._task is None:
+            self._start()
+        with contextlib.redirect_stdout(self.log):
+            self.loop.run_until_complete(asyncio.sleep(hours * 3600))
+        self.real_s += time.perf_counter() - start
+        return self
+
+    def close(self):
+        with contextlib.redirect_stdout(self.log):
+            for task in asyncio.all_tasks(self.loop):
+                task.cancel()
+            self.loop.run_until_complete(asyncio.sleep(0))
+            self.loop.run_until_complete(self.main.ha_client.close())
+            self.main.time_server.close()
+            self.main.store.flush(force=True)
+        self.ha.close()
+        self.ntp.transport.close()
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.loop.close()
+        asyncio.set_event_loop(None)
+        self.clock.uninstall()
+        os.chdir(self._cwd)
+        for name, module in self._modules.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+    def screen(self, name=None):
+        # An LCD (the first by default) as text, the custom characters by
+        # what is in their CGRAM slot.
+        lcd = self.board.lcd_devices[name] if name else self.board.lcd_device
+        return lcd.screen({slot: GLYPH_TEXT.get(lcd.cgram[slot], "?") for slot in range(8)})
+
+    def rtc_error_ms(self):
+        return (self.clock.rtc_exact() - self.clock.true_time()) * 1000
+
+    def summary(self):
+        main = self.main
+        lcds = self.board.lcd_devices.values()
+        i2c_bytes = sum(lcd.i2c_bytes for lcd in lcds)
+        hours = self.clock.mono / 3600
+        return {
+            "simulated_h": round(hours, 3),
+            "real_s": round(self.real_s, 3),
+            "speedup": round(self.clock.mono / self.real_s) if self.real_s else 0,
+            "lcd_ops": sum(lcd.ops for lcd in lcds),
+            "i2c_bytes": i2c_bytes,
+            "i2c_bytes_per_h": round(i2c_bytes / hours) if hours else 0,
+            "i2c_bytes_by_lcd": {name: lcd.i2c_bytes for name, lcd in self.board.lcd_devices.items()},
+            "frames": main.fb.flushes,
+            "ntp_requests": self.ntp.requests,
+            "rtc_sets": self.board.rtc_sets,
+            "rtc_error_ms": round(self.rtc_error_ms(), 1),
+            "drift_ppm": round(main.discipline.drift_ppm, 2),
+            "ha_requests": self.ha.requests,
+            "ha_connections": self.ha.connections,
+            "wifi_connects": main.wifi_link.connects,
+            "wifi_drops": main.wifi_link.drops,
+            "lightsleeps": self.board.lightsleeps,
+            "tick_late_ms": round(main.scheduler.late_mean_ms, 2),
+        }
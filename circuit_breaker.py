@@ -0,0 +1,86 @@
+# /**
+#   ******************************************************************************
+#   * @file    circuit_breaker.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Circuit breaker for the upstream servers (HA, NTP).
+#   *
+#   *          Closed: requests go through. After threshold failures in a row
+#   *          the breaker opens and requests are skipped for the cool-down;
+#   *          then it is half-open and lets one request through. Its success
+#   *          closes the breaker, its failure opens it again for a cool-down
+#   *          twice as long (up to max_cooldown_ms). A dead server thus costs
+#   *          a request now and then instead of a network restart. The
+#   *          changes go to the event log, if one is given.
+#   *
+#   ******************************************************************************
+#   */
+import compat
+import event_log
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    def __init__(self, name, threshold=3, cooldown_ms=300000, max_cooldown_ms=None, ticks_ms=compat.ticks_ms, events=None, source=0):
+        # events: an event_log.EventLog, source: which breaker it logs (event_log.HA...).
+        self.name = name
+        self.events = events
+        self.source = source
+        self.threshold = threshold
+        self.cooldown_ms = cooldown_ms
+        self.max_cooldown_ms = max_cooldown_ms if max_cooldown_ms is not None else 8 * cooldown_ms
+        self._ticks_ms = ticks_ms
+        self.state = CLOSED
+        self.failed = 0 # failures in a row
+        self._wait_ms = cooldown_ms
+        self._opened_at = 0
+        self.opens = 0
+        self.half_opens = 0
+        self.closes = 0
+        self.rejected = 0 # requests skipped while open
+        self.successes = 0
+        self.failures = 0
+
+    def allow(self):
+        # True when a request may go out now.
+        if self.state == OPEN:
+            if compat.ticks_diff(self._ticks_ms(), self._opened_at) < self._wait_ms:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self.half_opens += 1
+            self._log(event_log.BREAKER_HALF_OPEN)
+        return True
+
+    def success(self):
+        self.successes += 1
+        self.failed = 0
+        if self.state != CLOSED:
+            self.state = CLOSED
+            self._wait_ms = self.cooldown_ms
+            self.closes += 1
+            self._log(event_log.BREAKER_CLOSED)
+
+    def failure(self):
+        self.failures += 1
+        self.failed += 1
+        if self.state == HALF_OPEN:
+            self._wait_ms = min(self._wait_ms * 2, self.max_cooldown_ms)
+        elif self.state != CLOSED or self.failed < self.threshold:
+            return
+        self.state = OPEN
+        self._opened_at = self._ticks_ms()
+        self.opens += 1
+        self._log(event_log.BREAKER_OPEN, self.failed, self._wait_ms // 1000)
+
+    def _log(self, code, a=0, b=0):
+        if self.events is not None:
+            self.events.log(code, self.source, a, b)
+
+    @property
+    def closed(self):
+        return self.state == CLOSED
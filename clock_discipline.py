@@ -0,0 +1,109 @@
+# /**
+#   ******************************************************************************
+#   * @file    clock_discipline.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   RTC drift estimate and adaptive NTP resync interval.
+#   *
+#   *          Every NTP sync tells how far the RTC wandered since the last
+#   *          one. From that the RTC rate error (ppm) is estimated and
+#   *          corrected for in between syncs, so the next sync only has to
+#   *          catch what the estimate got wrong. How wrong it tends to be
+#   *          sets the time until the next sync: as long as the target
+#   *          accuracy holds, a good crystal is asked about rarely and a
+#   *          poor one more often. The estimate is kept in the state store,
+#   *          so it is not learned from scratch after every reboot.
+#   *
+#   ******************************************************************************
+#   */
+MIN_SPAN_S = 600 # shorter sync spans say too little about the rate
+UNCERTAINTY_FLOOR_PPM = 0.5 # crystals wander about this much with temperature anyway
+STEP_MS = 50 # the RTC is re-aligned once the predicted error reaches this
+
+
+class ClockDiscipline:
+    def __init__(self, target_ms=200, min_interval_s=3600, max_interval_s=604800, store=None):
+        # store: a StateStore (or None) the estimate is kept in under "drift".
+        self.target_ms = target_ms
+        self.min_interval_s = min_interval_s
+        self.max_interval_s = max_interval_s
+        self.store = store
+        self.drift_ppm = 0 # how much faster the RTC runs than it should
+        self.uncertainty_ppm = None # typical error of drift_ppm, None until measured
+        self._sync_s = None # RTC time of the last NTP sync (this boot)
+        self._set_s = None # RTC time of the last change of the RTC
+        self._corrected_ms = 0 # corrections applied since the last sync
+        self._carry_ms = 0 # predicted error left over by the last correction
+        self.syncs = 0
+        self.corrections = 0
+        self.interval_s = min_interval_s
+        self.load()
+
+    def load(self):
+        state = self.store.get("drift") if self.store is not None else None
+        if state:
+            self.drift_ppm = state[0]
+            self.uncertainty_ppm = state[1]
+        self.interval_s = self._interval()
+
+    def save(self):
+        if self.store is not None:
+            self.store.set("drift", [self.drift_ppm, self.uncertainty_ppm])
+
+    def _interval(self):
+        if self.uncertainty_ppm is None:
+            return self.min_interval_s
+        # ms of error per second = ppm / 1000
+        interval = self.target_ms * 1000 // max(self.uncertainty_ppm, UNCERTAINTY_FLOOR_PPM)
+        return int(min(max(interval, self.min_interval_s), self.max_interval_s))
+
+    def synced(self, now_s, offset_ms):
+        # After an NTP sync set the RTC at now_s; offset_ms is how far the RTC
+        # was behind the server just before (None when it wasn't measured
+        # precisely). Returns the seconds until the next sync.
+        self.syncs += 1
+        if offset_ms is not None and self._sync_s is not None and now_s - self._sync_s >= MIN_SPAN_S:
+            # What the RTC would have drifted without the corrections.
+            raw_ms = self._corrected_ms - offset_ms
+            measured_ppm = raw_ms * 1000 / (now_s - self._sync_s)
+            miss = abs(measured_ppm - self.drift_ppm)
+            if self.uncertainty_ppm is None:
+                self.drift_ppm = measured_ppm
+                self.uncertainty_ppm = miss
+            else:
+                self.drift_ppm += (measured_ppm - self.drift_ppm) / 2
+                self.uncertainty_ppm += (miss - self.uncertainty_ppm) / 2
+            if abs(offset_ms) > self.target_ms:
+                # Missed the target: come back sooner, whatever the estimate says.
+                self.uncertainty_ppm = max(self.uncertainty_ppm, abs(offset_ms) * 1000 / (now_s - self._sync_s) * 2)
+            self.save()
+        self._sync_s = now_s
+        self._set_s = now_s
+        self._corrected_ms = 0
+        self._carry_ms = 0
+        self.interval_s = self._interval()
+        return self.interval_s
+
+    def error_ms(self, now_s):
+        # Predicted RTC error (RTC minus true time) not corrected yet.
+        if self._set_s is None:
+            return 0
+        return self._carry_ms + self.drift_ppm * (now_s - self._set_s) / 1000
+
+    def due_correction(self, now_s):
+        # The correction to apply now (ms to take off the RTC), or 0.
+        error = self.error_ms(now_s)
+        return int(error) if abs(error) >= STEP_MS else 0
+
+    def corrected(self, now_s, ms):
+        # The RTC was moved back by ms at now_s.
+        self._carry_ms = self.error_ms(now_s) - ms # so that fractions don't add up to a bias
+        self._corrected_ms += ms
+        self._set_s = now_s
+        self.corrections += 1
+
+    def next_sync_in(self, now_s):
+        if self._sync_s is None:
+            return 0
+        return max(self._sync_s + self.interval_s - now_s, 0)
@@ -0,0 +1,111 @@
+# /**
+#   ******************************************************************************
+#   * @file    clock_render.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Allocation-free date and time line rendering for the clock.
+#   *
+#   *          All the text the clock face needs is looked up from tables built
+#   *          once at import, and written into preallocated line buffers, so a
+#   *          tick doesn't create any strings for the GC to collect later.
+#   *
+#   ******************************************************************************
+#   */
+
+tm_year = 0
+tm_mon = 1
+tm_mday = 2
+tm_hour = 3
+tm_min = 4
+tm_sec = 5
+tm_wday = 6
+
+# "00".."99" - two ASCII bytes per number, index with 2*n and 2*n+1.
+TWO_DIGITS = bytes(b"".join(bytes((0x30 + n // 10, 0x30 + n % 10)) for n in range(100)))
+# Monday = 0, two ASCII bytes per day.
+WEEKDAYS = b"MoTuWeThFrSaSu"
+AM_PM = b"AMPM"
+# 12-hour clock face hour for each hour of the day: 12, 1, 2 .. 11, 12, 1 .. 11
+HOURS_12 = bytes(((h % 12) or 12) for h in range(24))
+
+LINE_LEN = 16
+
+
+class ClockRenderer:
+    def __init__(self, is_metric, show_seconds, use_24h_clock, disable_ampm, sync_weather):
+        self.date_line = bytearray(b" " * LINE_LEN)
+        self.time_line = bytearray(b" " * LINE_LEN)
+        # "DD/MM/YYYY  Wd" or "MM/DD/YYYY  Wd"
+        self.date_len = 14
+        self.date_line[2] = 0x2F
+        self.date_line[5] = 0x2F
+        self._day_pos = 0 if is_metric else 3
+        self._mon_pos = 3 if is_metric else 0
+        self._last_mday = -1
+        self._last_mon = -1
+        self._last_year = -1
+        self._use_24h = use_24h_clock
+        self._show_ampm = (not use_24h_clock) and (not disable_ampm)
+        # In the 12h mode the seconds make room for the temperature, unless AM/PM is off.
+        if use_24h_clock:
+            self.show_seconds = show_seconds
+        else:
+            self.show_seconds = show_seconds and ((not sync_weather) or disable_ampm)
+        # "HH:MM", "HH:MM:SS", "HH:MM AM" or "HH:MM:SS AM"
+        self.time_line[2] = 0x3A
+        pos = 5
+        if self.show_seconds:
+            self.time_line[5] = 0x3A
+            pos = 8
+        self._ampm_pos = pos + 1
+        if self._show_ampm:
+            pos += 3
+        self.time_len = pos
+
+    def render_date(self, t):
+        # Returns True when the date line changed, i.e. once per day.
+        if t[tm_mday] == self._last_mday and t[tm_mon] == self._last_mon and t[tm_year] == self._last_year:
+            return False
+        self._last_mday = t[tm_mday]
+        self._last_mon = t[tm_mon]
+        self._last_year = t[tm_year]
+        line = self.date_line
+        n = 2 * t[tm_mday]
+        line[self._day_pos] = TWO_DIGITS[n]
+        line[self._day_pos + 1] = TWO_DIGITS[n + 1]
+        n = 2 * t[tm_mon]
+        line[self._mon_pos] = TWO_DIGITS[n]
+        line[self._mon_pos + 1] = TWO_DIGITS[n + 1]
+        n = 2 * (t[tm_year] // 100)
+        line[6] = TWO_DIGITS[n]
+        line[7] = TWO_DIGITS[n + 1]
+        n = 2 * (t[tm_year] % 100)
+        line[8] = TWO_DIGITS[n]
+        line[9] = TWO_DIGITS[n + 1]
+        n = 2 * t[tm_wday]
+        line[12] = WEEKDAYS[n]
+        line[13] = WEEKDAYS[n + 1]
+        return True
+
+    def render_time(self, t):
+        line = self.time_line
+        hour = t[tm_hour]
+        n = 2 * (hour if self._use_24h else HOURS_12[hour])
+        line[0] = TWO_DIGITS[n]
+        line[1] = TWO_DIGITS[n + 1]
+        n = 2 * t[tm_min]
+        line[3] = TWO_DIGITS[n]
+        line[4] = TWO_DIGITS[n + 1]
+        if self.show_seconds:
+            n = 2 * t[tm_sec]
+            line[6] = TWO_DIGITS[n]
+            line[7] = TWO_DIGITS[n + 1]
+        if self._show_ampm:
+            n = 0 if hour < 12 else 2
+            line[self._ampm_pos] = AM_PM[n]
+            line[self._ampm_pos + 1] = AM_PM[n + 1]
+
+    def invalidate(self):
+        # Forces the next render_date() to report a change.
+        self._last_mday = -1
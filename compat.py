@@ -0,0 +1,58 @@
+# /**
+#   ******************************************************************************
+#   * @file    compat.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   MicroPython time and asyncio helpers, with CPython fallbacks
+#   *          for the host.
+#   *
+#   ******************************************************************************
+#   */
+import time
+
+try:
+    from time import ticks_ms, ticks_us, ticks_diff, ticks_add, sleep_ms
+except ImportError: # CPython on the host
+    TICKS_PERIOD = 1 << 30
+    TICKS_HALFPERIOD = TICKS_PERIOD >> 1
+
+    def ticks_ms():
+        return int(time.monotonic() * 1000) & (TICKS_PERIOD - 1)
+
+    def ticks_us():
+        return int(time.monotonic() * 1000000) & (TICKS_PERIOD - 1)
+
+    def ticks_diff(end, start):
+        return ((end - start + TICKS_HALFPERIOD) & (TICKS_PERIOD - 1)) - TICKS_HALFPERIOD
+
+    def ticks_add(ticks, delta):
+        return (ticks + delta) & (TICKS_PERIOD - 1)
+
+    def sleep_ms(ms):
+        time.sleep(ms / 1000)
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+if hasattr(asyncio, "sleep_ms"):
+    asleep_ms = asyncio.sleep_ms
+else:
+    def asleep_ms(ms):
+        return asyncio.sleep(ms / 1000)
+
+if hasattr(asyncio, "core"): # uasyncio
+    async def wait_readable(sock):
+        # Waits, without polling, till the (non-blocking) socket has data.
+        yield asyncio.core._io_queue.queue_read(sock)
+else:
+    async def wait_readable(sock):
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        loop.add_reader(sock, lambda: ready.done() or ready.set_result(None))
+        try:
+            await ready
+        finally:
+            loop.remove_reader(sock)
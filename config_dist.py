@@ -4,6 +4,10 @@ sync_weather = 1 # whether o sync with HA to get and display weather data
 show_seconds = 1 # whether to show seconds (1) or no (0)
 use_24h_clock = 1 # if use (1) the 24-hours clock or not - show AM/PM. If sset to 0 and sync_weather is set to one, seconds will be hidden. Unless disable_ampm is set to 1.
 disable_ampm = 0 # if set to 1 then do not show AM/PM even in the non-24hrs mode
+display_page_sec = 0 # if more than 0, the clock face takes turns with pages of the ha_sensors values (two a page, with their labels), each shown this many seconds
+display_scroll_ms = 400 # text too long for its place on the LCD scrolls one column this often (in milliseconds)
+lcd_i2c1 = None # (sda, scl) pins of I2C1 if there are LCDs on it too, e.g. (2, 3). Every LCD found on I2C0 (GP0, GP1) and I2C1 shows the clock.
+lcd_layout = {} # per LCD, by its name in the event log ("LCD: found at i2c0:0x27"): 'sensors' - the indices of the ha_sensors values it shows, all by default; 'pages': 0 - no display_page_sec pages. E.g. {'i2c0:0x27': {'sensors': [0]}, 'i2c1:0x26': {'sensors': [1, 2], 'pages': 0}}
 
 # Wifi connection settings config
 wifi_ip_config = {'mode':'static', 'params':{'ip':'192.168.0.10','mask':'255.255.255.0','gateway':'192.168.0.1','dns':'192.168.0.1'}} # mode can be either static or dhcp. When set to DHCP 'params' are ignored.
@@ -11,25 +15,47 @@ wifi_ip_config = {'mode':'static', 'params':{'ip':'192.168.0.10','mask':'255.255
 #NTP config
 ntp_host = ["0.pool.ntp.org","1.pool.ntp.org"] # array of NTP hosts in order of attempt to sync
 daylight_time_savings = 1 # whether to disable (0) or enable (1) daylight time savings
+dst_rule = "eu" # daylight time savings rule: "eu", "us", "au", "nz" or a custom ((month, nth, weekday, at_sec, ref), (month, nth, weekday, at_sec, ref), save_sec) tuple - see tz_rules.py
 resync_ntp = 1 # whether to re-sync with NTP server after synced once on load
-resync_ntp_frequency_sec = 604800 # How often to re-sync with NTP server - e.g. once in 86400*7 - 7 days
-reconnect_on_ntp_gone = 0 # 0 for skip sync with NTP server if failed to re-sync or 1 for re-connect to WiFi and sync again (basically to re-start board). Will do so until the sync finally happens.
+resync_ntp_frequency_sec = 604800 # The longest time between re-syncs with NTP server - e.g. 86400*7 - 7 days. The clock learns how much its RTC drifts, corrects it in between and re-syncs as often as needed to stay within ntp_target_ms.
+ntp_target_ms = 200 # how far (in milliseconds) the clock may drift away from the NTP time before it is re-synced
+ntp_min_interval_sec = 3600 # the shortest time between re-syncs with NTP server
+ntp_failure_threshold = 3 # failed re-syncs in a row (one a minute) before NTP is left alone for ntp_breaker_cooldown_sec. The clock keeps running from the RTC meanwhile.
+ntp_breaker_cooldown_sec = 3600 # how long (in seconds) to leave NTP alone after it failed; doubles while it keeps failing, up to 8 times
 ntp_srv_timeout = 20 # how long to wait for the NTP server to respond. In seconds.
 time_shift_minutes = 60 # time shift 
+ntp_server_port = 0 # 123 to serve the time to the other clocks (SNTP) once this one is synced: list this clock's IP first in their ntp_host. 0 switches it off. Keeps the radio on with power_save.
 
 #HA config
-reconnect_on_ha_gone = 1 # re-connect to WiFi if the HA server is gone. Will do that until the server becomes available.
+ha_failure_threshold = 3 # failed HA requests in a row (one a minute) before HA is left alone for ha_breaker_cooldown_sec. The last values stay on the display, marked with an hourglass.
+ha_breaker_cooldown_sec = 300 # how long (in seconds) to leave HA alone after it failed; doubles while it keeps failing, up to 8 times
 ha_srv_timeout = 20  # how long to wait for the HA server to respond. In seconds.
 ha_api_url_temperature = "https://homeassistant.myawesomeserver:8123/api/states/weather.forecast_home" # HA API url.
 ha_api_temperature_json_path = "['attributes']['temperature']" # the json sctructure to get the temperature from
 temperature_units = "celsius" # set the display to celsius, kelvin or farenheit. It doesn't convert data, just displays the symbol. If it is set to anything else - displays no symbol
 temperature_sync_time_sec = 900 #how often to get weather data from HA in seconds. For example, once in 15*60seconds
+ha_sensors = [] # several HA values fetched in one request and shown in turns. When empty, only the temperature from ha_api_url_temperature is shown. Example:
+# ha_sensors = [{'entity':'weather.forecast_home', 'attribute':'temperature', 'suffix':'\x00C'}, {'entity':'sensor.outdoor_humidity', 'suffix':'%', 'label':'Humidity'}] # '\x00' is the degrees sign, lcd_compositor.GLYPHS has more. 'label' is for the display_page_sec pages, the entity name if not given
+ha_sensor_rotate_sec = 5 # how long (in seconds) each of the ha_sensors values is shown
+ha_push = 0 # 1 to have HA push temperature changes over its WebSocket API as they happen. Needs ha_api_url_temperature to be an /api/states/<entity> URL and no ha_sensors. Polling every temperature_sync_time_sec is the fallback while the connection is down.
+ha_push_ping_sec = 30 # how often (in seconds) to check that a quiet WebSocket connection is still alive
+ha_push_backoff_max_sec = 300 # longest wait (in seconds) between attempts to re-open the WebSocket connection
+
+#Power config
+power_save = 0 # 1 for the low-power mode: WLAN power-save, the radio off between the scheduled NTP and HA fetches (not with ha_push) and the CPU in lightsleep meanwhile. Logs an estimated power report every hour; the ledger is also served at http://<clock IP>:<metrics_port>/power.
+power_radio_off_min_sec = 600 # the radio is only switched off when the next fetch is at least this long (in seconds) away
+backlight_night = None # e.g. (23, 7) to switch the backlight off from 23:00 to 7:00 local time
+
+#Metrics config
+metrics_port = 0 # port of the Prometheus metrics endpoint, e.g. 9100 for http://<clock IP>:9100/metrics, with the power ledger at /power. 0 - off.
+
+#Log config
+event_log_size = 128 # events kept in RAM (18 bytes each), printed on exit and served at http://<clock IP>:<metrics_port>/log
+event_log_flash = 0 # 1 - append the events to events.bin on the flash, in batches of 32, the last 2x16 KB kept
 
 # Service config (parameters description might be tricky and not very straightforward. Change only if you know what you are doing!)
-cycle_time_ms = 200 # the main cycle delay. if sest to higher values than 200 ms seconds display doesn't feel smooth enough. It didn't affect the current draw.
-cycle_time_ms_no_sec = 60000 # the main cycle delay if no seconds are displayed
-max_wait_wifi_attempt_sec = 10 # time in seconds to wait for the wifi to become connected after the request to connect was sent
-wifi_reconnect_time = 5 # time in seconds to wait before next attempt to connect to WiFi is permormed
-wifi_reconnect_attempts_per_attempt = 2 # how many times per WiFi attempt to connect cycle to try to connect.
+wifi_reconnect_time = 5 # time in seconds to wait before the first retry after a failed WiFi connect (it doubles with every failure) and before re-connecting when a server is gone
+wifi_backoff_max_sec = 60 # longest wait (in seconds) between WiFi connect attempts
+wifi_reconnect_attempts_per_attempt = 2 # how many quick re-connects to try before the WiFi radio is switched off and on.
 wifi_wait_time_per_attempt = 15 # how long to wait (in seconds) per attempt to connect to wifi per attempt
-wifi_wait_time_step = 1 # how long (in seconds) to wait between attempts in wifi connect attempt cycle
+wifi_wait_time_step = 1 # how often (in seconds) to check the WiFi connection status
@@ -0,0 +1,284 @@
+# /**
+#   ******************************************************************************
+#   * @file    event_log.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Event log in a fixed ring buffer, formatted only when read.
+#   *
+#   *          An event is a 18 byte record - ticks_ms(), an event code and
+#   *          three integer arguments - packed into a bytearray allocated
+#   *          once, so logging allocates nothing and never waits for the
+#   *          serial console. The oldest events are overwritten. The text of
+#   *          the events (EVENTS) is only made when the log is read: dump()
+#   *          on the console, text() for the network, or lines_from_file()
+#   *          for what flush() appended to flash in batches.
+#   *
+#   *          The timestamps are ticks, turned into the time of day with the
+#   *          RTC when the log is read (or with the anchor flush() writes),
+#   *          so an RTC set later fixes the time of earlier events too. The
+#   *          ticks wrap after 6 days, older events in RAM get wrong times.
+#   *
+#   ******************************************************************************
+#   */
+import os
+import struct
+import time
+
+import compat
+from wifi_supervisor import DOWN, CONNECTING, UP, BACKOFF, RESET, OFF
+
+FORMAT = "<IHiii"
+RECORD = struct.calcsize(FORMAT)
+ARG_MAX = 0x7fffffff
+ARG_MIN = -0x80000000
+
+# Event codes. The arguments of each are in EVENTS.
+ANCHOR = 0 # flush() only: the RTC seconds at the record's ticks
+NTP_FAILED = 1
+NTP_TIMEOUT = 2
+NTP_SYNCED = 3
+RTC_SET = 4
+HA_FAILED = 5
+HA_TIMEOUT = 6
+HA_BAD_PATH = 7
+HA_SYNCED = 8
+WIFI_STATE = 9
+WIFI_FAILED = 10
+WIFI_UP = 11
+WLAN_NO_POWER_SAVE = 12
+WARM_START = 13
+RTC_RESTORED = 14
+METRICS_PORT_BUSY = 15
+LCD_FOUND = 16
+NTP_PORT_BUSY = 17
+BREAKER_OPEN = 18
+BREAKER_HALF_OPEN = 19
+BREAKER_CLOSED = 20
+NTP_UNRESOLVED = 21
+NTP_SEND_FAILED = 22
+NTP_HOST_FAILED = 23
+STATE_NOT_SAVED = 24
+HA_PUSH_TIMEOUT = 25
+HA_PUSH_AUTH_FAILED = 26
+HA_PUSH_LOST = 27
+POWER_PART = 28
+POWER_TOTAL = 29
+HA_PUSH_UNSUPPORTED = 30
+
+# The states WifiSupervisor reports, by the index WIFI_STATE logs.
+WIFI_STATES = (DOWN, CONNECTING, UP, BACKOFF, RESET, OFF)
+# The circuit breakers, by the source the BREAKER_* events log. An LCD's is
+# LCD | bus << 8 | address.
+HA = 0
+NTP = 1
+LCD = 0x10000
+# The parts of PowerManager.ledger(), by the index POWER_PART logs.
+POWER_PARTS = ("cpu awake", "cpu lightsleep", "radio on", "radio power-save", "radio off", "i2c", "backlight")
+
+
+def wifi_status(status):
+    # What the network module's WLAN.status() codes mean.
+    if status == 0:
+        return "no connection and no activity"
+    if status == 1:
+        return "connecting still in progress"
+    if status == 2:
+        return "connected, but no IP address yet. DHCP problems?"
+    if status == 3:
+        return "connected, got an IP"
+    if status == -1:
+        return "failed due to other problems"
+    if status == -2:
+        return "failed because no access point replied"
+    if status == -3:
+        return "failed due to incorrect password"
+    return "unknown status %d" % status
+
+
+def _ms(value):
+    if value in (ARG_MAX, ARG_MIN):
+        return "more than 24 days"
+    return "%d ms" % value
+
+
+def _hundredths(value):
+    return "%.2f" % (value / 100)
+
+
+def _ip(value):
+    value &= 0xffffffff
+    return "%d.%d.%d.%d" % (value >> 24, value >> 16 & 255, value >> 8 & 255, value & 255)
+
+
+def _when(value):
+    tm = time.gmtime(value)
+    return "%04d-%02d-%02d %02d:%02d:%02d UTC" % tm[:6]
+
+
+def _wifi_state(value):
+    return WIFI_STATES[value] if 0 <= value < len(WIFI_STATES) else str(value)
+
+
+def _source(value):
+    if value & LCD:
+        return "LCD i2c%d:0x%02x" % (value >> 8 & 255, value & 255)
+    return ("HA", "NTP")[value] if 0 <= value < 2 else str(value)
+
+
+def _power_part(value):
+    return POWER_PARTS[value] if 0 <= value < len(POWER_PARTS) else str(value)
+
+
+def _tenths(value):
+    return "%.1f" % (value / 10)
+
+
+# code: (text, a renderer for each argument the text shows, in order)
+EVENTS = {
+    ANCHOR: ("RTC at %s", (_when,)),
+    NTP_FAILED: ("NTP: no host answered, WiFi %s", (wifi_status,)),
+    NTP_TIMEOUT: ("NTP: sync timed out", ()),
+    NTP_SYNCED: ("NTP: host #%d, offset %s, round trip %s", (int, _ms, _ms)),
+    RTC_SET: ("RTC set %s after the second, drift %s ppm, next sync in %d s", (_ms, _hundredths, int)),
+    HA_FAILED: ("HA: request failed", ()),
+    HA_TIMEOUT: ("HA: request timed out", ()),
+    HA_BAD_PATH: ("HA: ha_api_temperature_json_path is no valid path, please fix the config", ()),
+    HA_SYNCED: ("HA: %d value(s), the first %s", (int, _hundredths)),
+    WIFI_STATE: ("WiFi: %s", (_wifi_state,)),
+    WIFI_FAILED: ("WiFi: could not connect, %s", (wifi_status,)),
+    WIFI_UP: ("WiFi: up, IP %s, gateway %s", (_ip, _ip)),
+    WLAN_NO_POWER_SAVE: ("WiFi: WLAN power-save is not supported", ()),
+    WARM_START: ("Warm start, state saved at %s", (_when,)),
+    RTC_RESTORED: ("RTC restored from the saved state", ()),
+    METRICS_PORT_BUSY: ("Metrics: port %d is not free, no metrics", (int,)),
+    LCD_FOUND: ("LCD: found at i2c%d:0x%02x", (int, int)),
+    NTP_PORT_BUSY: ("NTP server: port %d is not free, not serving the time", (int,)),
+    BREAKER_OPEN: ("%s: %d failures, next try in %d s", (_source, int, int)),
+    BREAKER_HALF_OPEN: ("%s: trying again", (_source,)),
+    BREAKER_CLOSED: ("%s: back", (_source,)),
+    NTP_UNRESOLVED: ("NTP: host #%d can not be resolved, error %d", (int, int)),
+    NTP_SEND_FAILED: ("NTP: query to host #%d failed, error %d", (int, int)),
+    NTP_HOST_FAILED: ("NTP: host #%d failed, error %d", (int, int)),
+    STATE_NOT_SAVED: ("State: could not save, error %d", (int,)),
+    HA_PUSH_TIMEOUT: ("HA push: connection timed out", ()),
+    HA_PUSH_AUTH_FAILED: ("HA push: the token was refused, push stopped", ()),
+    HA_PUSH_LOST: ("HA push: connection lost, error %d", (int,)),
+    POWER_PART: ("Power: %s %d ms, %s mAh", (_power_part, int, _hundredths)),
+    POWER_TOTAL: ("Power over %s h: %s mAh, %s mA on average", (_tenths, _hundredths, _hundredths)),
+    HA_PUSH_UNSUPPORTED: ("HA push: needs ha_api_url_temperature to be an /api/states/<entity> URL and no ha_sensors, polling only", ()),
+}
+
+
+def error_code(exc):
+    # The errno of an OSError for the *_FAILED events, 0 for other exceptions.
+    code = exc.args[0] if exc.args else 0
+    return code if isinstance(code, int) else 0
+
+
+def ip_number(ip):
+    # "192.168.0.10" -> the number WIFI_UP logs.
+    n = 0
+    for part in ip.split("."):
+        n = n << 8 | int(part)
+    return n - (1 << 32) if n > ARG_MAX else n
+
+
+def format_event(code, a, b, c):
+    entry = EVENTS.get(code)
+    if entry is None:
+        return "event %d (%d, %d, %d)" % (code, a, b, c)
+    text, renderers = entry
+    args = (a, b, c)
+    return text % tuple(renderers[i](args[i]) for i in range(len(renderers)))
+
+
+def _clamp(value):
+    if value > ARG_MAX:
+        return ARG_MAX
+    if value < ARG_MIN:
+        return ARG_MIN
+    return value
+
+
+class EventLog:
+    def __init__(self, size=128, ticks_ms=compat.ticks_ms):
+        self.size = size
+        self.buf = bytearray(size * RECORD)
+        self._ticks_ms = ticks_ms
+        self.logged = 0 # events since the start, the ring holds the last size of them
+        self.flushed = 0 # events written to flash so far, the same count
+        self.flush_failures = 0 # flushes the flash refused; their events stayed in the ring
+
+    def log(self, code, a=0, b=0, c=0):
+        struct.pack_into(FORMAT, self.buf, (self.logged % self.size) * RECORD, self._ticks_ms(), code, _clamp(a), _clamp(b), _clamp(c))
+        self.logged += 1
+
+    @property
+    def lost(self):
+        # Overwritten before they were read or flushed.
+        return max(self.logged - self.size, 0)
+
+    def records(self, start=0):
+        # (ticks, code, a, b, c) of the events from number start on, oldest first.
+        for n in range(max(start, self.logged - self.size), self.logged):
+            yield struct.unpack_from(FORMAT, self.buf, (n % self.size) * RECORD)
+
+    def lines(self):
+        now_s = time.time()
+        now = self._ticks_ms()
+        for ticks, code, a, b, c in self.records():
+            yield "%s %s" % (_when(now_s - compat.ticks_diff(now, ticks) // 1000), format_event(code, a, b, c))
+
+    def dump(self, write=print):
+        if self.lost:
+            write("(%d older events lost)" % self.lost)
+        for line in self.lines():
+            write(line)
+
+    def text(self):
+        out = []
+        self.dump(out.append)
+        out.append("")
+        return "\n".join(out)
+
+    def flush(self, path="events.bin", batch=32, max_bytes=16384, force=False):
+        # Appends the events since the last flush once there are batch of
+        # them. A full file is kept as path + ".old" and a new one started.
+        # When the write fails (full or worn flash) they stay for the next one.
+        if self.logged - self.flushed < (1 if force else batch):
+            return 0
+        try:
+            if os.stat(path)[6] >= max_bytes:
+                os.rename(path, path + ".old")
+        except OSError:
+            pass
+        records = list(self.records(self.flushed))
+        try:
+            with open(path, "ab") as f:
+                f.write(struct.pack(FORMAT, self._ticks_ms(), ANCHOR, _clamp(int(time.time())), 0, 0))
+                for record in records:
+                    f.write(struct.pack(FORMAT, *record))
+        except OSError:
+            self.flush_failures += 1
+            return 0
+        self.flushed = self.logged
+        return len(records)
+
+
+def lines_from_file(path="events.bin"):
+    # The events flush() wrote, each anchor giving the time for what follows it.
+    anchor = None
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(RECORD)
+            if len(data) < RECORD:
+                break
+            ticks, code, a, b, c = struct.unpack(FORMAT, data)
+            if code == ANCHOR:
+                anchor = (ticks, a)
+                continue
+            when = "(no time)"
+            if anchor is not None:
+                when = _when(anchor[1] + compat.ticks_diff(ticks, anchor[0]) // 1000)
+            yield "%s %s" % (when, format_event(code, a, b, c))
@@ -0,0 +1,173 @@
+# /**
+#   ******************************************************************************
+#   * @file    ha_push.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Home Assistant push updates over the WebSocket API.
+#   *
+#   *          One long-lived connection to /api/websocket, authenticated with
+#   *          the access token, subscribed to a state trigger of one entity.
+#   *          HA then sends the new state within a second of every change,
+#   *          instead of the clock asking for it every few minutes. Each event
+#   *          goes through the same streaming JSON path extractor as the REST
+#   *          response. Lost connections are re-opened with an exponential,
+#   *          jittered backoff; meanwhile the REST polling carries on.
+#   *
+#   ******************************************************************************
+#   */
+import json
+
+import compat
+from compat import asyncio
+import event_log
+from backoff import Backoff
+import ws_client
+from json_stream import JsonPathExtractor, compile_path
+
+SUB_ID = 1 # id of the subscribe_trigger command, events carry it too
+# Where the new state object sits in a trigger event.
+EVENT_STATE_PATH = ("event", "variables", "trigger", "to_state")
+
+
+def entity_of(states_url):
+    # "https://ha:8123/api/states/sensor.outdoor" -> "sensor.outdoor", or None.
+    path = states_url.split("?", 1)[0]
+    if "/api/states/" not in path:
+        return None
+    return path.rsplit("/", 1)[1] or None
+
+
+class AuthError(Exception):
+    pass
+
+
+class HaPush:
+    def __init__(self, url, token, entity, json_path, ping_ms=30000, backoff_min_ms=1000, backoff_max_ms=300000, ssl=None, events=None):
+        # url: any URL of the HA host; json_path: the ha_api_temperature_json_path
+        # syntax, or compiled already; events: an event_log.EventLog, or None.
+        self._events = events
+        self.url = ws_client.ws_url(url)
+        self._ssl = ssl
+        self._token = token
+        self.entity = entity
+        self._extractor = JsonPathExtractor(EVENT_STATE_PATH + (compile_path(json_path) if isinstance(json_path, str) else tuple(json_path)))
+        self.ping_ms = ping_ms
+        # A connection that lasted a ping interval was a healthy one.
+        self.backoff = Backoff(backoff_min_ms, backoff_max_ms, ping_ms)
+        self.subscribed = False
+        self.auth_failed = False # a wrong token won't get better by retrying
+        self._reader = None
+        self._writer = None
+        self._next_id = SUB_ID + 1
+        self._partial = False # a frame was half read when a wait timed out
+        self.connects = 0
+        self.failures = 0
+        self.events = 0
+        self.pings = 0
+
+    def _close(self):
+        self.subscribed = False
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except OSError:
+                pass
+        self._reader = None
+        self._writer = None
+
+    async def _send(self, message):
+        await ws_client.write_frame(self._writer, ws_client.OP_TEXT, json.dumps(message).encode())
+
+    async def _recv(self, sink=None):
+        # Next text message: parsed (sink None) or streamed to sink, then True.
+        # Control frames are answered here.
+        while True:
+            # A wait that times out before the first byte is an idle connection;
+            # after it, the stream is part way through a frame.
+            b0 = (await self._reader.readexactly(1))[0]
+            self._partial = True
+            fin, opcode, length, key = await ws_client.read_frame_head(self._reader, b0)
+            payload = await ws_client.read_payload(self._reader, length, key, None if opcode != ws_client.OP_TEXT and opcode != ws_client.OP_CONT else sink)
+            self._partial = False
+            if opcode == ws_client.OP_PING:
+                await ws_client.write_frame(self._writer, ws_client.OP_PONG, payload)
+            elif opcode == ws_client.OP_CLOSE:
+                raise OSError("websocket closed by HA")
+            elif opcode == ws_client.OP_TEXT or opcode == ws_client.OP_CONT:
+                if not fin:
+                    if sink is None:
+                        raise ValueError("fragmented websocket message")
+                    continue # the next piece goes to the same sink
+                if sink is not None:
+                    return True
+                message = json.loads(bytes(payload))
+                if not isinstance(message, dict): # valid JSON, but no HA message
+                    raise ValueError("websocket message is no JSON object")
+                return message
+
+    async def _open(self):
+        self._reader, self._writer = await ws_client.connect(self.url, self._ssl)
+        self.connects += 1
+        message = await self._recv()
+        if message.get("type") == "auth_required":
+            await self._send({"type": "auth", "access_token": self._token})
+            message = await self._recv()
+        if message.get("type") != "auth_ok":
+            raise AuthError(message.get("message", "auth failed"))
+        await self._send({"id": SUB_ID, "type": "subscribe_trigger",
+                          "trigger": {"platform": "state", "entity_id": self.entity}})
+        message = await self._recv()
+        if message.get("type") != "result" or not message.get("success"):
+            raise OSError("subscription refused")
+        self.subscribed = True
+
+    async def _listen(self, on_value):
+        # Hands every new value to on_value; returns when the connection is dead.
+        extractor = self._extractor
+        idle = 0
+        while True:
+            extractor.reset()
+            try:
+                await asyncio.wait_for(self._recv(extractor.feed), self.ping_ms / 1000)
+            except asyncio.TimeoutError:
+                if self._partial or idle:
+                    # Stuck half way through a frame, or no answer to the ping.
+                    self._log(event_log.HA_PUSH_TIMEOUT)
+                    return
+                idle = 1
+                self.pings += 1
+                await self._send({"id": self._next_id, "type": "ping"})
+                self._next_id += 1
+                continue
+            idle = 0
+            if extractor.found: # pongs and other answers simply don't have the path
+                self.events += 1
+                on_value(extractor.value)
+
+    def _log(self, code, a=0):
+        if self._events is not None:
+            self._events.log(code, a)
+
+    async def run(self, on_value, on_subscribed=None):
+        # Keeps the subscription up until cancelled or the token is refused.
+        # on_subscribed() is awaited after every (re)subscription: changes made
+        # while disconnected are not replayed, so that is the time to poll once.
+        while True:
+            try:
+                await asyncio.wait_for(self._open(), self.ping_ms / 1000)
+                self.backoff.up()
+                if on_subscribed is not None:
+                    await on_subscribed()
+                await self._listen(on_value)
+            except AuthError:
+                self._log(event_log.HA_PUSH_AUTH_FAILED)
+                self.auth_failed = True
+                return
+            except (OSError, EOFError, ValueError, KeyError, asyncio.TimeoutError) as e:
+                self._log(event_log.HA_PUSH_LOST, event_log.error_code(e))
+            finally:
+                self._close()
+            self.backoff.settle()
+            self.failures += 1
+            await compat.asleep_ms(self.backoff.next_ms())
@@ -0,0 +1,103 @@
+# /**
+#   ******************************************************************************
+#   * @file    ha_sensors.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Several Home Assistant values fetched in one round trip.
+#   *
+#   *          All configured entities are rendered by one call to the HA
+#   *          template API (POST /api/template), one value per line, so the
+#   *          request count and radio time per refresh stay the same no
+#   *          matter how many sensors are shown. The values are parsed once
+#   *          into a small cache the display rotates through.
+#   *
+#   ******************************************************************************
+#   */
+import json
+
+TEMPLATE_PATH = "/api/template"
+FIELD_WIDTH = 7 # LCD columns 9..15 of the second row
+
+
+def unit_suffix(temperature_units):
+    # "\x00" is the degrees glyph loaded into the LCD CGRAM.
+    if temperature_units == "celsius":
+        return "\x00C"
+    if temperature_units == "kelvin":
+        return "\x00K"
+    if temperature_units == "farenheit":
+        return "\x00F"
+    return ""
+
+
+def build_template(sensors):
+    lines = []
+    for sensor in sensors:
+        if sensor.get('attribute'):
+            lines.append("{{ state_attr('%s', '%s') }}" % (sensor['entity'], sensor['attribute']))
+        else:
+            lines.append("{{ states('%s') }}" % sensor['entity'])
+    return "\n".join(lines)
+
+
+def parse_value(text):
+    try:
+        return float(text)
+    except ValueError: # "unknown", "unavailable", "None"...
+        return None
+
+
+def format_value(value, suffix):
+    # Same number format the clock always used for the temperature.
+    if value is None:
+        return ""
+    return (f'{value:.0f}' if ((value <= -1000) or (value >= 10)) else f'{value:.1f}') + suffix
+
+
+class HaValues:
+    def __init__(self, suffixes):
+        self.suffixes = suffixes
+        self.values = [None] * len(suffixes)
+        self.updated = 0 # bumped on every change, so the display knows when to redraw
+
+    def set(self, index, value):
+        if self.values[index] != value:
+            self.values[index] = value
+            self.updated += 1
+
+    def text(self, index):
+        return format_value(self.values[index], self.suffixes[index])
+
+    def __len__(self):
+        return len(self.values)
+
+
+class HaSensors:
+    def __init__(self, sensors, headers, body=None):
+        # sensors: list of {'entity': ..., 'attribute': ... (optional), 'suffix': ...}
+        # body: the request body if it was built already (settings.py)
+        self.sensors = sensors
+        self.cache = HaValues([sensor.get('suffix', "") for sensor in sensors])
+        if body is None:
+            body = json.dumps({"template": build_template(sensors)}).encode() # built once
+        self._body = body
+        self._headers = dict(headers)
+        self._headers["Content-Type"] = "application/json"
+        self.fetches = 0
+        self.failures = 0
+
+    async def fetch(self, client):
+        # One POST for all the sensors. Returns False when HA didn't answer properly.
+        self.fetches += 1
+        status, headers, body = await client.request("POST", TEMPLATE_PATH, self._headers, self._body)
+        if status != 200:
+            self.failures += 1
+            return False
+        lines = body.decode().split("\n")
+        if len(lines) < len(self.sensors):
+            self.failures += 1
+            return False
+        for i in range(len(self.sensors)):
+            self.cache.set(i, parse_value(lines[i].strip()))
+        return True
@@ -0,0 +1,58 @@
+# /**
+#   ******************************************************************************
+#   * @file    hal.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   The board the clock runs on.
+#   *
+#   *          main.py reaches the hardware only through a board object: the
+#   *          LCDs, the RTC, lightsleep and the network module for the WiFi.
+#   *          PicoBoard is the Pico W one; bench/hal_sim.py has a simulated
+#   *          board with the same methods for running the clock on the host.
+#   *          Nothing is touched before the methods are called, so main.py
+#   *          imports anywhere.
+#   *
+#   ******************************************************************************
+#   */
+import time
+
+# The addresses a PCF8574 (0x20-0x27) or a PCF8574A (0x38-0x3F) backpack answers at.
+LCD_ADDRESSES = tuple(range(0x20, 0x28)) + tuple(range(0x38, 0x40))
+
+
+class PicoBoard:
+    # A Pico W with the LCDs' PCF8574 backpacks on I2C0 and, when i2c1 has
+    # its (sda, scl) pins, on I2C1 too. A bus without pull-ups is better not
+    # scanned, so I2C1 is only used when asked for.
+    def __init__(self, sda=0, scl=1, freq=400000, i2c1=None):
+        import machine
+        import network
+        self._machine = machine
+        self.network = network
+        self._pins = [(0, sda, scl)]
+        if i2c1:
+            self._pins.append((1, i2c1[0], i2c1[1]))
+        self._freq = freq
+
+    def lcds(self, rows=2, cols=16):
+        # [(name, lcd, reopen)] for every backpack on the buses, name being
+        # "i2c<bus>:0x<address>"; reopen() initialises the LCD again.
+        from pico_i2c_lcd import I2cLcd
+        machine = self._machine
+        found = []
+        for bus, sda, scl in self._pins:
+            i2c = machine.I2C(bus, sda=machine.Pin(sda), scl=machine.Pin(scl), freq=self._freq)
+            for addr in i2c.scan():
+                if addr in LCD_ADDRESSES:
+                    reopen = lambda i2c=i2c, addr=addr: I2cLcd(i2c, addr, rows, cols)
+                    found.append(("i2c%d:0x%02x" % (bus, addr), reopen(), reopen))
+        return found
+
+    def set_rtc(self, t):
+        # t: unix seconds, UTC.
+        tm = time.gmtime(t)
+        self._machine.RTC().datetime((tm[0], tm[1], tm[2], tm[6] + 1, tm[3], tm[4], tm[5], 0))
+
+    def lightsleep(self, ms):
+        self._machine.lightsleep(ms)
@@ -0,0 +1,285 @@
+# /**
+#   ******************************************************************************
+#   * @file    json_stream.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Streaming JSON path extractor.
+#   *
+#   *          Pulls one value out of a JSON document fed in chunks, without
+#   *          building the document. The path - the same "['a']['b'][0]"
+#   *          syntax as ha_api_temperature_json_path - is compiled once; the
+#   *          tokenizer keeps only a few small fixed buffers and stops looking
+#   *          at the input as soon as the value is complete.
+#   *
+#   ******************************************************************************
+#   */
+
+MAX_DEPTH = 32
+KEY_LEN = 64
+VALUE_LEN = 32
+
+# Tokenizer states
+_VALUE = 0 # expecting a value
+_AFTER = 1 # after a value: , ] or }
+_KEY = 2 # expecting an object key or }
+_COLON = 3
+_STRING = 4
+_ESCAPE = 5
+_SCALAR = 6 # number, true, false or null
+_DONE = 7
+_SKIP = 8 # inside an object or array off the path
+_SKIP_STRING = 9
+_SKIP_ESCAPE = 10 # a chunk ended right after a backslash in a skipped string
+
+_WS = b" \t\r\n"
+_SCALAR_END = b" \t\r\n,]}"
+
+
+def compile_path(path):
+    # "['attributes']['temperature']" -> ('attributes', 'temperature'); [0] gives an int.
+    parts = []
+    i = 0
+    path = path.strip()
+    while i < len(path):
+        if path[i] != "[":
+            raise ValueError("bad json path: " + path)
+        end = path.index("]", i)
+        item = path[i + 1:end].strip()
+        if item[:1] in ("'", '"'):
+            if item[-1:] != item[0] or len(item) < 2:
+                raise ValueError("bad json path: " + path)
+            parts.append(item[1:-1])
+        else:
+            parts.append(int(item))
+        i = end + 1
+        while i < len(path) and path[i] == " ":
+            i += 1
+    if not parts:
+        raise ValueError("empty json path")
+    return tuple(parts)
+
+
+class JsonPathExtractor:
+    def __init__(self, path):
+        self.path = compile_path(path) if isinstance(path, str) else tuple(path)
+        self._keys = [p.encode() if isinstance(p, str) else None for p in self.path]
+        self._kinds = bytearray(MAX_DEPTH) # b"{" or b"[" per open container
+        self._index = [0] * MAX_DEPTH # element index per open array
+        self._key = bytearray(KEY_LEN)
+        self._value = bytearray(VALUE_LEN)
+        self.reset()
+
+    def reset(self):
+        self._state = _VALUE
+        self._depth = 0
+        self._matched = 0 # open containers lying on the path
+        self._hit = True # the next value lies on the path (the root always does)
+        self._key_len = 0
+        self._capture = False # collecting the current string/scalar into _value
+        self._value_len = 0
+        self._string_is_key = False
+        self._overflow = False
+        self._skip = 0 # open brackets of the skipped container
+        self.found = False
+        self.value = None
+        self.bytes_seen = 0
+
+    def _element_hit(self, key_or_index):
+        # Whether the element just named at the current depth is on the path.
+        level = self._depth
+        if self._matched != level or level > len(self.path):
+            return False
+        want = self.path[level - 1]
+        if isinstance(want, int):
+            return key_or_index == want
+        return self._keys[level - 1] == key_or_index
+
+    def _start_value(self, c):
+        # c begins a value; returns the next state.
+        target = self._hit and self._depth == len(self.path)
+        if c == 0x7B or c == 0x5B: # { [
+            if target:
+                raise ValueError("json path points at an object or array")
+            if not self._hit:
+                # Nothing in there can match: only count brackets until it closes.
+                self._skip = 1
+                return _SKIP
+            if self._depth >= MAX_DEPTH:
+                raise ValueError("json nested too deep")
+            self._kinds[self._depth] = c
+            self._index[self._depth] = 0
+            self._depth += 1
+            if self._hit:
+                self._matched = self._depth
+            self._hit = False
+            if c == 0x7B:
+                return _KEY
+            self._hit = self._element_hit(0)
+            return _VALUE
+        self._capture = target
+        self._value_len = 0
+        self._overflow = False
+        if c == 0x22: # "
+            self._string_is_key = False
+            return _STRING
+        self._put(c)
+        return _SCALAR
+
+    def _put(self, c):
+        if self._capture:
+            if self._value_len < VALUE_LEN:
+                self._value[self._value_len] = c
+                self._value_len += 1
+            else:
+                self._overflow = True
+
+    def _finish_scalar(self, is_string):
+        if not self._capture:
+            return False
+        if self._overflow:
+            raise ValueError("json value too long")
+        text = bytes(self._value[:self._value_len]).decode()
+        if is_string:
+            self.value = text
+        elif text == "true":
+            self.value = True
+        elif text == "false":
+            self.value = False
+        elif text == "null":
+            self.value = None
+        elif "." in text or "e" in text or "E" in text:
+            self.value = float(text)
+        else:
+            self.value = int(text)
+        self.found = True
+        self._state = _DONE
+        return True
+
+    def _end_value(self):
+        # After a value at the current depth.
+        self._hit = False
+        return _AFTER
+
+    def feed(self, data):
+        # Feeds the next chunk; returns True once the value was found.
+        if self._state == _DONE:
+            return True
+        self.bytes_seen += len(data)
+        state = self._state
+        i = 0
+        n = len(data)
+        while i < n:
+            c = data[i]
+            if state == _SKIP or state == _SKIP_STRING:
+                # Fast path for the bulk of large documents (e.g. forecast arrays).
+                skip = self._skip
+                while i < n:
+                    c = data[i]
+                    i += 1
+                    if state == _SKIP_STRING:
+                        if c == 0x5C: # backslash: skip the escaped byte too
+                            if i == n:
+                                state = _SKIP_ESCAPE
+                                break
+                            i += 1
+                        elif c == 0x22:
+                            state = _SKIP
+                    elif c == 0x22:
+                        state = _SKIP_STRING
+                    elif c == 0x7B or c == 0x5B:
+                        skip += 1
+                    elif c == 0x7D or c == 0x5D:
+                        skip -= 1
+                        if skip == 0:
+                            state = self._end_value()
+                            break
+                self._skip = skip
+                continue
+            if state == _SKIP_ESCAPE:
+                state = _SKIP_STRING
+            elif state == _STRING:
+                # Fast path: nothing to collect, jump to the next quote or backslash.
+                if not self._capture and not (self._string_is_key and self._matched == self._depth):
+                    while i < n and data[i] != 0x22 and data[i] != 0x5C:
+                        i += 1
+                    if i == n:
+                        break
+                    c = data[i]
+                if c == 0x5C: # backslash
+                    state = _ESCAPE
+                elif c == 0x22:
+                    if self._string_is_key:
+                        state = _COLON
+                    elif self._finish_scalar(True):
+                        return True
+                    else:
+                        state = self._end_value()
+                elif self._string_is_key:
+                    if self._key_len < KEY_LEN:
+                        self._key[self._key_len] = c
+                    self._key_len += 1
+                else:
+                    self._put(c)
+            elif state == _ESCAPE:
+                # Escaped characters are kept as they are (\" -> ", \n -> n),
+                # good enough for matching keys and reading simple strings.
+                if self._string_is_key:
+                    if self._key_len < KEY_LEN:
+                        self._key[self._key_len] = c
+                    self._key_len += 1
+                else:
+                    self._put(c)
+                state = _STRING
+            elif state == _SCALAR:
+                if c in _SCALAR_END:
+                    if self._finish_scalar(False):
+                        return True
+                    state = self._end_value()
+                    continue # the delimiter is handled in _AFTER
+                self._put(c)
+            elif c in _WS:
+                pass
+            elif state == _VALUE:
+                if c == 0x5D and self._depth and self._kinds[self._depth - 1] == 0x5B: # ] of an empty array
+                    state = self._close()
+                else:
+                    state = self._start_value(c)
+            elif state == _AFTER:
+                if c == 0x2C: # ,
+                    if self._depth == 0:
+                        raise ValueError("unexpected , in json")
+                    if self._kinds[self._depth - 1] == 0x5B:
+                        self._index[self._depth - 1] += 1
+                        self._hit = self._element_hit(self._index[self._depth - 1])
+                        state = _VALUE
+                    else:
+                        state = _KEY
+                elif c == 0x5D or c == 0x7D:
+                    state = self._close()
+                else:
+                    raise ValueError("unexpected byte in json: %d" % c)
+            elif state == _KEY:
+                if c == 0x22:
+                    self._string_is_key = True
+                    self._key_len = 0
+                    state = _STRING
+                elif c == 0x7D:
+                    state = self._close()
+                else:
+                    raise ValueError("unexpected byte in json: %d" % c)
+            elif state == _COLON:
+                if c != 0x3A:
+                    raise ValueError("expected : in json")
+                self._string_is_key = False
+                self._hit = self._key_len <= KEY_LEN and self._element_hit(self._key[:self._key_len])
+                state = _VALUE
+            i += 1
+        self._state = state
+        return False
+
+    def _close(self):
+        self._depth -= 1
+        if self._matched > self._depth:
+            self._matched = self._depth
+        return self._end_value()
@@ -0,0 +1,278 @@
+# /**
+#   ******************************************************************************
+#   * @file    lcd_compositor.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Named regions, rotating pages and scrolling on top of the LCD
+#   *          frame buffer.
+#   *
+#   *          A page is a set of regions, each a place on one row of the
+#   *          LCD. The clock sets the text of a region by name; draw() puts
+#   *          the regions that changed into the frame buffer, and its flush()
+#   *          sends only the cells that changed. Text wider than its region
+#   *          scrolls, one column per scroll(), so a scroll step costs only
+#   *          the cells that really differ.
+#   *
+#   *          Bytes below 0x20 in the text are glyphs, not characters: the
+#   *          HD44780 only has 8 CGRAM slots, so GlyphCache loads the glyphs
+#   *          into them as they are needed, replacing the least recently used
+#   *          one that is not on the screen.
+#   *
+#   ******************************************************************************
+#   */
+from compat import ticks_add, ticks_diff
+
+SPACE = 0x20
+UNKNOWN = 0x3F # '?', for the characters a text byte can't hold
+LEFT = 0
+RIGHT = 1
+SCROLL_GAP = 3 # blank columns between the end of scrolling text and its start again
+SCROLL_HOLD = 3 # scroll steps the start of the text stays before it moves
+
+GLYPH_CODES = 0x20 # text bytes below this are glyphs
+SLOTS = 8 # CGRAM
+NONE = 0xFF
+
+# The built-in glyphs, by the code used for them in the text. 0-3 are the
+# ones the clock always had, the others are there for ha_sensors suffixes
+# and labels, e.g. 'suffix':'%\x04'.
+DEGREES = 0
+WIFI = 1
+NOWIFI = 2
+STALE = 3
+DROP = 4
+HOUSE = 5
+ARROW_UP = 6
+ARROW_DOWN = 7
+THERMOMETER = 8
+GLYPHS = {
+    DEGREES: bytes([0x7, 0x5, 0x7, 0x0, 0x0, 0x0, 0x0, 0x0]),
+    WIFI: bytes([0b00000, 0b01110, 0b10001, 0b00100, 0b01010, 0b00000, 0b00100, 0b00000]),
+    NOWIFI: bytes([0b00001, 0b01110, 0b10011, 0b00100, 0b01110, 0b01000, 0b10100, 0b00000]),
+    STALE: bytes([0b11111, 0b10001, 0b01010, 0b00100, 0b01010, 0b10001, 0b11111, 0b00000]), # an hourglass
+    DROP: bytes([0b00100, 0b00100, 0b01010, 0b01010, 0b10001, 0b10001, 0b01110, 0b00000]),
+    HOUSE: bytes([0b00100, 0b01010, 0b10001, 0b11111, 0b10001, 0b10101, 0b10101, 0b00000]),
+    ARROW_UP: bytes([0b00100, 0b01110, 0b10101, 0b00100, 0b00100, 0b00100, 0b00100, 0b00000]),
+    ARROW_DOWN: bytes([0b00100, 0b00100, 0b00100, 0b00100, 0b10101, 0b01110, 0b00100, 0b00000]),
+    THERMOMETER: bytes([0b00100, 0b01010, 0b01010, 0b01110, 0b01110, 0b11111, 0b01110, 0b00000]),
+}
+
+
+class GlyphCache:
+    # Which glyph is in which CGRAM slot, loaded on demand, LRU.
+    def __init__(self, fb, glyphs=GLYPHS):
+        self.fb = fb
+        self.patterns = [None] * GLYPH_CODES
+        for code in glyphs:
+            self.patterns[code] = glyphs[code]
+        self._slot_of = bytearray([NONE] * GLYPH_CODES) # code -> slot
+        self._code_in = bytearray([NONE] * SLOTS) # slot -> code
+        self._used = [0] * SLOTS # _clock at the last use, per slot
+        self._clock = 0
+        self.busy = 0 # bit mask of the slots that must stay, set by Compositor.draw()
+        self.loads = 0
+        self.evictions = 0
+
+    def forget(self):
+        # The LCD was re-initialised: the slots hold nothing known any more.
+        for code in range(GLYPH_CODES):
+            self._slot_of[code] = NONE
+        for slot in range(SLOTS):
+            self._code_in[slot] = NONE
+            self._used[slot] = 0
+
+    def preload(self, codes):
+        # Loads the glyphs into slots 0, 1, ... in this order.
+        for slot in range(len(codes)):
+            self._load(slot, codes[slot])
+
+    def _load(self, slot, code):
+        old = self._code_in[slot]
+        if old != NONE:
+            self._slot_of[old] = NONE
+            self.evictions += 1
+        self.fb.custom_char(slot, self.patterns[code])
+        self._code_in[slot] = code
+        self._slot_of[code] = slot
+        self.loads += 1
+
+    def slot(self, code):
+        # The character code showing glyph code, loading it if it must.
+        # A space when there is no pattern for it or no free slot.
+        slot = self._slot_of[code]
+        if slot == NONE:
+            if self.patterns[code] is None:
+                return SPACE
+            used = self._used
+            for i in range(SLOTS):
+                if not self.busy & (1 << i) and (slot == NONE or used[i] < used[slot]):
+                    slot = i
+            if slot == NONE: # all 8 on the screen already
+                return SPACE
+            self._load(slot, code)
+        self._clock += 1
+        self._used[slot] = self._clock
+        self.busy |= 1 << slot
+        return slot
+
+
+class Region:
+    def __init__(self, name, col, row, width, align=LEFT):
+        self.name = name
+        self.col = col
+        self.row = row
+        self.width = width
+        self.align = align
+        self.text = bytearray(width) # grows for longer text
+        self.length = 0
+        self.out = bytearray(width) # the cells as drawn
+        self.mask = 0 # glyph slots the drawn cells use
+        self.offset = 0 # scroll position
+        self.hold = SCROLL_HOLD
+        self.dirty = True
+
+    @property
+    def scrolls(self):
+        return self.length > self.width
+
+    def set(self, text, length=-1):
+        # text: str or bytes-like; only length bytes of it if given.
+        if length < 0:
+            length = len(text)
+        if length > len(self.text):
+            self.text = bytearray(length)
+        buf = self.text
+        changed = length != self.length
+        for i in range(length):
+            c = text[i]
+            if not isinstance(c, int):
+                c = ord(c)
+                if c > 0xFF: # e.g. from an HA state; the LCD has none of those anyway
+                    c = UNKNOWN
+            if buf[i] != c:
+                buf[i] = c
+                changed = True
+        if changed:
+            self.length = length
+            self.offset = 0
+            self.hold = SCROLL_HOLD
+            self.dirty = True
+        return changed
+
+    def scroll(self):
+        if self.hold:
+            self.hold -= 1
+            return
+        self.offset = (self.offset + 1) % (self.length + SCROLL_GAP)
+        if self.offset == 0:
+            self.hold = SCROLL_HOLD
+        self.dirty = True
+
+    def draw(self, glyphs):
+        out = self.out
+        text = self.text
+        width = self.width
+        length = self.length
+        if length > width:
+            period = length + SCROLL_GAP
+            j = self.offset
+            for i in range(width):
+                out[i] = text[j] if j < length else SPACE
+                j += 1
+                if j == period:
+                    j = 0
+        else:
+            pad = width - length if self.align == RIGHT else 0
+            for i in range(width):
+                j = i - pad
+                out[i] = text[j] if 0 <= j < length else SPACE
+        mask = 0
+        for i in range(width):
+            if out[i] < GLYPH_CODES:
+                c = glyphs.slot(out[i])
+                out[i] = c
+                if c < SLOTS:
+                    mask |= 1 << c
+        self.mask = mask
+        self.dirty = False
+
+
+class Compositor:
+    def __init__(self, fb, glyphs):
+        self.fb = fb
+        self.glyphs = glyphs
+        self.pages = {} # name: [Region, ...]
+        self.regions = {} # name: Region, over all the pages
+        self.page = None
+        self._rotation = () # page names taking turns
+        self._page_ms = 0
+        self._page_at = 0
+        self._turn = 0
+
+    def add_page(self, name, regions):
+        self.pages[name] = regions
+        for region in regions:
+            self.regions[region.name] = region
+
+    def set(self, name, text, length=-1):
+        return self.regions[name].set(text, length)
+
+    def show(self, name):
+        # Switches to the page; the next draw() repaints all of it. Also
+        # after fb.clear().
+        self.page = name
+        for row in range(self.fb.rows): # the cells no region covers stay blank
+            self.fb.fill(0, row, self.fb.cols)
+        for region in self.pages[name]:
+            region.dirty = True
+
+    def rotate(self, names, page_ms, now_ms):
+        # The pages take turns, page_ms each, starting with the first now.
+        self._rotation = names
+        self._page_ms = page_ms
+        self._page_at = ticks_add(now_ms, page_ms)
+        self._turn = 0
+        self.show(names[0])
+
+    def turn(self, now_ms):
+        # Moves on to the next page of the rotation when its time is up.
+        if len(self._rotation) < 2 or ticks_diff(now_ms, self._page_at) < 0:
+            return
+        self._turn = (self._turn + 1) % len(self._rotation)
+        self._page_at = ticks_add(now_ms, self._page_ms)
+        self.show(self._rotation[self._turn])
+
+    def turn_in(self, now_ms):
+        # Milliseconds till the next page of the rotation, None if there is none.
+        if len(self._rotation) < 2:
+            return None
+        return max(ticks_diff(self._page_at, now_ms), 0)
+
+    @property
+    def scrolling(self):
+        # Something on the page scrolls, so scroll() has work to do.
+        for region in self.pages[self.page]:
+            if region.scrolls:
+                return True
+        return False
+
+    def scroll(self):
+        for region in self.pages[self.page]:
+            if region.scrolls:
+                region.scroll()
+
+    def draw(self):
+        # The regions that changed into the frame buffer; flush() is next.
+        fb = self.fb
+        glyphs = self.glyphs
+        regions = self.pages[self.page]
+        busy = 0 # the slots of what stays on the screen
+        for region in regions:
+            if not region.dirty:
+                busy |= region.mask
+        glyphs.busy = busy
+        for region in regions:
+            if region.dirty:
+                region.draw(glyphs)
+                fb.write_bytes(region.col, region.row, region.out, region.width)
@@ -0,0 +1,199 @@
+# /**
+#   ******************************************************************************
+#   * @file    lcd_displays.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Several LCDs showing the same clock.
+#   *
+#   *          Each Display has its own frame buffer, glyphs and pages; the
+#   *          clock sets their regions from one shared state. The manager
+#   *          sends the frames in turns, SLICE_OPS LCD operations of one
+#   *          display and then the next, so a slow display holds the others
+#   *          up by a slice at a time, not by its whole frame. A display that
+#   *          fails a write is left alone behind a circuit breaker and opened
+#   *          afresh (re-initialised and repainted) when the breaker lets it
+#   *          try again, so an unplugged one costs a failed write now and then.
+#   *
+#   ******************************************************************************
+#   */
+import compat
+from compat import asyncio
+from lcd_framebuf import LcdFrameBuffer
+from lcd_compositor import Compositor, GlyphCache
+from circuit_breaker import CircuitBreaker
+import event_log
+
+SLICE_OPS = 16 # LCD operations a display sends before the next one's turn
+RETRY_MS = 5000 # first wait before a failed display is opened again, doubles up to 8 times
+
+
+class Display:
+    def __init__(self, name, lcd, reopen=None, rows=2, cols=16, ticks_ms=compat.ticks_ms, events=None):
+        # events: an event_log.EventLog for the breaker, or None.
+        self.name = name # "i2c0:0x27": the bus and the address
+        self.lcd = lcd
+        self._reopen = reopen # returns the LCD initialised again, None if it can't be
+        self.fb = LcdFrameBuffer(lcd, cols, rows)
+        self.glyphs = GlyphCache(self.fb)
+        self.compositor = Compositor(self.fb, self.glyphs)
+        source = 0
+        if events is not None:
+            bus, addr = address(name)
+            source = event_log.LCD | bus << 8 | addr
+        self.breaker = CircuitBreaker("LCD " + name, 1, RETRY_MS, ticks_ms=ticks_ms, events=events, source=source)
+        self.lost = False # a write failed, the LCD is closed till the breaker allows a retry
+        self.backlight = True
+        self.errors = 0
+        self.reopens = 0
+        # What the clock shows on it, main.py keeps these.
+        self.pages = [] # the names of the pages taking turns
+        self.sensors = None # indices of the ha_values shown in the value field
+        self.sensor_regions = [] # (index in ha_values, Region) of the sensor pages
+        self.shown_index = -1
+        self.shown_update = -1
+        self.rotate_at = 0 # ticks_ms() of the next value in the field
+
+    def _failed(self):
+        self.lost = True
+        self.errors += 1
+        self.breaker.failure()
+
+    def call(self, method, *args):
+        # A driver call (backlight_on, hide_cursor...), unless the LCD is lost.
+        if self.lost:
+            return
+        try:
+            getattr(self.lcd, method)(*args)
+        except OSError:
+            self._failed()
+
+    def set_backlight(self, on):
+        self.backlight = on
+        self.call("backlight_on" if on else "backlight_off")
+
+    def preload(self, codes):
+        if self.lost:
+            return
+        try:
+            self.glyphs.preload(codes)
+        except OSError:
+            self._failed()
+
+    def clear(self):
+        # Blanks the frame and, unless it is lost, the LCD.
+        try:
+            self.fb.clear()
+        except OSError:
+            self._failed()
+
+    def _open(self):
+        lcd = self._reopen() if self._reopen is not None else None
+        if lcd is None:
+            raise OSError(19) # ENODEV
+        self.lcd = lcd
+        self.fb.lcd = lcd
+        self.fb.invalidate()
+        self.glyphs.forget()
+        if self.compositor.page is not None:
+            self.compositor.show(self.compositor.page)
+        self.lost = False
+        self.reopens += 1
+        if not self.backlight:
+            lcd.backlight_off()
+        lcd.hide_cursor()
+
+    def draw(self):
+        # The compositor's changes into the frame buffer; glyph loads write to the LCD.
+        if self.lost:
+            if not self.breaker.allow():
+                return
+            try:
+                self._open()
+            except OSError:
+                self.breaker.failure()
+                return
+        try:
+            self.compositor.draw()
+        except OSError:
+            self._failed()
+
+    def flush(self, budget=-1):
+        # True when there is more to send.
+        if self.lost:
+            return False
+        try:
+            self.fb.flush(budget)
+        except OSError:
+            self._failed()
+            return False
+        if not self.fb.pending and not self.breaker.closed:
+            self.breaker.success()
+        return self.fb.pending
+
+
+def address(name):
+    # "i2c1:0x26" -> (1, 0x26)
+    bus, addr = name.split(":")
+    return int(bus[3:]), int(addr, 16)
+
+
+class DisplayManager:
+    def __init__(self, displays, slice_ops=SLICE_OPS):
+        self.displays = displays
+        self.slice_ops = slice_ops
+        self.rounds = 0
+
+    def __len__(self):
+        return len(self.displays)
+
+    def call(self, method, *args):
+        for display in self.displays:
+            display.call(method, *args)
+
+    def set_backlight(self, on):
+        for display in self.displays:
+            display.set_backlight(on)
+
+    def draw(self):
+        for display in self.displays:
+            display.draw()
+
+    def flush_round(self):
+        # A slice of every display that has something to send. True when
+        # some have more.
+        more = False
+        for display in self.displays:
+            if display.flush(self.slice_ops):
+                more = True
+        self.rounds += 1
+        return more
+
+    def flush_now(self):
+        while self.flush_round():
+            pass
+
+    async def flush(self):
+        # The other tasks run between the rounds.
+        while self.flush_round():
+            await asyncio.sleep(0)
+
+    @property
+    def scrolling(self):
+        for display in self.displays:
+            if not display.lost and display.compositor.scrolling:
+                return True
+        return False
+
+    def scroll(self):
+        for display in self.displays:
+            if display.compositor.scrolling:
+                display.compositor.scroll()
+
+    @property
+    def ops_sent(self):
+        return sum(display.fb.ops_sent for display in self.displays)
+
+    @property
+    def bytes_sent(self):
+        return sum(display.fb.bytes_sent for display in self.displays)
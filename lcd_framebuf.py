@@ -0,0 +1,190 @@
+# /**
+#   ******************************************************************************
+#   * @file    lcd_framebuf.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Shadow frame buffer for the I2C LCD 1602 display.
+#   *
+#   *          The clock renders whole frames into the buffer and calls
+#   *          flush(), which diffs the frame against what is currently on the
+#   *          glass and only sends the changed runs of characters over I2C.
+#   *          flush() may also send a frame in slices of a few operations,
+#   *          so that several displays can take turns on the bus.
+#   *
+#   ******************************************************************************
+#   */
+
+# Cost model of the pico_i2c_lcd driver (4-bit mode through the PCF8574).
+# Every HD44780 byte - command or data - is sent as two nibbles, each one
+# clocked with E high and then E low, so one LCD operation is 4 I2C writes.
+LCD_TX_PER_OP = 4
+# Each I2C write is the address byte plus one PCF8574 byte.
+LCD_BYTES_PER_TX = 2
+# Gaps of up to this many unchanged cells are rewritten rather than skipped:
+# a cursor move costs one LCD operation, the same as rewriting one cell.
+FOLD_GAP = 1
+
+SPACE = 0x20
+
+
+class LcdFrameBuffer:
+    def __init__(self, lcd, cols=16, rows=2):
+        self.lcd = lcd
+        self.cols = cols
+        self.rows = rows
+        self._frame = bytearray(b" " * (cols * rows))
+        self._glass = bytearray(b" " * (cols * rows))
+        self._valid = 0 # the cells before this index are known to be on the glass
+        self._cursor = -1 # index on the glass the LCD address counter points to, -1 if unknown
+        self._naive_ops = 0 # what direct move_to()+putstr() calls would have cost
+        self.ops_sent = 0
+        self.ops_saved = 0
+        self.flushes = 0
+        self.pending = False # a flush() with a budget stopped before the end
+
+    # Drawing into the frame. Nothing goes over I2C until flush().
+    def write(self, col, row, text):
+        if row < 0 or row >= self.rows or col >= self.cols:
+            return
+        pos = row * self.cols + col
+        end = row * self.cols + self.cols
+        self._naive_ops += 1 + len(text)
+        for ch in text:
+            if pos >= end:
+                break
+            c = ch if isinstance(ch, int) else ord(ch)
+            if c != 0x0A: # newlines are ignored, rows are addressed explicitly
+                self._frame[pos] = c
+                pos += 1
+
+    def write_bytes(self, col, row, buf, length=-1):
+        # Same as write() but copies from a bytes-like object without decoding.
+        if row < 0 or row >= self.rows or col >= self.cols:
+            return
+        if length < 0:
+            length = len(buf)
+        length = min(length, self.cols - col)
+        pos = row * self.cols + col
+        self._naive_ops += 1 + length
+        frame = self._frame
+        for i in range(length): # no slicing, so nothing is allocated per call
+            frame[pos + i] = buf[i]
+
+    def fill(self, col, row, length, char=SPACE):
+        if row < 0 or row >= self.rows or col >= self.cols:
+            return
+        length = min(length, self.cols - col)
+        pos = row * self.cols + col
+        self._naive_ops += 1 + length
+        for i in range(pos, pos + length):
+            self._frame[i] = char
+
+    def get(self, col, row):
+        return self._frame[row * self.cols + col]
+
+    def clear(self):
+        # Blank both the frame and the glass with a single LCD clear command.
+        self.lcd.clear()
+        for i in range(len(self._frame)):
+            self._frame[i] = SPACE
+            self._glass[i] = SPACE
+        self._valid = len(self._glass)
+        self._cursor = 0
+        self.ops_sent += 1
+
+    def custom_char(self, slot, pattern):
+        # Loads a glyph into the CGRAM. The driver then moves the address
+        # counter back to its own idea of the cursor, not to ours.
+        self.lcd.custom_char(slot, pattern)
+        self._cursor = -1
+        self.ops_sent += 2 + len(pattern) # CGRAM address, the rows, the move back
+
+    def invalidate(self):
+        # Something else wrote to the LCD, so the next flush repaints every cell.
+        self._valid = 0
+        self._cursor = -1
+
+    def _move(self, pos):
+        if self._cursor != pos:
+            self.lcd.move_to(pos % self.cols, pos // self.cols)
+            self._cursor = pos
+            return 1
+        return 0
+
+    def flush(self, budget=-1):
+        # With a budget, stops at the first changed run once budget LCD
+        # operations are sent; pending is then True and the next flush()
+        # carries on from there.
+        frame = self._frame
+        glass = self._glass
+        cols = self.cols
+        lcd = self.lcd
+        valid = self._valid
+        sent = 0
+        stop = -1
+        for row in range(self.rows):
+            base = row * cols
+            col = 0
+            while col < cols:
+                if base + col < valid and frame[base + col] == glass[base + col]:
+                    col += 1
+                    continue
+                if 0 <= budget <= sent:
+                    stop = base + col
+                    break
+                # Grow the run over changed cells, folding short unchanged gaps.
+                end = col + 1
+                gap = 0
+                j = end
+                while j < cols:
+                    if base + j >= valid or frame[base + j] != glass[base + j]:
+                        end = j + 1
+                        gap = 0
+                    else:
+                        gap += 1
+                        if gap > FOLD_GAP:
+                            break
+                    j += 1
+                sent += self._move(base + col)
+                for i in range(base + col, base + end):
+                    lcd.hal_write_data(frame[i])
+                    glass[i] = frame[i]
+                sent += end - col
+                # The HD44780 auto-increments the address; past the last column
+                # it points off screen, which never matches a visible cell.
+                self._cursor = base + end if end < cols else -1
+                col = end
+            if stop >= 0:
+                break
+        self.ops_sent += sent
+        self.ops_saved += self._naive_ops - sent
+        self._naive_ops = 0
+        self.pending = stop >= 0
+        if self.pending:
+            self._valid = max(valid, stop)
+        else:
+            self._valid = len(glass)
+            self.flushes += 1
+        return sent
+
+    @property
+    def tx_sent(self):
+        return self.ops_sent * LCD_TX_PER_OP
+
+    @property
+    def tx_saved(self):
+        return self.ops_saved * LCD_TX_PER_OP
+
+    @property
+    def bytes_sent(self):
+        return self.tx_sent * LCD_BYTES_PER_TX
+
+    @property
+    def bytes_saved(self):
+        return self.tx_saved * LCD_BYTES_PER_TX
+
+    def reset_stats(self):
+        self.ops_sent = 0
+        self.ops_saved = 0
+        self.flushes = 0
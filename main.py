@@ -8,41 +8,58 @@
 #   *
 #   ******************************************************************************
 #   */
-from machine import I2C, Pin
+from lcd_compositor import Region, RIGHT, DEGREES, WIFI, NOWIFI, STALE
+from lcd_displays import Display, DisplayManager, address
 
-from pico_i2c_lcd import I2cLcd
-i2c = I2C(0, sda=Pin(0), scl=Pin(1), freq=400000)
-
-I2C_ADDR = i2c.scan()[0]
-lcd = I2cLcd(i2c, I2C_ADDR, 2, 16)
-
-import network
-from network import WLAN
-import secrets
 import time
+import gc
 
-import struct
-import usocket
+import socket
 
-import urequests
+from compat import ticks_ms, ticks_us, ticks_diff, ticks_add, asleep_ms
+from compat import asyncio as uasyncio # uasyncio on the Pico, asyncio on the host
+import hal
+import async_http
+import ntp_client
+from ntp_server import NtpServer
+from json_stream import JsonPathExtractor
+from ha_sensors import HaSensors, HaValues, unit_suffix, FIELD_WIDTH
+from ha_push import HaPush, entity_of
 
-import uasyncio
+# config.py and secrets.py, or config_compiled.py from tools/config_compiler.py
+from settings import WIFI_SSID, WIFI_PASSWORD
+from settings import HA_TOKEN
+from settings import ntp_host
+from settings import wifi_reconnect_time, wifi_wait_time_per_attempt, wifi_wait_time_step, wifi_reconnect_attempts_per_attempt, wifi_backoff_max_sec
+from settings import sync_weather, ha_api_url_temperature, ha_api_temperature_json_path, temperature_sync_time_sec, temperature_units
+from settings import ha_sensors, ha_sensor_rotate_sec
+from settings import ha_push, ha_push_ping_sec, ha_push_backoff_max_sec
+from settings import wifi_ip_config
+from settings import power_save, power_radio_off_min_sec, backlight_night
+from settings import ntp_srv_timeout
+from settings import ha_srv_timeout
+from settings import is_metric, show_seconds, use_24h_clock, disable_ampm
+from settings import display_page_sec, display_scroll_ms, lcd_i2c1, lcd_layout
+from settings import ha_failure_threshold, ha_breaker_cooldown_sec
+from settings import ntp_target_ms, ntp_min_interval_sec
+from settings import ntp_failure_threshold, ntp_breaker_cooldown_sec
+from settings import metrics_port, ntp_server_port
+from settings import event_log_size, event_log_flash
+from settings import resync_ntp, resync_ntp_frequency_sec, daylight_time_savings, time_shift_minutes, dst_rule
+from settings import ha_headers, ha_temperature_path, ha_template_body, wifi_ip
 
-from secrets import WIFI_SSID, WIFI_PASSWORD
-from secrets import HA_TOKEN
-from config import ntp_host
-from config import max_wait_wifi_attempt_sec, wifi_reconnect_time, wifi_wait_time_per_attempt, wifi_wait_time_step, wifi_reconnect_attempts_per_attempt
-from config import sync_weather, ha_api_url_temperature, ha_api_temperature_json_path, temperature_sync_time_sec, temperature_units
-from config import wifi_ip_config
-from config import ntp_srv_timeout
-from config import ha_srv_timeout
-from config import cycle_time_ms, cycle_time_ms_no_sec
-from config import is_metric, show_seconds, use_24h_clock, disable_ampm
-from config import reconnect_on_ha_gone
-from config import resync_ntp, resync_ntp_frequency_sec, reconnect_on_ntp_gone, daylight_time_savings, time_shift_minutes
+from clock_render import ClockRenderer
+from tick_scheduler import TickScheduler
+from tz_rules import TzEngine
+from clock_discipline import ClockDiscipline
+from state_store import StateStore
+import wifi_supervisor
+from circuit_breaker import CircuitBreaker
+from power import PowerManager, RADIO_OFF, RADIO_ON, RADIO_SAVE
+from metrics import Registry
+import event_log
 
 
-NTP_DELTA = 3155673600 if time.gmtime(0)[0] == 2000 else 2208988800
 tm_year = 0
 tm_mon = 1 # range [1, 12]
 tm_mday = 2 # range [1, 31]
@@ -53,161 +70,228 @@ tm_wday = 6 # range 8[0, 6] Monday = 0
 tm_yday = 7 # range [0, 366]
 tm_isdst = 8 # 0, 1 or -1 
 
-ha_headers = {
-    "Authorization": "Bearer "+HA_TOKEN,
-}
+TURN_EARLY_MS = 50 # a page or value turn due this soon is done now, with the tick just before it
+
+# Diagnostics go to the event log: no formatting, no waiting for the serial
+# console. It is printed on exit (Ctrl-C) and served at /log.
+events = event_log.EventLog(event_log_size)
+ha_client = async_http.HttpClient(ha_api_url_temperature) # keeps the TLS connection between polls
+ha_temperature_json = JsonPathExtractor(ha_temperature_path) if ha_temperature_path is not None else None
+if ha_sensors:
+    ha_batch = HaSensors(ha_sensors, ha_headers, ha_template_body) # all the sensors in one request
+    ha_values = ha_batch.cache
+else:
+    ha_batch = None
+    ha_values = HaValues([unit_suffix(temperature_units)]) # just the temperature from ha_api_url_temperature
+ha_push_client = None
+if sync_weather and ha_push:
+    if ha_batch is None and ha_temperature_json is not None and entity_of(ha_api_url_temperature):
+        ha_push_client = HaPush(ha_api_url_temperature, HA_TOKEN, entity_of(ha_api_url_temperature), ha_temperature_path,
+                                ping_ms=1000*ha_push_ping_sec, backoff_max_ms=1000*ha_push_backoff_max_sec, events=events)
+    else:
+        events.log(event_log.HA_PUSH_UNSUPPORTED)
 
 time_was_synced = False
 time_was_synced_at_least_once = False
+rtc_restored = False # the RTC runs from the saved time, till the first NTP sync
+ntp_last = None # the sample the RTC was last set from
+rtc_setting = False # set_rtc_at_boundary() is waiting for its second
 last_temp_set = False
 last_temp_value = None
+network_down = None # uasyncio.Event set by on_wifi() when the link drops
 wlan_power_config = None
-wlan_already_tried_perf_mode = False
-#wlan_power_config = network.WLAN.PM_POWERSAVE
+renderer = ClockRenderer(is_metric, show_seconds, use_24h_clock, disable_ampm, sync_weather)
+# The board and what runs on it are brought up by setup().
+board = None
+network = None # the board's network module
+displays = None # DisplayManager, all the LCDs found
+lcd = None # the first LCD, its frame buffer and pages
+fb = None
+compositor = None
+scroll_wake = None # uasyncio.Event, set when there is text to scroll
+values_wake = None # uasyncio.Event, set when HA pushed a value: shown before the next tick
+power = None
+scheduler = None
+wifi_link = None
+tz = TzEngine(60*time_shift_minutes, dst_rule)
+store = StateStore(events=events) # last good time, drift, readings... for a warm start
+discipline = ClockDiscipline(ntp_target_ms, ntp_min_interval_sec, resync_ntp_frequency_sec, store)
+face_up = False # the clock face is on the LCD, status messages go to the console only
+network_ok = False # shown by the glyph in the top right corner
+wifi_state = None # the last state the supervisor reported
+ha_next_at = None # time.time() of the next HA poll, for the radio-off windows
+# A dead server only makes its values stale, the network stays as it is.
+ha_breaker = CircuitBreaker("HA", ha_failure_threshold, 1000*ha_breaker_cooldown_sec, events=events, source=event_log.HA)
+ntp_breaker = CircuitBreaker("NTP", ntp_failure_threshold, 1000*ntp_breaker_cooldown_sec, events=events, source=event_log.NTP)
+# The time served to the other clocks with ntp_server_port. Not rtc_ms(): without the
+# fraction of the second (right after the RTC was set) the time is not served as synced.
+time_server = NtpServer(lambda: scheduler.now_ms(), ntp_server_port)
+
+# Runtime metrics, served at http://<clock>:<metrics_port>/metrics. The
+# counters only ever grow: Prometheus' rate() makes them per second.
+registry = Registry()
+m_tick = registry.histogram("clock_tick_seconds", "Work of one display tick", (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25))
+m_overruns = registry.counter("clock_tick_overruns_total", "Display ticks that came a whole period late, a second was never shown")
+m_mem_free = registry.gauge("clock_mem_free_low_bytes", "Lowest gc.mem_free() after a tick", value=None)
+mem_free = getattr(gc, "mem_free", None) # MicroPython only
+m_ntp_offset = registry.gauge("clock_ntp_offset_ms", "How far the RTC was behind NTP at the last sync", value=None)
+m_ntp_delay = registry.gauge("clock_ntp_delay_ms", "Round trip of the last NTP sync", value=None)
+m_ha_fetch = registry.histogram("clock_ha_fetch_seconds", "HA fetch duration, failures included", (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20))
+registry.counter("clock_i2c_writes_total", "LCD commands and data bytes sent, all the displays", lambda: displays.ops_sent)
+registry.counter("clock_i2c_bytes_total", "Bytes sent to the LCDs over I2C", lambda: displays.bytes_sent)
+registry.gauge("clock_lcds", "LCDs found at boot", lambda: len(displays))
+registry.counter("clock_lcd_errors_total", "Failed LCD writes", lambda: sum(d.errors for d in displays.displays))
+registry.gauge("clock_tick_late_max_ms", "Latest a display tick woke after its second", lambda: scheduler.late_max_ms)
+registry.counter("clock_ntp_syncs_total", "Successful NTP syncs", lambda: ntp_breaker.successes)
+registry.counter("clock_ntp_failures_total", "Failed NTP syncs", lambda: ntp_breaker.failures)
+registry.counter("clock_ntp_breaker_opens_total", "NTP breaker opened, syncs paused for the cool-down", lambda: ntp_breaker.opens)
+registry.counter("clock_ntp_breaker_half_opens_total", "NTP breaker let a trial sync through", lambda: ntp_breaker.half_opens)
+registry.counter("clock_ntp_breaker_closes_total", "NTP breaker closed by a good trial sync", lambda: ntp_breaker.closes)
+registry.counter("clock_ntp_breaker_rejected_total", "NTP syncs skipped while the breaker was open", lambda: ntp_breaker.rejected)
+registry.counter("clock_ntp_served_total", "SNTP requests answered with ntp_server_port", lambda: time_server.answers)
+registry.gauge("clock_ntp_served_stratum", "Stratum served, 0 while not synced", lambda: time_server.stratum)
+registry.gauge("clock_rtc_drift_ppm", "Learned RTC drift", lambda: discipline.drift_ppm)
+registry.counter("clock_ha_fetches_total", "Successful HA fetches", lambda: ha_breaker.successes)
+registry.counter("clock_ha_failures_total", "Failed HA fetches", lambda: ha_breaker.failures)
+registry.counter("clock_ha_breaker_opens_total", "HA breaker opened, fetches paused for the cool-down", lambda: ha_breaker.opens)
+registry.counter("clock_ha_breaker_half_opens_total", "HA breaker let a trial fetch through", lambda: ha_breaker.half_opens)
+registry.counter("clock_ha_breaker_closes_total", "HA breaker closed by a good trial fetch", lambda: ha_breaker.closes)
+registry.counter("clock_ha_breaker_rejected_total", "HA fetches skipped while the breaker was open", lambda: ha_breaker.rejected)
+registry.gauge("clock_wifi_up", "1 while the WiFi link is up", lambda: 1 if wifi_link.up.is_set() else 0)
+registry.counter("clock_wifi_connects_total", "WiFi connect attempts", lambda: wifi_link.connects)
+registry.counter("clock_wifi_drops_total", "WiFi links lost", lambda: wifi_link.drops)
+registry.counter("clock_wifi_resets_total", "WiFi radio resets", lambda: wifi_link.resets)
+registry.routes[b"/log"] = events.text
+registry.routes[b"/power"] = lambda: power.text()
+registry.counter("clock_power_mah_total", "Estimated charge used since boot, see /power", lambda: power.ledger()[1])
+registry.counter("clock_events_total", "Events logged", lambda: events.logged)
+registry.counter("clock_events_flush_failures_total", "Event log writes to flash that failed", lambda: events.flush_failures)
 
 def local_tz_time(is_utf=False, use_daylight_time_savings=True, time_shift_sec=0):
-    year = time.localtime()[0]       #get current year
-    HHMarch   = time.mktime((year,3 ,(31-(int(5*year/4+4))%7),1,0,0,0,0,0)) #Time of March change
-    HHOctober = time.mktime((year,10,(31-(int(5*year/4+1))%7),1,0,0,0,0,0)) #Time of October change
     now=time.time()
-    offset_base = time_shift_sec
-    local_tz_tm = 0
     if is_utf or (not daylight_time_savings):
-        local_tz_tm = time.localtime(now+offset_base)
-    elif (now <= HHMarch) or (now >= HHOctober):            # we are before last sunday of march or after last sunday of october
-        local_tz_tm = time.localtime(now+offset_base)
-    elif (now < HHOctober) and (now > HHMarch):              # we are between last sunday of march and last sunday of october
-        local_tz_tm = time.localtime(now+offset_base+3600)
-    else:                                                   # everything else falls here (shouldn't be though)
-        local_tz_tm = time.localtime(now+offset_base)
-    return(local_tz_tm)
+        return time.localtime(now+time_shift_sec)
+    return time.localtime(now+time_shift_sec+tz.dst_offset(now)) # transitions are cached per year
+
+def rtc_ms():
+    # RTC time with the fraction of the second the display scheduler learned.
+    now = scheduler.now_ms()
+    return ntp_client.local_ms() if now is None else now
+
+def set_rtc(t):
+    board.set_rtc(t)
+
+async def set_rtc_at_boundary(sample):
+    # set_at_boundary() with no lightsleep meanwhile: the display task would
+    # block the loop past the second it waits for.
+    global rtc_setting
+    rtc_setting = True
+    try:
+        return await ntp_client.set_at_boundary(sample, set_rtc)
+    finally:
+        rtc_setting = False
 
 async def q_set_time():
-    NTP_QUERY = bytearray(48)
-    NTP_QUERY[0] = 0x1B
-    time_is_set = False
-    ntp_port = 123
-    server_default_port = 50000
-    print("Attempt to set time.\n")
+    global time_was_synced, rtc_restored
     # Defaulting to ipv4 if no params set.
     if 'ipv6' not in wifi_ip_config:
         wifi_ip_config['ipv6'] = 0
     if 'ipv4' not in wifi_ip_config:
         wifi_ip_config['ipv4'] = 1
-    for host in ntp_host:
-        print("Trying with NTP host: "+host)
-        try:
-            if ((wifi_ip_config['ipv6'] != 1) and (wifi_ip_config['ipv4'] == 1)):
-                print("IPv4 only mode")
-                s = usocket.socket(usocket.AF_INET, usocket.SOCK_DGRAM) # UDP only
-                s.bind(('0.0.0.0', server_default_port))
-            elif ((wifi_ip_config['ipv6'] == 1) and (wifi_ip_config['ipv4'] == 0)):
-                print("IPv6 only mode")
-                s = usocket.socket(usocket.AF_INET6, usocket.SOCK_DGRAM) # UDP only
-                s.bind(('::', server_default_port))
-            elif ((wifi_ip_config['ipv6'] == 1) and (wifi_ip_config['ipv4'] == 1)):
-                print("IPv6 and IPv4 mode")
-                s = usocket.socket(usocket.AF_INET, usocket.SOCK_DGRAM) # UDP only
-                s.bind(('', server_default_port))
-            s.settimeout(ntp_srv_timeout)
-            conn_successful = False
-            try:
-                addr = usocket.getaddrinfo(host, ntp_port)[0][-1]
-                conn_successful = True
-            except OSError as exc:
-                print("Error with socket - cannot convert domain name and port to a 5-tuple sequence. Host was: \""+str(host)+"\", port was: \""+str(ntp_port)+"\".")
-                if(exc.errno == -2):
-                    print("Current error code is \"-2\" which might indicate network issues - e.g. this IP is already assigned to a different device, subnet issues etc.")
-                time_is_set = False
-                s.close()
-                print("Checking WiFi status...")
-                wifi_status = wlan.status()
-                if(wifi_status == network.STAT_IDLE):
-                    print("no connection and no activity")
-                elif(wifi_status == network.STAT_CONNECTING):
-                    print("connecting is STILL in progress")
-                elif(wifi_status == network.STAT_WRONG_PASSWORD):
-                    print("failed due to incorrect password")
-                elif(wifi_status == network.STAT_NO_AP_FOUND):
-                    print("failed because no access point replied")
-                elif(wifi_status == network.STAT_CONNECT_FAIL):
-                    print("failed due to other problems (some unknown ones)")
-                elif(wifi_status == network.STAT_GOT_IP):
-                    print("connection successful - actually we've got an IP, so no issues seem to be here.")
-                elif(wifi_status == 2):
-                    print("failed due to being unable to get IP address for some reason. Wifi connected though. DHCP problems?")
-                else:
-                    print("connection unsuccessful - without any reason specified. Code: {}".format(wifi_status))
-            if(conn_successful):
-                try:
-                    res = s.sendto(NTP_QUERY, addr)
-                    msg = s.recv(48)
-                finally:
-                    s.close()
-                val = struct.unpack("!I", msg[40:44])[0]
-                t = val - NTP_DELTA    
-                tm = time.gmtime(t)
-                machine.RTC().datetime((tm[0], tm[1], tm[2], tm[6] + 1, tm[3], tm[4], tm[5], 0))
-                time_is_set = True
-            else:
-                print("Cannot get time from host \""+str(host)+"\".\n")
-                time_is_set = False
-        except OSError as exc:
-            print("Could not get time from NTP host.")
-            if exc.args[0] == 110: # ETIMEDOUT
-                print("ETIMEDOUT for the host \""+str(host)+"\". Damn.\n")
-                time_is_set = False
-        if time_is_set:
-            break
-    if time_is_set:
-        print("UTC time after synchronization：%s" %str(time.localtime()))
-        t = local_tz_time(True, daylight_time_savings)
-        t_utf = local_tz_time(True, daylight_time_savings)
-        print("Local timezone time after synchronization : %s" %str(t))
-        machine.RTC().datetime((t_utf[tm_year], t_utf[tm_mon], t_utf[tm_mday], t_utf[tm_wday] + 1, t_utf[tm_hour], t_utf[tm_min], t_utf[tm_sec], 0))
-        print("Local time after synchronization：%s" %str(time.localtime()))
-        print("NTP sync successful.");
-        global time_was_synced
-        time_was_synced = True
-        return True
+    if ((wifi_ip_config['ipv6'] == 1) and (wifi_ip_config['ipv4'] == 0)):
+        family = socket.AF_INET6
     else:
-        print("Could not sync time...")
+        family = socket.AF_INET
+    # All the hosts are asked at once, the wait ends soon after the first answer.
+    precise = scheduler.now_ms() is not None # else the offset is only good to a second
+    # The last one that worked goes first. query_all() keeps to the timeout
+    # itself; wait_for() is the backstop, with a second for the DNS lookups.
+    try:
+        best, samples = await uasyncio.wait_for(ntp_client.query_all(ntp_host, 1000*ntp_srv_timeout, rtc_ms, family=family, first=store.get("ntp"), events=events), ntp_srv_timeout + 1)
+    except uasyncio.TimeoutError:
+        events.log(event_log.NTP_TIMEOUT)
+        time_was_synced = False
+        return False
+    if best is None:
+        events.log(event_log.NTP_FAILED, wlan.status())
         time_was_synced = False
         return False
+    global ntp_last
+    ntp_last = best
+    m_ntp_offset.set(best.offset_ms)
+    m_ntp_delay.set(best.delay_ms)
+    events.log(event_log.NTP_SYNCED, ntp_host.index(best.host) if best.host in ntp_host else -1, best.offset_ms, best.delay_ms)
+    # The RTC only takes whole seconds, so it is set right on a second of the
+    # server clock - outside the query's timeout, the sample is good already.
+    t, late_ms = await set_rtc_at_boundary(best)
+    scheduler.resync()
+    discipline.synced(t, best.offset_ms if precise else None)
+    time_server.synced(best, 1000*t, discipline.uncertainty_ppm)
+    store.set("ntp", best.host)
+    store.flush()
+    events.log(event_log.RTC_SET, late_ms, int(100*discipline.drift_ppm), discipline.interval_s)
+    time_was_synced = True
+    rtc_restored = False
+    return True
 
 
 async def q_try_set_time():
-    t = uasyncio.create_task(q_set_time())
-    await uasyncio.sleep(0)
-    #print("Waiting "+str(ntp_srv_timeout+1)+" seconds for NTP.")
-    uasyncio.wait_for(t,ntp_srv_timeout * len(ntp_host))
-    #await uasyncio.sleep(ntp_srv_timeout+1)
-    print("Done.")
-    global time_was_synced
+    await q_set_time()
+    if time_was_synced:
+        ntp_breaker.success()
+    else:
+        ntp_breaker.failure()
     return time_was_synced
 
-def req_attention():
+async def req_attention():
     for i in range(5):
-        lcd.backlight_off()
-        time.sleep(0.2)
-        lcd.backlight_on()
-        time.sleep(0.4)
+        displays.set_backlight(False)
+        await uasyncio.sleep(0.2)
+        displays.set_backlight(True)
+        await uasyncio.sleep(0.4)
+    if not power.backlight: # it is night
+        displays.set_backlight(False)
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def remember_ha_values():
+    store.set("ha", [ha_values.values, int(time.time())])
+
+def on_pushed_temperature(value):
+    if is_number(value):
+        ha_values.set(0, value)
+        remember_ha_values()
+        ha_breaker.success()
+        if values_wake is not None:
+            values_wake.set()
 
 async def get_current_temperature_async(t_url, hrds, t_json_path):
+    # t_json_path is precompiled into ha_temperature_json; the response is
+    # parsed while it arrives and only up to the wanted value.
     global last_temp_set
     global last_temp_value
+    extractor = ha_temperature_json
+    local_temp = None
+    if extractor is None:
+        last_temp_set = False
+        events.log(event_log.HA_BAD_PATH)
+        return None
+    extractor.reset()
     try:
-        response = urequests.request("GET", t_url, headers=hrds)
-    except:
-        response = None
-    try:
-        local_temp = eval("response.json()"+t_json_path,{"__builtins__" : None },{'response': response})
+        status, headers, body = await ha_client.request("GET", t_url, hrds, sink=extractor.feed)
+        # An error page (401, 404, 5xx...) is no sensor JSON, whatever was in it.
+        if status == 200 and extractor.found:
+            local_temp = extractor.value
+    except (OSError, EOFError, ValueError): # ValueError: the body is no JSON
+        pass
+    if is_number(local_temp):
         last_temp_set = True
         last_temp_value = local_temp
-    except (SyntaxError, ValueError, AttributeError, NameError, TypeError, ZeroDivisionError):
+    else:
         local_temp = None
         last_temp_set = False
-        print("Incorrect data in temperature json path. Please fix the config")
+        events.log(event_log.HA_FAILED)
     return local_temp
 
 async def get_current_temperature(t_url, hrds, t_json_path):
@@ -215,355 +299,459 @@ async def get_current_temperature(t_url, hrds, t_json_path):
     global last_temp_value
     last_temp_set = False
     last_temp_value = None
-    t = uasyncio.create_task(get_current_temperature_async(t_url, hrds, t_json_path))
-    await uasyncio.sleep(0)
-    #print("Waiting "+str(ha_srv_timeout+1)+" seconds for HA.")
-    uasyncio.wait_for(t,ha_srv_timeout)
-    #time.sleep(ha_srv_timeout+1)
-    print("Done.")
+    try:
+        await uasyncio.wait_for(get_current_temperature_async(t_url, hrds, t_json_path), ha_srv_timeout)
+    except uasyncio.TimeoutError:
+        events.log(event_log.HA_TIMEOUT)
+        last_temp_set = False
+        last_temp_value = None
     return last_temp_value
 
-lcd.blink_cursor_on()
-lcd.backlight_on()
-lcd.clear()
-degrees = bytes([0x7, 0x5, 0x7, 0x0, 0x0, 0x0, 0x0, 0x0])
-lcd.custom_char(0, degrees)
-wifi = (0b00000,0b01110,0b10001,0b00100,0b01010,0b00000,0b00100,0b00000)
-lcd.custom_char(1, wifi)
-nowifi =  (0b00001,0b01110,0b10011,0b00100,0b01110,0b01000,0b10100,0b00000)
-lcd.custom_char(2, nowifi)
-max_wait_wifi_sec = max_wait_wifi_attempt_sec * wifi_reconnect_attempts_per_attempt
+async def sync_ha_values():
+    # Refreshes ha_values. Returns False when HA could not be reached.
+    start = ticks_ms()
+    ok = await fetch_ha_values()
+    m_ha_fetch.observe(ticks_diff(ticks_ms(), start) / 1000)
+    return ok
+
+async def fetch_ha_values():
+    if ha_batch:
+        try:
+            if not await uasyncio.wait_for(ha_batch.fetch(ha_client), ha_srv_timeout):
+                ha_breaker.failure()
+                return False
+        except (OSError, EOFError, ValueError, uasyncio.TimeoutError):
+            events.log(event_log.HA_FAILED)
+            ha_breaker.failure()
+            return False
+    else:
+        temperature = await get_current_temperature(ha_api_url_temperature, ha_headers, ha_api_temperature_json_path)
+        if temperature == None:
+            ha_breaker.failure()
+            return False
+        ha_values.set(0, temperature)
+    first = ha_values.values[0]
+    events.log(event_log.HA_SYNCED, len(ha_values), int(100*first) if is_number(first) else 0)
+    remember_ha_values()
+    ha_breaker.success()
+    return True
 
 wlan = None
 
-while True:
-    wifi_connected = False
-    lcd.blink_cursor_on()
-    lcd.show_cursor()
-    lcd.move_to(0,0)
-    lcd.clear()
-    lcd.move_to(0,0)
-    if(wifi_ip_config['mode'] == 'static'):
-        lcd.putstr("Please use DHCP due to a MP bug.") # There seem to be a bug in MicroPython, connected to static IP.
-        req_attention()
-    lcd.clear()
-    lcd.move_to(0,0)
-    lcd.putstr("Connecting to Wifi.")
-    # Connect to wifi firstly
-    ap = network.WLAN(network.AP_IF)
-    ap.active(False)
-    time.sleep_us(100)
-    wlan = network.WLAN(network.STA_IF)
-    wlan.active(True)
-    time.sleep_us(100)
-    #wlan.config(wlan_power_config)
-    lcd.clear()
-    lcd.move_to(0,0)
-    lcd.putstr("Connecting to Wifi..")
-    if(wifi_ip_config['mode'] == 'static'):
-        print("Static IP config (pre-init).")
-        time.sleep_us(100)
-        wlan.ifconfig((wifi_ip_config['params']['ip'],wifi_ip_config['params']['mask'],wifi_ip_config['params']['gateway'],wifi_ip_config['params']['dns']))
-    wlan.disconnect()
-    time.sleep_us(100)
-    wlan.active(False)
-    time.sleep(1)
-    wlan.active(True)
-    time.sleep(1)
-    lcd.clear()
-    lcd.move_to(0,0)
-    lcd.putstr("Connecting to Wifi...")
-    wlan.connect(WIFI_SSID, WIFI_PASSWORD)
-    if(wifi_ip_config['mode'] == 'static'):
-        print("Static IP config.")
-        wlan.ifconfig((wifi_ip_config['params']['ip'],wifi_ip_config['params']['mask'],wifi_ip_config['params']['gateway'],wifi_ip_config['params']['dns']))
+def setup(hw):
+    # Brings up the board: hal.PicoBoard() on the Pico, or the simulated
+    # one from bench/hal_sim.py on the host. Called once, before main().
+    global board, network, displays, lcd, fb, compositor, power, scheduler, wifi_link, wlan_power_config
+    board = hw
+    network = hw.network
+    displays = DisplayManager([Display(name, device, reopen, 2, 16, events=events) for name, device, reopen in hw.lcds(2, 16)])
+    for d in displays.displays:
+        events.log(event_log.LCD_FOUND, *address(d.name))
+        d.call("blink_cursor_on")
+        d.call("clear")
+        d.preload((DEGREES, WIFI, NOWIFI, STALE)) # the rest is loaded when shown
+        layout(d)
+    if displays.displays:
+        lcd, fb, compositor = displays.displays[0].lcd, displays.displays[0].fb, displays.displays[0].compositor
+    if power_save:
+        wlan_power_config = getattr(network.WLAN, "PM_POWERSAVE", None) # older firmware has no power-save setting
+    # Lightsleeps only in the low-power mode, and only while the radio is off.
+    power = PowerManager(backlight_night, power_radio_off_min_sec, hw.lightsleep if power_save else None, i2c_bytes=lambda: displays.bytes_sent)
+    scheduler = TickScheduler(1 if renderer.show_seconds else 60, sleep_ms=power.sleep_ms)
+    wifi_link = wifi_supervisor.WifiSupervisor(network, WIFI_SSID, WIFI_PASSWORD, wifi_ip, connect_timeout_ms=1000*wifi_wait_time_per_attempt,
+                                               poll_ms=1000*wifi_wait_time_step, backoff_min_ms=1000*wifi_reconnect_time,
+                                               backoff_max_ms=1000*wifi_backoff_max_sec, reset_after=wifi_reconnect_attempts_per_attempt)
+
+def layout(d):
+    # The pages of display d: boot messages, the clock face and, with
+    # display_page_sec, its ha_sensors values. lcd_layout picks the values.
+    conf = lcd_layout.get(d.name, {})
+    d.sensors = [i for i in conf.get('sensors', range(len(ha_values))) if i < len(ha_values)]
+    c = d.compositor
+    c.add_page("status", [Region("status0", 0, 0, 16), Region("status1", 0, 1, 16)])
+    face = [Region("date", 0, 0, renderer.date_len), Region("stale", 14, 0, 1), Region("wifi", 15, 0, 1),
+            Region("time", 0, 1, renderer.time_len)]
+    if sync_weather and d.sensors:
+        face.append(Region("value", 16-FIELD_WIDTH, 1, FIELD_WIDTH, RIGHT))
+    c.add_page("clock", face)
+    d.pages = ["clock"]
+    d.sensor_regions = [] # (index in ha_values, Region)
+    if display_page_sec and conf.get('pages', 1) and sync_weather and ha_batch:
+        regions = []
+        for n in range(len(d.sensors)):
+            i = d.sensors[n]
+            row = n % 2
+            label = Region("label%d" % i, 0, row, 15-FIELD_WIDTH)
+            label.set(ha_sensors[i].get('label') or ha_sensors[i]['entity'].split(".")[-1])
+            value = Region("sensor%d" % i, 16-FIELD_WIDTH, row, FIELD_WIDTH, RIGHT)
+            d.sensor_regions.append((i, value))
+            regions += [label, value]
+            if row == 1 or n == len(d.sensors) - 1:
+                d.pages.append("sensors%d" % (n // 2))
+                c.add_page(d.pages[-1], regions)
+                regions = []
+    c.show("status")
+
+def redraw():
+    # The regions that changed to the LCDs, and the scrolling going if it must.
+    displays.draw()
+    displays.flush_now()
+    if scroll_wake is not None and displays.scrolling:
+        scroll_wake.set()
+
+def show_status(text):
+    # Boot and network messages, until the clock face is up; then the event
+    # log has what happens to the network.
+    if not face_up:
+        lines = text.split("\n")
+        for d in displays.displays:
+            c = d.compositor
+            if c.page != "status":
+                c.show("status")
+            c.set("status0", lines[0])
+            c.set("status1", lines[1] if len(lines) > 1 else "")
+        redraw()
+
+def warm_start():
+    # Brings the clock face up right away from the RTC and the saved state,
+    # while the network comes up in the background. False on the very first boot.
+    global rtc_restored
+    saved = store.get("time")
+    if saved is None:
+        return False
+    if time.time() < saved:
+        # The RTC was reset: the saved time is a better guess until NTP answers.
+        set_rtc(saved)
+        rtc_restored = True
+        events.log(event_log.RTC_RESTORED)
+    cached = store.get("ha")
+    if sync_weather and cached and len(cached[0]) == len(ha_values) and time.time() - cached[1] < max(2*temperature_sync_time_sec, 3600):
+        for i in range(len(ha_values)):
+            ha_values.set(i, cached[0][i])
+    events.log(event_log.WARM_START, saved)
+    return True
+
+def log_connection():
+    ip, mask, gateway, dns = wlan.ifconfig()
+    events.log(event_log.WIFI_UP, event_log.ip_number(ip), event_log.ip_number(gateway))
+    store.set("lease", [ip, mask, gateway, dns]) # for reference: static IP is not reliable, see above
+
+def wifi_failed():
+    events.log(event_log.WIFI_FAILED, wifi_link.status)
+
+def on_wifi(state):
+    # Called by the supervisor on every change of the link state.
+    global network_ok, wifi_state
+    was_up = wifi_state == wifi_supervisor.UP
+    wifi_state = state
+    events.log(event_log.WIFI_STATE, event_log.WIFI_STATES.index(state))
+    network_ok = state in (wifi_supervisor.UP, wifi_supervisor.OFF) # off on purpose is no fault
+    if state == wifi_supervisor.OFF:
+        power.set_radio(RADIO_OFF)
+        return
+    if state == wifi_supervisor.UP:
+        power.set_radio(RADIO_ON)
+        if wlan_power_config is not None:
+            try:
+                wlan.config(pm=wlan_power_config)
+                power.set_radio(RADIO_SAVE)
+            except (OSError, ValueError, TypeError):
+                events.log(event_log.WLAN_NO_POWER_SAVE)
+        show_status("Wifi connection:\nSuccess\n")
+        return
+    power.set_radio(RADIO_ON)
+    if was_up and network_down is not None:
+        network_down.set() # the link dropped: the network tasks stop until it is back
+    if state == wifi_supervisor.CONNECTING:
+        show_status("Connecting to Wifi...")
+    elif state == wifi_supervisor.RESET:
+        show_status("Wifi reset...")
+    elif state == wifi_supervisor.BACKOFF:
+        wifi_failed()
+        show_status("Wifi connection:\nFail. Retry: "+str(wifi_link.backoff.ms//1000)+"s")
+
+async def initial_sync():
+    # First NTP sync and temperature fetch after the WiFi came up.
+    global time_was_synced_at_least_once
+    if wlan.status() != 3:
+        show_status("WiFi error.\nReconnect in "+str(wifi_reconnect_time)+"s")
+        return False
+    #sync time
+    show_status("Syncing time...\n")
+    if await q_try_set_time():
+        show_status("Synced.\n")
+        time_was_synced_at_least_once = True
     else:
-        print("DHCP config.")
-        time.sleep_us(100)
-        try:
-            wlan.ifconfig("dhcp")
-        except OSError:
-            lcd.clear()
-            lcd.move_to(0,0)
-            lcd.putstr("DHCP issues.")
-            time.sleep_us(100)
-            continue
-    lcd.clear()
-    lcd.move_to(0,0)
-    lcd.putstr("Connecting to Wifi....")
-    temp_sec_cntr_chk = time.time()
-    temp_sec_cntr_chk_init = temp_sec_cntr_chk
-    ntp_sec_cntr_chk = time.time()
-    wifi_indicator_status_i = False
-    init_str_l = max(len(str(wifi_wait_time_per_attempt * wifi_reconnect_attempts_per_attempt)),1)
-    curr_str_l = init_str_l
-    attempt = 0
-    while(attempt < wifi_reconnect_attempts_per_attempt):
-        while(((temp_sec_cntr_chk - temp_sec_cntr_chk_init) < wifi_wait_time_per_attempt) and (not wifi_indicator_status_i)):
-            time_left = (wifi_wait_time_per_attempt*(wifi_reconnect_attempts_per_attempt-attempt))-(temp_sec_cntr_chk - temp_sec_cntr_chk_init)
-            curr_str_l = max(len(str(time_left)),1)
-            if(curr_str_l < init_str_l):
-                lcd.move_to(16-init_str_l,1)
-                lcd.putstr(" "*init_str_l)
-                init_str_l -= 1
-            lcd.move_to(16-curr_str_l,1)
-            lcd.putstr(str(time_left))
-            time.sleep(wifi_wait_time_step)
-            temp_sec_cntr_chk = time.time()
-            wifi_indicator_status_i = wlan.isconnected()
-        wifi_connected_status = wlan.status()
-        if(wifi_indicator_status_i):
-            break
-        if(wifi_connected_status != network.STAT_CONNECTING):
-            break
-        attempt+=1
-        temp_sec_cntr_chk_init = temp_sec_cntr_chk
-    lcd.clear()
-    lcd.move_to(0,0)
-    lcd.putstr("Wifi connection:\n")
-    wifi_connected = wifi_indicator_status_i or wlan.isconnected()
-    lcd.putstr(("Success\n" if wifi_connected else "Fail\n"))
-    if wifi_connected:
-        if not wlan.isconnected():
-            print("Wlan suddenly disconnected! That's a problem.")
-            lcd.clear()
-            lcd.move_to(0,0)
-            lcd.putstr("WiFi disconnected. Restarting...\n")
-            continue
-        else:
-            print("Connection parameters: ")
-            print("general: ")
-            for p in wlan.ifconfig():
-                print(p)
-            print("IPv4: ")
-            for p in wlan.ipconfig('addr4'):
-                print(p)
-            print("IPv6: ")
-            for p in wlan.ipconfig('addr6'):
-                print(p)
-            print("=======================")
-        time_sync_progress = True
-        lcd.clear()
-        
-        lcd.putstr("NTP sync...\n")
-        # Let's sync with NTP server
-        while max_wait_wifi_sec > 0:
-            if wlan.status() < 0 or wlan.status() >= 3:
-                break
-            max_wait_wifi_sec -= 1
-            #print('Waiting for connection...')
-            time.sleep(1)
-        if wlan.status() != 3:
-            lcd.clear()
-            lcd.putstr("WiFi error.\n")
-            lcd.putstr("Reconnect in "+str(wifi_reconnect_time)+"s")
-            
-            #wlan.active(False)
-            #time.sleep(wifi_reconnect_time)
-            #continue
-            time_sync_progress = False
+        show_status("Time sync error!\n")
+        if not face_up:
+            await req_attention()
+            return False
+        # The face runs from the RTC meanwhile, ntp_task tries again.
+    if not face_up:
+        displays.call("blink_cursor_off")
+        displays.call("hide_cursor")
+    if sync_weather:
+        # Get weather data
+        show_status("Syncing temperature...\n")
+        ha_synced = await sync_ha_values()
+        if not ha_synced:
+            show_status("Error getting temperature.\n")
+            if not face_up:
+                await req_attention()
         else:
-            #sync time
-            lcd.clear()
-            lcd.putstr("Syncing time...\n")
-            try:
-                uasyncio.run(q_try_set_time())
-                time_set_status = time_was_synced
-                if time_set_status:
-                    lcd.clear()
-                    lcd.putstr("Synced.\n")
-                    time_was_synced_at_least_once = True
-                    ntp_sec_cntr = time.time()
-                else:
-                    raise Exception("Time sync error!")
-            except Exception as e:
-                print("NTP sync exception!")
-                print("Error message: "+str(e))
-                print("Maybe NTP server unavailable?")
-                print("Error was: ", e)
-                lcd.clear()
-                lcd.putstr("Time sync error!\n")
-                req_attention()
-                time_sync_progress = False
-                break
-        if(time_sync_progress):
-            lcd.blink_cursor_off()
-            lcd.hide_cursor()
-            last_date = ""
+            show_status("Synced.\n")
+    else:
+        show_status("Synced.\n")
+    # EOF getting weather data
+    return True
+
+def show_values(d, now):
+    # The value field of display d, its sensors in turns, and its sensor pages.
+    sensors = d.sensors
+    if not sensors:
+        return
+    if len(sensors) > 1 and ticks_diff(now, d.rotate_at) >= 0:
+        # several sensors share the field, show them in turns
+        d.shown_index = (d.shown_index + 1) % len(sensors)
+        d.rotate_at = ticks_add(now, 1000*ha_sensor_rotate_sec)
+        d.shown_update = -1
+    elif d.shown_index < 0:
+        d.shown_index = 0
+    if(d.shown_update != ha_values.updated):
+        d.shown_update = ha_values.updated
+        # output current value
+        d.compositor.set("value", ha_values.text(sensors[d.shown_index]))
+        for i, region in d.sensor_regions:
+            region.set(ha_values.text(i))
+
+def turn_in_ms(now):
+    # Milliseconds till the next page or value turn of any display, None if
+    # there is none: the display task wakes for it, also between its ticks.
+    due = None
+    for d in displays.displays:
+        ms = d.compositor.turn_in(now)
+        if sync_weather and d.sensors and len(d.sensors) > 1:
+            value_ms = max(ticks_diff(d.rotate_at, now), 0)
+            ms = value_ms if ms is None else min(ms, value_ms)
+        if ms is not None and (due is None or ms < due):
+            due = ms
+    return due
+
+async def display_task():
+    for d in displays.displays:
+        d.clear()
+        d.compositor.rotate(d.pages, 1000*display_page_sec, ticks_ms())
+        d.rotate_at = ticks_ms()
+    renderer.invalidate()
+    shown_s = None
+    while True:
+        start = ticks_us()
+        values_wake.clear() # what was pushed so far is drawn now
+        t = local_tz_time(False, daylight_time_savings, 60*time_shift_minutes)
+        #show date and time, the same on every display
+        date_changed = renderer.render_date(t)
+        renderer.render_time(t)
+        wifi_glyph = "\x01" if network_ok else "\x02"
+        # An upstream is failing, or the time is only the saved one: the values (or the time) may be old.
+        stale_glyph = "\x03" if ha_breaker.failed or not ntp_breaker.closed or rtc_restored else " "
+        now = ticks_add(ticks_ms(), TURN_EARLY_MS)
+        for d in displays.displays:
+            c = d.compositor
+            if date_changed:
+                c.set("date", renderer.date_line, renderer.date_len)
+            c.set("time", renderer.time_line, renderer.time_len)
+            c.set("wifi", wifi_glyph)
+            c.set("stale", stale_glyph)
             if sync_weather:
-                # Get weather data
-                lcd.clear()
-                lcd.putstr("Syncing temperature...\n")
-                temp_sec_cntr = time.time()
-                old_current_temperature = None
-                uasyncio.run(get_current_temperature(ha_api_url_temperature, ha_headers, ha_api_temperature_json_path))
-                current_temperature = last_temp_value if last_temp_set else None
-                print("Current temperature received: ", current_temperature)
-                if current_temperature == None:
-                    lcd.clear()
-                    lcd.putstr("Error getting temperature.\n")
-                    req_attention()
-                    lcd.clear()
-                else:
-                    lcd.clear()
-                    lcd.putstr("Synced.\n")
-            else:
-                lcd.clear()
-                lcd.putstr("Synced.\n")
-            # EOF getting weather data
-            lcd.move_to(15,0)
-            lcd.putstr("\x01")
-            wifi_down = False
-            do_redraw_screen = False
-            while True:
-                t = local_tz_time(False, daylight_time_savings, 60*time_shift_minutes)
-                temp_sec_cntr_chk = time.time()
-                ntp_sec_cntr_chk = temp_sec_cntr_chk # reuse for optimization
-                #sync NTP
-                if resync_ntp and (ntp_sec_cntr_chk - ntp_sec_cntr >= resync_ntp_frequency_sec):
-                    lcd.clear()
-                    lcd.putstr("Resyncing time...\n")
-                    try:
-                        uasyncio.run(q_try_set_time())
-                        time_set_status = time_was_synced
-                        if time_set_status:
-                            #lcd.clear()
-                            #lcd.putstr("Synced.\n")
-                            time_was_synced_at_least_once = True
-                            ntp_sec_cntr = time.time()
-                        elif reconnect_on_ntp_gone:
-                            raise Exception("Time sync error!")
-                    except Exception as e:
-                        print("NTP resync exception!")
-                        print("Error message: "+str(e))
-                        print("Maybe NTP server unavailable?")
-                        print("Error was: ", e)
-                        lcd.clear()
-                        lcd.putstr("Time sync error!\n")
-                        req_attention()
-                        time_sync_progress = False
-                    ntp_sec_cntr = ntp_sec_cntr_chk # it already has current timestamp
-                    lcd.clear()
-                    lcd.move_to(0,0)
-                    do_redraw_screen = True
-                if sync_weather:
-                    #show temperature
-                    if(temp_sec_cntr_chk - temp_sec_cntr >= temperature_sync_time_sec):
-                        uasyncio.run(get_current_temperature(ha_api_url_temperature, ha_headers, ha_api_temperature_json_path))
-                        current_temperature = last_temp_value if last_temp_set else None
-                        #print("Current temperature received: ", current_temperature)
-                        temp_sec_cntr = temp_sec_cntr_chk # it already has current timestamp
-                        do_redraw_screen = True
-                #show date and time
-                #t[tm_year], t[tm_mon], t[tm_mday], t[tm_wday] + 1, t[tm_hour], t[tm_min], t[tm_sec]
-                #lcd.clear()
-                wday = ""
-                if(t[tm_wday] == 0):
-                    wday = "Mo"
-                elif(t[tm_wday] == 1):
-                    wday = "Tu"
-                elif(t[tm_wday] == 2):
-                    wday = "We"
-                elif(t[tm_wday] == 3):
-                    wday = "Th"
-                elif(t[tm_wday] == 4):
-                    wday = "Fr"
-                elif(t[tm_wday] == 5):
-                    wday = "Sa"
-                elif(t[tm_wday] == 6):
-                    wday = "Su"
-                if is_metric:
-                    new_date = ""+str((("0"+str(t[tm_mday])) if (t[tm_mday]<10) else str(t[tm_mday])))+"/"+str((("0"+str(t[tm_mon])) if (t[tm_mon]<10) else str(t[tm_mon])))+"/"+str(t[tm_year])+"  "+wday+"\n"
-                else:
-                    new_date = ""+str((("0"+str(t[tm_mon])) if (t[tm_mon]<10) else str(t[tm_mon])))+"/"+str((("0"+str(t[tm_mday])) if (t[tm_mday]<10) else str(t[tm_mday])))+"/"+str(t[tm_year])+"  "+wday+"\n"
-                if (new_date != last_date) or do_redraw_screen:
-                    do_redraw_screen = False
-                    lcd.move_to(0,0)
-                    lcd.putstr(new_date)
-                    last_date = new_date
-                lcd.move_to(0,1)
-                if use_24h_clock:
-                    lcd.putstr(""+str((("0"+str(t[tm_hour])) if (t[tm_hour]<10) else str(t[tm_hour])))+":"+str((("0"+str(t[tm_min])) if (t[tm_min]<10) else str(t[tm_min])))+ ((":"+str((("0"+str(t[tm_sec])) if (t[tm_sec]<10) else str(t[tm_sec]))) ) if show_seconds else "") )
-                else:
-                    t_tm_hour = t[tm_hour] % 13 # 0 .. 12
-                    lcd.putstr(""+str((("0"+str(t_tm_hour)) if (t_tm_hour<10) else str(t_tm_hour)))+":"+str((("0"+str(t[tm_min])) if (t[tm_min]<10) else str(t[tm_min]))) + ((":"+str((("0"+str(t[tm_sec])) if (t[tm_sec]<10) else str(t[tm_sec]))) ) if ((show_seconds and not sync_weather) or disable_ampm) else "")  + ((" " + ( "AM" if t_tm_hour < t[tm_hour] else "PM")) if not disable_ampm else "") )
-                if sync_weather:
-                    if(old_current_temperature != current_temperature):
-                        old_current_temperature = current_temperature
-                        # output current temperature
-                        lcd.move_to(9,1)
-                        lcd.putstr("       ")
-                        lcd.move_to(9,1)
-                        if (current_temperature != None):
-                            if(current_temperature <= -10) or (current_temperature >= 100):
-                                lcd.move_to(9,1)
-                            elif (current_temperature >= 0) and (current_temperature < 10):
-                                lcd.move_to(11,1)
-                            else:
-                                lcd.move_to(10,1)
-                            lcd.putstr("" + (f'{current_temperature:.0f}' if ((current_temperature <=-1000) or (current_temperature>=10)) else f'{current_temperature:.1f}')+"\x00"+("C" if (temperature_units == "celsius") else ("K" if (temperature_units == "kelvin") else ("F" if (temperature_units == "farenheit") else "" ))))
-                        else:
-                            lcd.putstr("       ")
-                    if current_temperature == None:
-                        if reconnect_on_ha_gone:
-                            wifi_down = True
-                            break
-                        else:
-                            current_temperature = old_current_temperature
-                time.sleep((cycle_time_ms if show_seconds else cycle_time_ms_no_sec)/1000)
-        else:
-            pass
-    lcd.move_to(0,0)
-    lcd.clear()
-    lcd.move_to(0,0)
-    lcd.putstr("Wifi off.")
-    lcd.move_to(0,1)
-    lcd.putstr("Reconn. in:")
-    lcd.move_to(16-len(str(wifi_reconnect_time)),1)
-    lcd.putstr(str(wifi_reconnect_time))
-    if (not wifi_connected):
-        print("Could not connect to WiFi. WiFi status: ")
-        wifi_status = wlan.status()
-        if(wifi_status == network.STAT_IDLE):
-            print("no connection and no activity")
-        elif(wifi_status == network.STAT_CONNECTING):
-            print("connecting was STILL in progress")
-        elif(wifi_status == network.STAT_WRONG_PASSWORD):
-            print("failed due to incorrect password")
-        elif(wifi_status == network.STAT_NO_AP_FOUND):
-            print("failed because no access point replied")
-        elif(wifi_status == network.STAT_CONNECT_FAIL):
-            print("failed due to other problems (some unknown ones)")
-        elif(wifi_status == network.STAT_GOT_IP):
-            print("connection successful - actually we've got an IP.")
-        elif(wifi_status == 2):
-            print("failed due to being unable to get IP address for some reason. Wifi connected though. DHCP problems?")
+                show_values(d, now)
+            c.turn(now)
+        backlight = power.backlight_due(t)
+        if backlight != power.backlight:
+            displays.set_backlight(backlight)
+            power.set_backlight(backlight)
+        # A slice of each display in turns, the other tasks run in between.
+        displays.draw()
+        await displays.flush()
+        if displays.scrolling:
+            scroll_wake.set()
+        m_tick.observe(ticks_diff(ticks_us(), start) / 1000000)
+        if mem_free is not None:
+            m_mem_free.low(mem_free())
+        limit_ms = turn_in_ms(ticks_ms())
+        if power.can_lightsleep() and not displays.scrolling and not rtc_setting:
+            # Blocks in lightsleep till the next tick; the other tasks
+            # only wait for timers meanwhile and catch up right after.
+            s = scheduler.wait(limit_ms)
+            await uasyncio.sleep(0)
         else:
-            print("connection unsuccessful - without any reason specified. Code: {}".format(wifi_status))
-        #if(wlan_power_config != WLAN.PM_PERFORMANCE):
-        #    print("Let's try to switch WiFi to performance mode. Maybe that will help?")
-        #    wlan_power_config = WLAN.PM_PERFORMANCE
-        #    wlan_already_tried_perf_mode = False
-        #else:
-        #    if(not wlan_already_tried_perf_mode):
-        #        print("Well, the WiFi performance mode didn't help.")
-        #        wlan_already_tried_perf_mode = True
-    lcd.move_to(15,0)
-    lcd.putstr("\x02")
-    #wait till next WiFi connect iteration
-    wlan.active(False)
-    init_str_l = max(len(str(wifi_reconnect_time)),1)
-    curr_str_l = init_str_l
-    for i in range(wifi_reconnect_time):
-        time_left = max(wifi_reconnect_time-i,0)
-        curr_str_l = max(len(str(time_left)),1)
-        if(curr_str_l < init_str_l):
-            lcd.move_to(16-init_str_l,1)
-            lcd.putstr(" "*init_str_l)
-            init_str_l -= 1
-        lcd.move_to(16-curr_str_l,1)
-        lcd.putstr(str(time_left))
-        time.sleep(1)
-if(wlan):
-    wlan.disconnect()
-    wlan.active(False)
+            s = await scheduler.wait_async(limit_ms, values_wake)
+        if s is None:
+            continue # a turn or a pushed value before the tick
+        if shown_s is not None and scheduler.last_s - shown_s > scheduler.period_s:
+            m_overruns.inc()
+        shown_s = scheduler.last_s
+
+async def correct_drift():
+    # Takes the predicted drift off the RTC, on a second boundary like a sync.
+    ms = discipline.due_correction(time.time())
+    now = scheduler.now_ms()
+    if ms == 0 or now is None: # without the fraction of the second it would do more harm than good
+        return
+    model = ntp_client.NtpSample("drift model", 0, -ms, 0, ticks_ms(), now)
+    t, late_ms = await set_rtc_at_boundary(model)
+    scheduler.resync()
+    discipline.corrected(t, ms)
+
+async def ntp_task():
+    global time_was_synced_at_least_once
+    while True:
+        await uasyncio.sleep(60) # also the retry after a failed sync
+        await correct_drift()
+        if not resync_ntp or discipline.next_sync_in(time.time()) > 0 or not ntp_breaker.allow():
+            continue
+        if not await network_ready():
+            continue
+        if await q_try_set_time():
+            time_was_synced_at_least_once = True
+
+async def temperature_task():
+    global ha_next_at
+    while True:
+        # After a failure, retry in a minute until the breaker opens.
+        delay = 60 if ha_breaker.failed else temperature_sync_time_sec
+        ha_next_at = time.time() + delay
+        await uasyncio.sleep(delay)
+        if ha_push_client is not None and ha_push_client.subscribed:
+            continue # HA pushes the changes, nothing to poll
+        if not ha_breaker.allow():
+            continue # the last values stay, marked as stale
+        if await network_ready():
+            await sync_ha_values()
+
+async def network_ready():
+    # The low-power mode may have the radio off: switch it on and wait for the link.
+    if wifi_link.paused:
+        wifi_link.resume()
+    try:
+        await uasyncio.wait_for(wifi_link.up.wait(), wifi_wait_time_per_attempt)
+    except uasyncio.TimeoutError:
+        return False
+    return True
+
+async def radio_task():
+    # Low-power mode: the radio is off between the scheduled fetches.
+    while True:
+        await uasyncio.sleep(10)
+        if not wifi_link.up.is_set():
+            continue # still joining
+        now = time.time()
+        needs = []
+        if resync_ntp:
+            needs.append(now + discipline.next_sync_in(now))
+        if sync_weather and ha_next_at is not None:
+            needs.append(ha_next_at)
+        off_s = power.radio_off_for(now, min(needs) if needs else None)
+        if off_s:
+            wifi_link.pause()
+            await uasyncio.sleep(off_s)
+            wifi_link.resume()
+
+async def ha_push_task():
+    # Falls back to the polling in temperature_task whenever it isn't subscribed.
+    await ha_push_client.run(on_pushed_temperature, sync_ha_values)
+
+async def state_task():
+    # The store itself keeps the flash writes rare, this only gives it the chance.
+    minutes = 0
+    while True:
+        await uasyncio.sleep(60)
+        power.advance() # the ledger's intervals stay short of the ticks_ms wrap
+        store.flush()
+        if event_log_flash:
+            events.flush()
+        minutes += 1
+        if power_save and minutes % 60 == 0:
+            power.report(events)
+
+async def scroll_task():
+    # Moves the text too long for its region, between the display ticks.
+    while True:
+        await scroll_wake.wait()
+        scroll_wake.clear()
+        while displays.scrolling:
+            await asleep_ms(display_scroll_ms)
+            displays.scroll()
+            displays.draw()
+            await displays.flush()
+
+def start_face():
+    displays.call("blink_cursor_off")
+    displays.call("hide_cursor")
+    return [uasyncio.create_task(display_task()), uasyncio.create_task(state_task())]
+
+async def main():
+    global network_down, face_up, wlan, scroll_wake, values_wake
+    scroll_wake = uasyncio.Event()
+    values_wake = uasyncio.Event()
+    uasyncio.create_task(scroll_task())
+    face_tasks = None
+    if warm_start():
+        # The clock runs from the RTC while the network comes up.
+        face_up = True
+        face_tasks = start_face()
+    elif(wifi_ip_config['mode'] == 'static'):
+        show_status("Please use DHCP due to a MP bug.") # There seem to be a bug in MicroPython, connected to static IP.
+        await req_attention()
+    if metrics_port:
+        try:
+            await registry.serve(metrics_port)
+        except OSError:
+            events.log(event_log.METRICS_PORT_BUSY, metrics_port)
+    if ntp_server_port:
+        try:
+            time_server.open()
+            uasyncio.create_task(time_server.serve())
+        except OSError:
+            events.log(event_log.NTP_PORT_BUSY, ntp_server_port)
+    wifi_link.radio_on()
+    wlan = wifi_link.wlan
+    # The supervisor keeps the link up in the background, the clock face keeps running meanwhile.
+    uasyncio.create_task(wifi_link.run(on_wifi))
+    while True:
+        await wifi_link.up.wait()
+        log_connection()
+        network_down = uasyncio.Event() # set by on_wifi(), also should the link drop during the sync
+        if await initial_sync():
+            store.flush()
+            if face_tasks is None:
+                face_up = True
+                face_tasks = start_face()
+            tasks = [uasyncio.create_task(ntp_task())]
+            if sync_weather:
+                tasks.append(uasyncio.create_task(temperature_task()))
+                if ha_push_client is not None and not ha_push_client.auth_failed:
+                    tasks.append(uasyncio.create_task(ha_push_task()))
+            if power_save and ha_push_client is None and not ntp_server_port:
+                tasks.append(uasyncio.create_task(radio_task())) # push and the NTP server need the radio on
+            await network_down.wait()
+            for task in tasks: # the clock face keeps running
+                task.cancel()
+            await ha_client.close()
+        elif wifi_link.up.is_set():
+            # No time to show yet, although the link looks fine: make it again after a pause.
+            show_status("No time yet.\nReconn. in "+str(wifi_reconnect_time)+"s")
+            await uasyncio.sleep(wifi_reconnect_time)
+            wifi_link.reconnect()
+
+if __name__ == "__main__":
+    setup(hal.PicoBoard(i2c1=lcd_i2c1))
+    try:
+        uasyncio.run(main())
+    finally:
+        events.dump()
+        if event_log_flash:
+            events.flush(force=True)
+        store.flush(force=True)
+        if(wlan):
+            wlan.disconnect()
+            wlan.active(False)
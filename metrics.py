@@ -0,0 +1,154 @@
+# /**
+#   ******************************************************************************
+#   * @file    metrics.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Runtime metrics in the Prometheus text format.
+#   *
+#   *          Counters, gauges and fixed-bucket histograms, registered once
+#   *          and updated with a few integer or float operations, so they can
+#   *          stay on in the hot paths. A metric may also take a function
+#   *          instead: it is called at scrape time, for numbers some object
+#   *          already counts. serve() answers GET /metrics on a port, and
+#   *          any other text added to routes. A client gets REQUEST_TIMEOUT_S
+#   *          to send its request, so a stuck one doesn't keep its socket.
+#   *
+#   ******************************************************************************
+#   */
+from compat import asyncio
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+REQUEST_TIMEOUT_S = 5 # to send the request line and the headers
+
+
+class Metric:
+    def __init__(self, name, doc, kind, fn=None):
+        self.name = name
+        self.doc = doc
+        self.kind = kind
+        self.value = 0
+        self._fn = fn
+
+    def inc(self, n=1):
+        self.value += n
+
+    def set(self, value):
+        self.value = value
+
+    def low(self, value):
+        # Keeps the lowest value seen: a low-water mark.
+        if self.value is None or value < self.value:
+            self.value = value
+
+    def lines(self):
+        value = self._fn() if self._fn is not None else self.value
+        if value is None:
+            return []
+        return ["%s %s" % (self.name, fmt(value))]
+
+
+class Histogram(Metric):
+    def __init__(self, name, doc, buckets):
+        Metric.__init__(self, name, doc, HISTOGRAM)
+        self.buckets = buckets # upper bounds, ascending
+        self.counts = [0] * (len(buckets) + 1) # the last one is +Inf
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        buckets = self.buckets
+        i = 0
+        n = len(buckets)
+        while i < n and value > buckets[i]:
+            i += 1
+        self.counts[i] += 1
+
+    def lines(self):
+        out = []
+        total = 0
+        for i in range(len(self.buckets)):
+            total += self.counts[i]
+            out.append('%s_bucket{le="%s"} %d' % (self.name, fmt(self.buckets[i]), total))
+        out.append('%s_bucket{le="+Inf"} %d' % (self.name, self.count))
+        out.append("%s_sum %s" % (self.name, fmt(self.sum)))
+        out.append("%s_count %d" % (self.name, self.count))
+        return out
+
+
+def fmt(value):
+    if isinstance(value, float):
+        return "%.6g" % value
+    return str(int(value))
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.routes = {b"/metrics": self.render} # path: function returning the text to serve
+        self.requests = 0
+        self.timeouts = 0 # connections closed before a whole request came
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, doc, fn=None):
+        return self._add(Metric(name, doc, COUNTER, fn))
+
+    def gauge(self, name, doc, fn=None, value=0):
+        metric = Metric(name, doc, GAUGE, fn)
+        metric.value = value
+        return self._add(metric)
+
+    def histogram(self, name, doc, buckets):
+        return self._add(Histogram(name, doc, buckets))
+
+    def render(self):
+        out = []
+        for metric in self.metrics:
+            lines = metric.lines()
+            if lines:
+                out.append("# HELP %s %s" % (metric.name, metric.doc))
+                out.append("# TYPE %s %s" % (metric.name, metric.kind))
+                out.extend(lines)
+        out.append("")
+        return "\n".join(out)
+
+    async def _read_request(self, reader):
+        # The request line; the headers are not needed.
+        line = await reader.readline()
+        while True:
+            header = await reader.readline()
+            if header in (b"\r\n", b"\n", b""):
+                return line
+
+    async def _handle(self, reader, writer):
+        try:
+            try:
+                line = await asyncio.wait_for(self._read_request(reader), REQUEST_TIMEOUT_S)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                return
+            parts = line.split()
+            fn = self.routes.get(parts[1].split(b"?")[0]) if len(parts) >= 2 and parts[0] == b"GET" else None
+            if fn is not None:
+                self.requests += 1
+                body = fn().encode()
+                writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n")
+                writer.write(body)
+            else:
+                writer.write(b"HTTP/1.0 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+            await writer.drain()
+        except OSError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, port, host="0.0.0.0"):
+        # One short connection per scrape.
+        return await asyncio.start_server(self._handle, host, port)
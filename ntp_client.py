@@ -0,0 +1,236 @@
+# /**
+#   ******************************************************************************
+#   * @file    ntp_client.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Concurrent SNTP queries with best-sample selection.
+#   *
+#   *          One query goes to every configured host at once over
+#   *          non-blocking sockets (any free local port), and a task per
+#   *          socket sleeps in the event loop's poller till its answer is in.
+#   *          Each answer gives a sample with the clock offset and the
+#   *          round-trip delay computed from the four NTP timestamps; the
+#   *          lowest-delay sample wins. The wait ends shortly after the
+#   *          first sample is in - a few of its round trips, for a better
+#   *          one to come - so a dead host costs nothing as long as another
+#   *          one answers.
+#   *
+#   *          Timestamps are read with their fractional part, and the
+#   *          result is applied on a whole second of the server clock, so
+#   *          the RTC - which only takes whole seconds - starts its second
+#   *          in step with the server instead of up to a second late.
+#   *
+#   ******************************************************************************
+#   */
+import errno
+import random
+import socket
+import struct
+import time
+
+import compat
+import event_log
+from compat import asyncio
+
+NTP_PORT = 123
+# Seconds between 1900 and the epoch of the port (1970, or 2000 on some MicroPython ports).
+NTP_DELTA = 3155673600 if time.gmtime(0)[0] == 2000 else 2208988800
+GRACE_RTTS = 2 # after the first sample, how many of its round trips a better one may take
+GRACE_MIN_MS = 20 # the least that is, for samples from next door
+SPIN_MS = 20 # the last stretch before a second boundary is busy-waited, for accuracy
+MAX_MISSES = 5 # seconds missed by a late wake before the RTC is set late rather than not at all
+
+
+def local_ms():
+    # Local time in ms since the epoch. time.time() has whole seconds on the device.
+    return int(time.time() * 1000)
+
+
+def parse_host(host):
+    # "pool.ntp.org" or "127.0.0.1:10123" -> (host, port)
+    if host.count(":") == 1:
+        host, port = host.split(":")
+        return host, int(port)
+    return host, NTP_PORT
+
+
+class NtpSample:
+    def __init__(self, host, stratum, offset_ms, delay_ms, ticks, local_ms, addr=None):
+        self.host = host
+        self.addr = addr # the server's socket address
+        self.stratum = stratum
+        self.offset_ms = offset_ms # how far the local clock is behind the server
+        self.delay_ms = delay_ms # round trip, without the server's processing time
+        self.ticks = ticks # ticks_ms() when the answer arrived
+        self.local_ms = local_ms # the local clock reading at that moment
+
+    def time_ms(self):
+        # Server time (ms since the epoch) at self.ticks.
+        return self.local_ms + self.offset_ms
+
+    def __repr__(self):
+        return "NtpSample(%s, stratum %d, offset %d ms, delay %d ms)" % (self.host, self.stratum, self.offset_ms, self.delay_ms)
+
+
+def ntp_to_unix(sec):
+    # NTP seconds wrap in 2036; a clear top bit means the next era (RFC 4330).
+    if sec < 0x80000000:
+        sec += 1 << 32
+    return sec - NTP_DELTA
+
+
+def parse_answer(msg, transmit, base_s):
+    # Returns (stratum, t2, t3) in ms relative to base_s, or None for an unusable answer.
+    if len(msg) < 48:
+        return None
+    leap = msg[0] >> 6
+    mode = msg[0] & 7
+    stratum = msg[1]
+    if mode != 4 or leap == 3 or not 0 < stratum < 16:
+        return None # not a server answer, or an unsynchronised / kiss-o'-death one
+    if msg[24:32] != transmit:
+        return None # not the answer to our query
+    r_s, r_f, t_s, t_f = struct.unpack("!IIII", msg[32:48])
+    if t_s == 0:
+        return None
+    t2 = (ntp_to_unix(r_s) - base_s) * 1000 + (r_f * 1000 >> 32)
+    t3 = (ntp_to_unix(t_s) - base_s) * 1000 + (t_f * 1000 >> 32)
+    return stratum, t2, t3
+
+
+class _Query:
+    def __init__(self, index, host, sock, addr):
+        self.index = index # in the hosts given to query_all()
+        self.host = host
+        self.sock = sock
+        self.addr = addr
+        self.transmit = None
+        self.ticks = 0 # ticks_ms() at send
+        self.local_ms = 0 # the local clock at send
+        self.done = False # answered, or no answer will come
+
+
+async def _answer(q, samples, events, answered):
+    # Waits for the answer to q and adds its sample to samples; sets answered
+    # once done, with a sample or not.
+    try:
+        while True:
+            await compat.wait_readable(q.sock)
+            try:
+                msg = q.sock.recv(48)
+            except OSError as exc:
+                if exc.args[0] == errno.EAGAIN:
+                    continue
+                # e.g. port unreachable: no answer will come
+                if events is not None:
+                    events.log(event_log.NTP_HOST_FAILED, q.index, event_log.error_code(exc))
+                return
+            now = compat.ticks_ms()
+            base_s = q.local_ms // 1000
+            answer = parse_answer(msg, q.transmit, base_s)
+            if answer is None:
+                continue # keep waiting, a proper answer may still come
+            stratum, t2, t3 = answer
+            t1 = q.local_ms - base_s * 1000
+            t4 = t1 + compat.ticks_diff(now, q.ticks)
+            samples.append(NtpSample(q.host, stratum, ((t2 - t1) + (t3 - t4)) // 2, (t4 - t1) - (t3 - t2), now, q.local_ms + t4 - t1, q.addr))
+            return
+    finally:
+        q.done = True
+        answered.set()
+
+
+async def query_all(hosts, timeout_ms, clock=local_ms, family=socket.AF_INET, grace_rtts=GRACE_RTTS, first=None, events=None):
+    # Queries all hosts concurrently; returns (best sample or None, all samples).
+    # The wait ends grace_rtts round trips of the first sample after it came,
+    # or after timeout_ms. The host first (e.g. the last one that worked) is
+    # asked first. The hosts that fail are logged to events (an
+    # event_log.EventLog) by their index.
+    queries = []
+    samples = []
+    try:
+        for index, host in enumerate(hosts):
+            name, port = parse_host(host)
+            try:
+                addr = socket.getaddrinfo(name, port, family)[0][-1]
+                sock = socket.socket(family, socket.SOCK_DGRAM)
+            except OSError as exc:
+                if events is not None:
+                    events.log(event_log.NTP_UNRESOLVED, index, event_log.error_code(exc))
+                continue
+            queries.insert(0 if host == first else len(queries), _Query(index, host, sock, addr))
+        for q in queries:
+            q.sock.setblocking(False)
+            q.local_ms = clock()
+            q.ticks = compat.ticks_ms()
+            # Our transmit timestamp comes back as the originate one; random
+            # low bits make a forged or stale answer unlikely to match.
+            q.transmit = struct.pack("!II", (q.local_ms // 1000 + NTP_DELTA) & 0xFFFFFFFF, ((q.local_ms % 1000) << 32) // 1000 ^ random.getrandbits(16))
+            msg = bytearray(48)
+            msg[0] = 0x23 # LI 0, version 4, client
+            msg[40:48] = q.transmit
+            try:
+                q.sock.sendto(msg, q.addr)
+            except OSError as exc:
+                if events is not None:
+                    events.log(event_log.NTP_SEND_FAILED, q.index, event_log.error_code(exc))
+        answered = asyncio.Event()
+        tasks = [asyncio.create_task(_answer(q, samples, events, answered)) for q in queries]
+        start = compat.ticks_ms()
+        graced = False
+        try:
+            while not all(q.done for q in queries):
+                if samples and not graced:
+                    # The first sample is in; a better one has a few of its round trips.
+                    graced = True
+                    sample = samples[0]
+                    timeout_ms = min(timeout_ms, compat.ticks_diff(sample.ticks, start) + max(GRACE_MIN_MS, grace_rtts * sample.delay_ms))
+                left_ms = timeout_ms - compat.ticks_diff(compat.ticks_ms(), start)
+                if left_ms <= 0:
+                    break
+                answered.clear()
+                try:
+                    await asyncio.wait_for(answered.wait(), left_ms / 1000)
+                except asyncio.TimeoutError:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Out of the event loop's poller before their sockets are closed.
+            await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        for q in queries:
+            q.sock.close()
+    return best_sample(samples), samples
+
+
+def best_sample(samples):
+    # The lowest round trip bounds the offset error best; ties go to the lower stratum.
+    best = None
+    for s in samples:
+        if best is None or (s.delay_ms, s.stratum) < (best.delay_ms, best.stratum):
+            best = s
+    return best
+
+
+async def set_at_boundary(sample, set_time):
+    # Waits for the next whole second of the server clock and calls
+    # set_time(unix_seconds) right on it. Returns (seconds set, ms late).
+    for _ in range(MAX_MISSES):
+        now_ms = sample.time_ms() + compat.ticks_diff(compat.ticks_ms(), sample.ticks)
+        target_s = now_ms // 1000 + 1
+        due = compat.ticks_add(compat.ticks_ms(), target_s * 1000 - now_ms)
+        ahead = compat.ticks_diff(due, compat.ticks_ms())
+        if ahead <= SPIN_MS:
+            break
+        await compat.asleep_ms(ahead - SPIN_MS)
+        if compat.ticks_diff(due, compat.ticks_ms()) >= 0:
+            break
+        # Woken past the second (the loop was blocked, e.g. by a lightsleep):
+        # setting target_s now would put the RTC behind. Sleep to the next
+        # one; the busy-wait stays short, the other tasks wait for it.
+    while compat.ticks_diff(due, compat.ticks_ms()) > 0:
+        pass
+    set_time(target_s)
+    return target_s, compat.ticks_diff(compat.ticks_ms(), due)
@@ -0,0 +1,154 @@
+# /**
+#   ******************************************************************************
+#   * @file    ntp_server.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   SNTP server, so one synced clock can serve the time to the
+#   *          others on the site.
+#   *
+#   *          Answers SNTP requests (RFC 4330) on UDP from the RTC time with
+#   *          the fraction of the second the display scheduler keeps. Once
+#   *          the clock is synced, the stratum is its upstream's + 1, the
+#   *          reference ID the upstream's IPv4 address and the reference
+#   *          timestamp the moment the RTC was set; the root dispersion grows
+#   *          with the time since at the drift uncertainty. Before the first
+#   *          sync, when the dispersion passes MAX_DISPERSION_MS, and while
+#   *          the fraction of the second is not known (right after the RTC
+#   *          was set, till the scheduler has measured it again), the answers
+#   *          say the time is unsynchronised (leap 3, stratum 0), and clients
+#   *          go to their other hosts. The task waits for the socket
+#   *          without polling and answers at most BURST requests before the
+#   *          other tasks, the display among them, get their turn.
+#   *
+#   ******************************************************************************
+#   */
+import socket
+import struct
+
+from compat import asyncio, wait_readable
+from ntp_client import NTP_PORT, NTP_DELTA
+
+BURST = 16 # requests answered before the other tasks get a turn
+PRECISION = -10 # log2 of the resolution of the times served in seconds: a ms
+PHI_PPM = 15 # how fast the error may grow while the drift is not measured (RFC 5905)
+MAX_DISPERSION_MS = 1000 # possibly further off than this, the time is served as unsynchronised
+UNSYNCED_ID = b"INIT"
+NO_TIME = bytes(8)
+
+
+def ntp_stamp(buf, pos, ms):
+    # Writes ms since the epoch as an NTP timestamp into buf[pos:pos + 8].
+    s = ms // 1000
+    struct.pack_into("!II", buf, pos, (s + NTP_DELTA) & 0xFFFFFFFF, ((ms - 1000 * s) << 32) // 1000)
+
+
+def ntp_short(ms):
+    # ms as the 16.16 seconds of the root delay and dispersion fields.
+    return min((ms << 16) // 1000, 0xFFFFFFFF)
+
+
+def ref_id(addr):
+    # The upstream's socket address ("1.2.3.4", 123) as the reference ID;
+    # zeros when it is no IPv4 one.
+    try:
+        parts = [int(part) for part in addr[0].split(".")]
+    except (TypeError, IndexError, AttributeError, ValueError):
+        return bytes(4)
+    if len(parts) != 4 or not all(0 <= part < 256 for part in parts):
+        return bytes(4)
+    return bytes(parts)
+
+
+class NtpServer:
+    def __init__(self, clock_ms, port=NTP_PORT):
+        self.clock_ms = clock_ms # the time served: ms since the epoch, UTC; None when not known to the ms
+        self.port = port
+        self.sock = None
+        self.stratum = 0 # 0 until synced()
+        self.ref_ms = 0 # when the RTC was last set from NTP
+        self.ref_id = UNSYNCED_ID
+        self.root_delay_ms = 0
+        self.root_dispersion_ms = 0 # at ref_ms
+        self.ppm = PHI_PPM
+        self._reply = bytearray(48)
+        self.requests = 0
+        self.answers = 0
+        self.unsynced = 0 # answers that said the time is unsynchronised
+
+    def synced(self, sample, ref_ms, ppm=None):
+        # The RTC was set from sample (an ntp_client.NtpSample) at ref_ms;
+        # ppm is how fast its error grows from then on, if it is known.
+        self.stratum = min(sample.stratum + 1, 15)
+        self.ref_ms = ref_ms
+        self.ref_id = ref_id(sample.addr)
+        self.root_delay_ms = sample.delay_ms
+        self.root_dispersion_ms = sample.delay_ms // 2 + 1 # the offset is good to half the round trip
+        self.ppm = PHI_PPM if ppm is None else ppm
+
+    def dispersion_ms(self, now_ms):
+        return self.root_dispersion_ms + int((now_ms - self.ref_ms) * self.ppm) // 1000000
+
+    def answer(self, query, receive_ms):
+        # The reply to an SNTP client query, or None when it isn't one;
+        # receive_ms is clock_ms() when it came. The reply buffer is reused:
+        # send it before the next answer().
+        if len(query) < 48 or query[0] & 7 != 3:
+            return None
+        reply = self._reply
+        dispersion = self.dispersion_ms(receive_ms) if receive_ms is not None else 0
+        synced = self.stratum and receive_ms is not None and dispersion <= MAX_DISPERSION_MS
+        reply[0] = (0 if synced else 0xC0) | (query[0] & 0x38) | 4 # leap, the client's version, server
+        reply[1] = self.stratum if synced else 0
+        reply[2] = query[2] # the client's poll interval
+        reply[3] = PRECISION & 0xFF
+        struct.pack_into("!II", reply, 4, ntp_short(self.root_delay_ms), ntp_short(dispersion))
+        reply[24:32] = query[40:48] # origin: the client's transmit timestamp
+        if synced:
+            reply[12:16] = self.ref_id
+            ntp_stamp(reply, 16, self.ref_ms)
+            ntp_stamp(reply, 32, receive_ms)
+            ntp_stamp(reply, 40, self.clock_ms())
+        else:
+            reply[12:16] = UNSYNCED_ID
+            reply[16:24] = NO_TIME
+            reply[32:40] = NO_TIME
+            reply[40:48] = NO_TIME
+            self.unsynced += 1
+        return reply
+
+    def open(self, host="0.0.0.0"):
+        # Raises OSError when the port is taken.
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.bind(socket.getaddrinfo(host, self.port)[0][-1])
+        except OSError:
+            sock.close()
+            raise
+        sock.setblocking(False)
+        self.sock = sock
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    async def serve(self):
+        while True:
+            await wait_readable(self.sock)
+            for _ in range(BURST):
+                try:
+                    query, addr = self.sock.recvfrom(48)
+                except OSError: # EAGAIN: all read
+                    break
+                receive_ms = self.clock_ms()
+                self.requests += 1
+                reply = self.answer(query, receive_ms)
+                if reply is None:
+                    continue
+                try:
+                    self.sock.sendto(reply, addr)
+                except OSError: # no buffer for it: the client asks again
+                    continue
+                self.answers += 1
+            await asyncio.sleep(0)
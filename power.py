@@ -0,0 +1,153 @@
+# /**
+#   ******************************************************************************
+#   * @file    power.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Low-power scheduling and an estimated energy ledger.
+#   *
+#   *          Decides when the CPU may lightsleep (only while the radio is
+#   *          off, so the WiFi chip is never left without its host), when the
+#   *          radio may be switched off between scheduled fetches, and when
+#   *          the backlight is off for the night. Meanwhile it keeps a ledger
+#   *          of how long each part spent in which state, with a rough energy
+#   *          estimate. Time comes from the ticks_ms and sleep functions it is
+#   *          given, so the logic runs on the host against a fake clock.
+#   *
+#   ******************************************************************************
+#   */
+import compat
+import event_log
+
+LIGHTSLEEP_MIN_MS = 20 # shorter waits are not worth the wakeup
+RADIO_WAKE_S = 30 # the radio comes on this long before a fetch is due (join, DHCP)
+I2C_HZ = 400000
+I2C_BITS_PER_BYTE = 9 # 8 data bits and the ACK
+
+RADIO_OFF = 0
+RADIO_ON = 1 # connected or connecting, no power saving
+RADIO_SAVE = 2 # connected, WLAN power-save
+
+# Rough supply currents of a Pico W with the LCD, in mA. Only meant for
+# comparing setups with each other, not for sizing a battery to the day.
+CPU_AWAKE_MA = 20
+CPU_SLEEP_MA = 1.5
+RADIO_MA = (0, 45, 8) # per RADIO_* state
+I2C_MA = 5 # the bus and the PCF8574 while a transfer runs
+BACKLIGHT_MA = 20
+
+
+class PowerManager:
+    def __init__(self, night=None, radio_off_min_s=600, lightsleep=None, ticks_ms=compat.ticks_ms, sleep_ms=compat.sleep_ms, i2c_bytes=None):
+        # night: (from_hour, to_hour) of local time with the backlight off, or None.
+        # lightsleep: machine.lightsleep, or None to only ever sleep awake.
+        # i2c_bytes: returns the bytes sent over I2C so far.
+        self.night = night
+        self.radio_off_min_s = radio_off_min_s
+        self._lightsleep = lightsleep
+        self._ticks_ms = ticks_ms
+        self._sleep_ms = sleep_ms
+        self._i2c_bytes = i2c_bytes
+        self._last = ticks_ms()
+        self.radio = RADIO_ON
+        self.backlight = True
+        self.elapsed_ms = 0
+        self.cpu_sleep_ms = 0
+        self.radio_ms = [0, 0, 0] # per RADIO_* state
+        self.backlight_ms = 0
+        self.lightsleeps = 0
+        self.radio_offs = 0
+
+    def advance(self):
+        # Books the time since the last call to the current states. Called on
+        # every change, and by the clock every minute: ticks_ms wraps, so one
+        # interval must stay well below 2**29 ms (6 days).
+        now = self._ticks_ms()
+        ms = compat.ticks_diff(now, self._last)
+        self._last = now
+        self.elapsed_ms += ms
+        self.radio_ms[self.radio] += ms
+        if self.backlight:
+            self.backlight_ms += ms
+
+    def set_radio(self, state):
+        self.advance()
+        if state == RADIO_OFF and self.radio != RADIO_OFF:
+            self.radio_offs += 1
+        self.radio = state
+
+    def set_backlight(self, on):
+        self.advance()
+        self.backlight = on
+
+    def can_lightsleep(self):
+        return self._lightsleep is not None and self.radio == RADIO_OFF
+
+    def sleep_ms(self, ms):
+        # The blocking sleep for TickScheduler.wait().
+        if ms >= LIGHTSLEEP_MIN_MS and self.can_lightsleep():
+            self.advance()
+            start = self.elapsed_ms
+            self._lightsleep(ms)
+            self.advance()
+            self.cpu_sleep_ms += self.elapsed_ms - start # what the ticks saw of it
+            self.lightsleeps += 1
+        elif ms > 0:
+            self._sleep_ms(ms)
+
+    def backlight_due(self, t):
+        # Whether the backlight should be on at local time t (a time tuple).
+        if self.night is None:
+            return True
+        start, end = self.night
+        hour = t[3]
+        if start <= end:
+            return not start <= hour < end
+        return end <= hour < start # the night goes over midnight
+
+    def radio_off_for(self, now_s, next_need_s):
+        # Seconds the radio may be off from now_s, when the network is next
+        # needed at next_need_s (None: not at all); 0 to keep it on.
+        if next_need_s is None:
+            return self.radio_off_min_s
+        off_s = next_need_s - now_s - RADIO_WAKE_S
+        return off_s if off_s >= self.radio_off_min_s else 0
+
+    def ledger(self):
+        # [(part, ms, mAh)] since the start, and the total mAh.
+        self.advance()
+        i2c_ms = self._i2c_bytes() * I2C_BITS_PER_BYTE * 1000 // I2C_HZ if self._i2c_bytes else 0
+        parts = ( # in the order of event_log.POWER_PARTS, which names them
+            (self.elapsed_ms - self.cpu_sleep_ms, CPU_AWAKE_MA),
+            (self.cpu_sleep_ms, CPU_SLEEP_MA),
+            (self.radio_ms[RADIO_ON], RADIO_MA[RADIO_ON]),
+            (self.radio_ms[RADIO_SAVE], RADIO_MA[RADIO_SAVE]),
+            (self.radio_ms[RADIO_OFF], RADIO_MA[RADIO_OFF]),
+            (i2c_ms, I2C_MA),
+            (self.backlight_ms, BACKLIGHT_MA),
+        )
+        ledger = []
+        total = 0
+        for i in range(len(parts)):
+            ms, ma = parts[i]
+            mah = ms * ma / 3600000
+            ledger.append((event_log.POWER_PARTS[i], ms, mah))
+            total += mah
+        return ledger, total
+
+    def text(self):
+        # The ledger as plain text, a part per line, served at /power.
+        ledger, total = self.ledger()
+        out = ["%-14s %12d ms %10.3f mAh" % part for part in ledger]
+        out.append("%-14s %12d ms %10.3f mAh" % ("total", self.elapsed_ms, total))
+        out.append("")
+        return "\n".join(out)
+
+    def report(self, events):
+        # Logs the ledger to events (an event_log.EventLog); returns the total mAh.
+        ledger, total = self.ledger()
+        hours = self.elapsed_ms / 3600000
+        for i in range(len(ledger)):
+            events.log(event_log.POWER_PART, i, ledger[i][1], int(100*ledger[i][2]))
+        events.log(event_log.POWER_TOTAL, int(10*hours), int(100*total), int(100*total/hours) if hours else 0)
+        return total
@@ -0,0 +1,54 @@
+# /**
+#   ******************************************************************************
+#   * @file    settings.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   The clock's settings: config.py and secrets.py, and the values
+#   *          derived from them.
+#   *
+#   *          tools/config_compiler.py checks config.py and secrets.py on the
+#   *          host and writes all of this into config_compiled.py, derived
+#   *          values included; cross-compiled with mpy-cross the device loads
+#   *          it in one go, without compiling any source or deriving anything.
+#   *          Without it, config.py and secrets.py are imported and the values
+#   *          derived here at boot, unchecked; over the defaults of
+#   *          config_dist.py, for the settings an older config.py doesn't have.
+#   *
+#   ******************************************************************************
+#   */
+
+
+def derive(c):
+    # The values main.py needs that follow from the config; c has the
+    # config.py and secrets.py names.
+    import json
+    from json_stream import compile_path
+    from tz_rules import RULES
+    from ha_sensors import build_template
+    try:
+        path = compile_path(c['ha_api_temperature_json_path'])
+    except ValueError:
+        path = None # HA_BAD_PATH in the event log when the temperature is fetched
+    rule = c['dst_rule']
+    ip = c['wifi_ip_config']
+    if ip['mode'] == 'static':
+        ip = (ip['params']['ip'], ip['params']['mask'], ip['params']['gateway'], ip['params']['dns'])
+    else:
+        ip = "dhcp"
+    return {
+        'ha_headers': {"Authorization": "Bearer " + c['HA_TOKEN']},
+        'ha_temperature_path': path, # ('attributes', 'temperature')
+        'ha_template_body': json.dumps({"template": build_template(c['ha_sensors'])}).encode() if c['ha_sensors'] else None,
+        'dst_rule': RULES[rule] if isinstance(rule, str) else rule, # the rule tuple, see tz_rules.py
+        'wifi_ip': ip, # ifconfig() tuple or "dhcp"
+    }
+
+
+try:
+    from config_compiled import *
+except ImportError:
+    from config_dist import *
+    from config import *
+    from secrets import *
+    globals().update(derive(globals()))
@@ -0,0 +1,84 @@
+# /**
+#   ******************************************************************************
+#   * @file    state_store.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Small persisted state for a warm start after a reset.
+#   *
+#   *          A handful of values (last good time, RTC drift, last readings,
+#   *          last NTP host, DHCP lease) kept in one JSON file on the flash.
+#   *          Changes are collected in RAM and written together at most once
+#   *          per write interval, a write is skipped when the content did not
+#   *          change, and the file is replaced through a temporary one, so a
+#   *          power cut in the middle never leaves a broken state behind.
+#   *
+#   ******************************************************************************
+#   */
+import json
+import os
+import time
+
+import event_log
+
+WRITE_INTERVAL_S = 1800 # at most one flash write per this many seconds
+TIME_SAVE_S = 21600 # the last good time alone is refreshed this often
+
+
+class StateStore:
+    def __init__(self, path="state.json", write_interval_s=WRITE_INTERVAL_S, time_fn=time.time, events=None):
+        self.path = path
+        self.events = events # an event_log.EventLog for the failed writes, or None
+        self.write_interval_s = write_interval_s
+        self._time = time_fn
+        self.data = {}
+        self._written = None # the last content on the flash
+        self._written_at = None
+        self.dirty = False
+        self.writes = 0
+        self.skipped = 0 # flushes that found nothing new to write
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                self._written = f.read()
+            self.data = json.loads(self._written)
+        except (OSError, ValueError):
+            self.data = {} # first boot, or a damaged file
+            self._written = None
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value):
+        if self.data.get(key) != value:
+            self.data[key] = value
+            self.dirty = True
+
+    def flush(self, force=False):
+        # Writes the pending changes if the interval is over (or force). Returns True when written.
+        now = int(self._time())
+        if not force and self._written_at is not None and now - self._written_at < self.write_interval_s:
+            return False
+        if not self.dirty and now - self.data.get("time", now) < TIME_SAVE_S:
+            return False
+        self.data["time"] = now
+        text = json.dumps(self.data)
+        self.dirty = False
+        if text == self._written:
+            self.skipped += 1
+            return False
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                f.write(text)
+            os.rename(tmp, self.path)
+        except OSError as exc:
+            if self.events is not None:
+                self.events.log(event_log.STATE_NOT_SAVED, event_log.error_code(exc))
+            return False
+        self._written = text
+        self._written_at = now
+        self.writes += 1
+        return True
@@ -0,0 +1,221 @@
+# /**
+#   ******************************************************************************
+#   * @file    tick_scheduler.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Second (or minute) aligned wakeups for the clock display loop.
+#   *
+#   *          Instead of polling every 200 ms, the display loop sleeps
+#   *          until the next moment something visible changes. The RTC only
+#   *          reports whole seconds, so the scheduler learns where the second
+#   *          flips on the ticks_ms timeline (the "phase") by polling around a
+#   *          flip, and then sleeps straight to the predicted boundaries,
+#   *          re-measuring the phase every now and then.
+#   *
+#   ******************************************************************************
+#   */
+import time
+
+import compat
+
+GUARD_MS = 2 # wake this long after the predicted boundary
+POLL_MS = 2 # step used while looking for the exact second flip
+RECALIBRATE_S = 60 # re-measure the phase once it is this many seconds old
+EARLY_MS = 10 # how early to wake for a re-measurement, doubled after each miss
+
+def rtc_seconds():
+    # time.time() is already an int on the device, but a float on the host.
+    return int(time.time())
+
+
+async def _woken(event, ms):
+    # Waits up to ms for event; True when it is set.
+    if not event.is_set():
+        try:
+            await compat.asyncio.wait_for(event.wait(), ms / 1000)
+        except compat.asyncio.TimeoutError:
+            return False
+    return True
+
+
+_SLEEP = 0
+_EARLY = 1
+_POLL = 2
+
+
+class TickScheduler:
+    def __init__(self, period_s=1, time_fn=rtc_seconds, ticks_ms=compat.ticks_ms, ticks_diff=compat.ticks_diff, sleep_ms=compat.sleep_ms):
+        self.period_s = period_s
+        self._time = time_fn
+        self._ticks_ms = ticks_ms
+        self._ticks_diff = ticks_diff
+        self._sleep_ms = sleep_ms
+        self._anchor_ticks = 0 # ticks_ms() at which the RTC flipped to _anchor_s
+        self._anchor_s = None
+        self._rate_ppm = 0 # how much faster the RTC runs than ticks_ms
+        self._early_ms = EARLY_MS
+        self._state = _SLEEP
+        self._target_s = 0
+        self._poll_s = 0
+        self._before = 0
+        self.last_s = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.wakeups = 0
+        self.ticks = 0
+        self._late_n = 0
+        self._late_sum = 0
+        self._late_sq_sum = 0
+        self.late_max_ms = 0
+        self.drift_ms = 0 # total phase correction found by re-measurements
+        self.last_drift_ms = 0
+
+    def resync(self):
+        # Call after the RTC was set: the second flips at a new phase now.
+        self._anchor_s = None
+
+    def now_ms(self):
+        # RTC time in ms, the fraction of the second taken from the learned
+        # phase; None until the phase is known.
+        if self._anchor_s is None:
+            return None
+        elapsed = self._ticks_diff(self._ticks_ms(), self._anchor_ticks)
+        return self._anchor_s * 1000 + elapsed + elapsed * self._rate_ppm // 1000000
+
+    @property
+    def rate_ppm(self):
+        return self._rate_ppm
+
+    def _due(self, target_s):
+        # ticks_ms() value at which the RTC is predicted to flip to target_s.
+        elapsed_s = target_s - self._anchor_s
+        return self._anchor_ticks + elapsed_s * 1000 - elapsed_s * self._rate_ppm // 1000
+
+    def _record(self, late):
+        self._late_n += 1
+        self._late_sum += late
+        self._late_sq_sum += late * late
+        if late > self.late_max_ms:
+            self.late_max_ms = late
+
+    def delay_ms(self):
+        # Milliseconds until the next boundary is due, None until the phase is known.
+        if self._anchor_s is None:
+            return None
+        now_s = self._time()
+        target_s = (now_s // self.period_s + 1) * self.period_s
+        return max(self._ticks_diff(self._due(target_s), self._ticks_ms()), 0)
+
+    # The waiting is a small state machine, so that the same logic can be
+    # driven by blocking sleeps (wait) and by the event loop (wait_async):
+    # _begin() and _wake() return how long to sleep next, or None when done.
+    def _poll(self, now_s):
+        self._state = _POLL
+        self._poll_s = now_s
+        self._before = self._ticks_ms()
+        return POLL_MS
+
+    def _begin(self):
+        now_s = self._time()
+        self._target_s = (now_s // self.period_s + 1) * self.period_s
+        if self._anchor_s is None:
+            # Phase unknown yet: find it on this flip.
+            return self._poll(now_s)
+        due = self._ticks_diff(self._due(self._target_s), self._ticks_ms())
+        if self._target_s - self._anchor_s >= RECALIBRATE_S:
+            # Wake a bit early and catch the flip itself to follow any drift.
+            self._state = _EARLY
+            return due - self._early_ms
+        self._state = _SLEEP
+        return due + GUARD_MS
+
+    def _wake(self):
+        self.wakeups += 1
+        now_s = self._time()
+        target_s = self._target_s
+        if self._anchor_s is None and self._state != _POLL:
+            # resync() while asleep: the phase is measured again from here.
+            if now_s < target_s:
+                return self._poll(now_s)
+            self.ticks += 1
+            self.last_s = now_s
+            return None
+        if self._state == _POLL:
+            now = self._ticks_ms()
+            if now_s == self._poll_s:
+                self._before = now
+                return POLL_MS
+            # The flip happened somewhere between the last two polls.
+            now -= self._ticks_diff(now, self._before) // 2
+            if self._anchor_s is not None and now_s > self._anchor_s:
+                self.last_drift_ms = self._ticks_diff(now, self._due(now_s))
+                self.drift_ms += self.last_drift_ms
+                self._rate_ppm -= self.last_drift_ms * 1000 // (now_s - self._anchor_s) // 2 # smoothed
+            self._anchor_ticks = now
+            self._anchor_s = now_s
+            if now_s < target_s:
+                self._state = _SLEEP
+                return self._ticks_diff(self._due(target_s), self._ticks_ms()) + GUARD_MS
+        elif now_s < target_s:
+            if self._state == _EARLY:
+                self._early_ms = max(self._early_ms // 2, EARLY_MS)
+            # else woke before the RTC flipped: the phase moved, measure it again.
+            return self._poll(now_s)
+        elif self._state == _EARLY:
+            # The RTC flipped before we even woke: look further ahead next time.
+            self._early_ms = min(self._early_ms * 2, 500)
+        self._record(max(self._ticks_diff(self._ticks_ms(), self._due(target_s)), 0))
+        self.ticks += 1
+        self.last_s = now_s
+        return None
+
+    def _cut(self, ms, end):
+        # ms, or less when end (a ticks_ms() value) comes first: (ms, cut).
+        if end is None:
+            return ms, False
+        left = max(self._ticks_diff(end, self._ticks_ms()), 0)
+        return (left, True) if left < ms else (ms, False)
+
+    def wait(self, limit_ms=None):
+        # Blocks until the next visible change and returns the new RTC second;
+        # None instead when limit_ms runs out before it.
+        end = None if limit_ms is None else compat.ticks_add(self._ticks_ms(), limit_ms)
+        ms = self._begin()
+        while ms is not None:
+            ms, cut = self._cut(max(ms, 0), end)
+            if ms > 0:
+                self._sleep_ms(ms)
+            if cut:
+                return None
+            ms = self._wake()
+        return self.last_s
+
+    async def wait_async(self, limit_ms=None, wake=None):
+        # Same as wait(), but lets the other tasks run meanwhile. Also returns
+        # None as soon as wake (an Event, the caller clears it) is set.
+        end = None if limit_ms is None else compat.ticks_add(self._ticks_ms(), limit_ms)
+        ms = self._begin()
+        while ms is not None:
+            ms, cut = self._cut(max(ms, 0), end)
+            if wake is None:
+                await compat.asleep_ms(ms)
+            elif await _woken(wake, ms):
+                return None
+            if cut:
+                return None
+            ms = self._wake()
+        return self.last_s
+
+    @property
+    def late_mean_ms(self):
+        return self._late_sum / self._late_n if self._late_n else 0
+
+    @property
+    def jitter_ms(self):
+        # Standard deviation of the wakeup latency.
+        if not self._late_n:
+            return 0
+        mean = self._late_sum / self._late_n
+        return max(self._late_sq_sum / self._late_n - mean * mean, 0) ** 0.5
@@ -0,0 +1,358 @@
+# /**
+#   ******************************************************************************
+#   * @file    tools/config_compiler.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Checks config.py and secrets.py on the host and compiles them
+#   *          into config_compiled.py for the Pico.
+#   *
+#   *          Every setting is checked against what the clock accepts, so a
+#   *          typo shows up here, with the setting's name, and not on the LCD
+#   *          hours later. The output has all the settings and the values
+#   *          settings.py derives from them (the parsed HA JSON path, the DST
+#   *          rule, the HA headers and template request body) as one module of
+#   *          plain constants. With --mpy it is also cross-compiled with
+#   *          mpy-cross into config_compiled.mpy, which the Pico loads without
+#   *          compiling any source. It holds the secrets: upload it in place
+#   *          of config.py and secrets.py, and run this again after changing
+#   *          either of them.
+#   *          Run from the repository root:
+#   *              python3 tools/config_compiler.py [--config config.py]
+#   *                  [--secrets secrets.py] [--out config_compiled.py] [--mpy]
+#   *
+#   ******************************************************************************
+#   */
+import argparse
+import ast
+import os
+import shutil
+import subprocess
+import sys
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from async_http import parse_url
+from ha_push import entity_of
+from hal import LCD_ADDRESSES
+from json_stream import compile_path
+from lcd_compositor import GLYPHS, GLYPH_CODES
+from lcd_displays import address
+from tz_rules import RULES
+
+
+def _int(v):
+    return isinstance(v, int) and not isinstance(v, bool)
+
+
+def _number(v):
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def flag(v):
+    if v not in (0, 1) or not _int(v):
+        return "must be 0 or 1"
+
+
+def at_least(low):
+    def check(v):
+        if not _number(v) or v < low:
+            return "must be a number, at least %s" % low
+    return check
+
+
+def whole(low, high):
+    def check(v):
+        if not _int(v) or not low <= v <= high:
+            return "must be a whole number from %d to %d" % (low, high)
+    return check
+
+
+def text(v):
+    if not isinstance(v, str):
+        return "must be a string"
+
+
+def hosts(v):
+    if not isinstance(v, (list, tuple)) or not v or not all(isinstance(host, str) and host for host in v):
+        return "must be a list of host names"
+
+
+def url(v):
+    if not isinstance(v, str) or parse_url(v)[0] not in ("http", "https"):
+        return "must be an http:// or https:// URL"
+
+
+def json_path(v):
+    if not isinstance(v, str):
+        return "must be a string like \"['attributes']['temperature']\""
+    try:
+        compile_path(v)
+    except ValueError:
+        return "not a JSON path, e.g. \"['attributes']['temperature']\" or \"['forecast'][0]['temperature']\""
+
+
+def ipv4(v):
+    parts = v.split(".") if isinstance(v, str) else ()
+    return len(parts) == 4 and all(part.isdigit() and int(part) < 256 for part in parts)
+
+
+def wifi_ip_config(v):
+    if not isinstance(v, dict) or v.get('mode') not in ('static', 'dhcp'):
+        return "must be {'mode':'dhcp'} or {'mode':'static', 'params':{...}}"
+    if v['mode'] == 'static':
+        params = v.get('params')
+        if not isinstance(params, dict):
+            return "'params' is missing"
+        for key in ('ip', 'mask', 'gateway', 'dns'):
+            if not ipv4(params.get(key)):
+                return "'params' must have '%s', an IPv4 address" % key
+
+
+def dst_rule(v):
+    if isinstance(v, str):
+        if v not in RULES:
+            return "must be one of %s or a rule tuple" % ", ".join('"%s"' % name for name in sorted(RULES))
+        return
+    if not isinstance(v, tuple) or len(v) != 3 or not _int(v[2]):
+        return "must be a rule name or a (start, end, save_sec) tuple"
+    for spec in v[:2]:
+        if not isinstance(spec, tuple) or len(spec) != 5:
+            return "start and end must be (month, nth, weekday, at_sec, ref)"
+        month, nth, weekday, at_sec, ref = spec
+        if not (_int(month) and 1 <= month <= 12 and nth in (-1, 1, 2, 3, 4, 5) and _int(weekday) and 0 <= weekday <= 6
+                and _int(at_sec) and 0 <= at_sec < 86400 and ref in ("u", "s", "w")):
+            return "bad %r: month 1-12, nth -1 or 1-5, weekday 0-6 (Monday = 0), at_sec 0-86399, ref \"u\", \"s\" or \"w\"" % (spec,)
+
+
+def glyphs(s):
+    # The codes in s below 0x20 that lcd_compositor.GLYPHS has no pattern for.
+    return [ord(c) for c in s if ord(c) < GLYPH_CODES and ord(c) not in GLYPHS]
+
+
+def ha_sensors(v):
+    if not isinstance(v, list):
+        return "must be a list"
+    for i in range(len(v)):
+        sensor = v[i]
+        if not isinstance(sensor, dict) or not isinstance(sensor.get('entity'), str) or "." not in sensor['entity']:
+            return "[%d] must have an 'entity' like 'sensor.outdoor_humidity'" % i
+        for key in sensor:
+            if key not in ('entity', 'attribute', 'suffix', 'label'):
+                return "[%d] has an unknown key '%s'" % (i, key)
+            if not isinstance(sensor[key], str):
+                return "[%d]['%s'] must be a string" % (i, key)
+        for key in ('suffix', 'label'):
+            if glyphs(sensor.get(key, "")):
+                return "[%d]['%s'] has glyph %r, lcd_compositor.GLYPHS has no such one" % (i, key, chr(glyphs(sensor[key])[0]))
+            wide = [c for c in sensor.get(key, "") if ord(c) > 0xFF]
+            if wide:
+                return "[%d]['%s'] has %r, the LCD shows it as '?'" % (i, key, wide[0])
+
+
+def pins(v):
+    if v is not None and (not isinstance(v, (list, tuple)) or len(v) != 2 or not all(_int(pin) and 0 <= pin <= 28 for pin in v)):
+        return "must be None or (sda, scl) GP pin numbers"
+
+
+def lcd_layout(v):
+    if not isinstance(v, dict):
+        return "must be a dict"
+    for name in v:
+        try:
+            bus, addr = address(name)
+        except (AttributeError, ValueError):
+            bus, addr = -1, -1
+        if bus not in (0, 1) or addr not in LCD_ADDRESSES:
+            return "'%s' is not an LCD name like 'i2c0:0x27'" % name
+        conf = v[name]
+        if not isinstance(conf, dict) or any(key not in ('sensors', 'pages') for key in conf):
+            return "'%s' must be a dict of 'sensors' and 'pages'" % name
+        if 'sensors' in conf and (not isinstance(conf['sensors'], (list, tuple)) or not all(_int(i) and i >= 0 for i in conf['sensors'])):
+            return "'%s' 'sensors' must be a list of ha_sensors indices" % name
+        if 'pages' in conf and flag(conf['pages']):
+            return "'%s' 'pages' must be 0 (no display_page_sec pages) or 1" % name
+
+
+def hours(v):
+    if v is not None and (not isinstance(v, tuple) or len(v) != 2 or not all(_int(h) and 0 <= h <= 23 for h in v)):
+        return "must be None or (from hour, to hour), e.g. (23, 7)"
+
+
+# What config.py may hold; config_dist.py has them all.
+CONFIG = {
+    'is_metric': flag,
+    'sync_weather': flag,
+    'show_seconds': flag,
+    'use_24h_clock': flag,
+    'disable_ampm': flag,
+    'display_page_sec': at_least(0),
+    'display_scroll_ms': whole(50, 60000),
+    'lcd_i2c1': pins,
+    'lcd_layout': lcd_layout,
+    'wifi_ip_config': wifi_ip_config,
+    'ntp_host': hosts,
+    'daylight_time_savings': flag,
+    'dst_rule': dst_rule,
+    'resync_ntp': flag,
+    'resync_ntp_frequency_sec': at_least(60),
+    'ntp_target_ms': at_least(1),
+    'ntp_min_interval_sec': at_least(60),
+    'ntp_failure_threshold': whole(1, 1000),
+    'ntp_breaker_cooldown_sec': at_least(1),
+    'ntp_srv_timeout': at_least(1),
+    'time_shift_minutes': whole(-12 * 60, 14 * 60),
+    'ntp_server_port': whole(0, 65535),
+    'ha_failure_threshold': whole(1, 1000),
+    'ha_breaker_cooldown_sec': at_least(1),
+    'ha_srv_timeout': at_least(1),
+    'ha_api_url_temperature': url,
+    'ha_api_temperature_json_path': json_path,
+    'temperature_units': text,
+    'temperature_sync_time_sec': at_least(10),
+    'ha_sensors': ha_sensors,
+    'ha_sensor_rotate_sec': at_least(1),
+    'ha_push': flag,
+    'ha_push_ping_sec': at_least(1),
+    'ha_push_backoff_max_sec': at_least(1),
+    'power_save': flag,
+    'power_radio_off_min_sec': at_least(0),
+    'backlight_night': hours,
+    'metrics_port': whole(0, 65535),
+    'event_log_size': whole(1, 4096),
+    'event_log_flash': flag,
+    'wifi_reconnect_time': at_least(1),
+    'wifi_backoff_max_sec': at_least(1),
+    'wifi_reconnect_attempts_per_attempt': whole(1, 100),
+    'wifi_wait_time_per_attempt': at_least(1),
+    'wifi_wait_time_step': at_least(0.1),
+}
+SECRETS = {
+    'WIFI_SSID': text,
+    'WIFI_PASSWORD': text,
+    'HA_TOKEN': text,
+}
+
+
+def check_all(config, secrets):
+    # (errors, warnings): "config.py: name = value: what is wrong".
+    errors = []
+    warnings = []
+    for names, checks, path in ((config, CONFIG, "config.py"), (secrets, SECRETS, "secrets.py")):
+        for name in checks:
+            if name not in names:
+                errors.append("%s: %s is missing (see %s_dist.py)" % (path, name, path[:-3]))
+                continue
+            problem = checks[name](names[name])
+            if problem:
+                errors.append("%s: %s = %r: %s" % (path, name, names[name], problem))
+        for name in names:
+            if name not in checks:
+                warnings.append("%s: %s is not a setting, left out" % (path, name))
+    if errors:
+        return errors, warnings
+    # The ones that only make sense together.
+    if not secrets['WIFI_SSID']: # NTP needs it as much as HA does
+        errors.append("secrets.py: WIFI_SSID is empty")
+    if config['sync_weather'] and not secrets['HA_TOKEN']:
+        warnings.append("secrets.py: HA_TOKEN is empty, HA will answer 401")
+    if config['ha_push'] and (config['ha_sensors'] or not entity_of(config['ha_api_url_temperature'])):
+        errors.append("config.py: ha_push = 1 needs ha_api_url_temperature to be an /api/states/<entity> URL and no ha_sensors")
+    for name, conf in config['lcd_layout'].items():
+        for i in conf.get('sensors', ()):
+            if config['ha_sensors'] and i >= len(config['ha_sensors']):
+                errors.append("config.py: lcd_layout['%s'] shows ha_sensors[%d], there are %d" % (name, i, len(config['ha_sensors'])))
+    return errors, warnings
+
+
+def load(path):
+    # The names a config file defines, the way the Pico would import it.
+    with open(path) as f:
+        source = f.read()
+    names = {}
+    exec(compile(source, path, "exec"), names)
+    return {name: value for name, value in names.items() if not name.startswith("_") and not isinstance(value, types.ModuleType)}
+
+
+def derive(config, secrets):
+    # All that settings.py gives main.py: it is imported here with these
+    # two as config and secrets, just as on the Pico.
+    saved = {name: sys.modules.get(name) for name in ("config", "secrets", "config_compiled", "settings")}
+    for name, names in (("config", config), ("secrets", secrets)):
+        module = types.ModuleType(name)
+        for key in names:
+            setattr(module, key, names[key])
+        sys.modules[name] = module
+    sys.modules["config_compiled"] = None
+    sys.modules.pop("settings", None)
+    try:
+        import settings
+        return {name: value for name, value in vars(settings).items()
+                if not name.startswith("_") and not callable(value) and not isinstance(value, types.ModuleType)}
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+def compile_config(config_path, secrets_path):
+    # (values, errors, warnings); values is None when there are errors.
+    try:
+        config = load(config_path)
+        secrets = load(secrets_path)
+    except (OSError, SyntaxError) as e:
+        return None, ["%s" % e], []
+    errors, warnings = check_all(config, secrets)
+    if errors:
+        return None, errors, warnings
+    config = {name: config[name] for name in CONFIG}
+    secrets = {name: secrets[name] for name in SECRETS}
+    values = derive(config, secrets)
+    errors = []
+    for name in sorted(values):
+        if ast.literal_eval(repr(values[name])) != values[name]:
+            errors.append("%s: %r is not a plain constant" % (name, values[name]))
+    return (None if errors else values), errors, warnings
+
+
+def module_source(values):
+    lines = ["# Compiled by tools/config_compiler.py from config.py and secrets.py,",
+             "# with the values settings.py derives from them. Don't edit: run it again.",
+             "# It holds the secrets."]
+    for name in sorted(values):
+        lines.append("%s = %r" % (name, values[name]))
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check config.py and secrets.py and compile them into config_compiled.py.")
+    parser.add_argument("--config", default="config.py")
+    parser.add_argument("--secrets", default="secrets.py")
+    parser.add_argument("--out", default="config_compiled.py")
+    parser.add_argument("--mpy", action="store_true", help="cross-compile the output into .mpy with mpy-cross")
+    args = parser.parse_args(argv)
+    values, errors, warnings = compile_config(args.config, args.secrets)
+    for warning in warnings:
+        print("warning: " + warning, file=sys.stderr)
+    for error in errors:
+        print("error: " + error, file=sys.stderr)
+    if values is None:
+        return 1
+    with open(args.out, "w") as f:
+        f.write(module_source(values))
+    print("%s: %d settings" % (args.out, len(values)))
+    if args.mpy:
+        mpy_cross = shutil.which("mpy-cross")
+        if mpy_cross is None:
+            print("error: mpy-cross is not on the PATH (pip install mpy-cross)", file=sys.stderr)
+            return 1
+        subprocess.check_call([mpy_cross, args.out])
+        print("%s: upload it without the .py" % (args.out[:-3] + ".mpy"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+# /**
+#   ******************************************************************************
+#   * @file    tz_rules.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Daylight saving time engine with cached transition instants.
+#   *
+#   *          The transition instants of a year are computed once and the
+#   *          current offset is kept together with the interval it is valid
+#   *          for, so a tick only compares the time against two numbers.
+#   *
+#   *          A rule is (start, end, save_sec). start and end are
+#   *          (month, nth, weekday, at_sec, ref): the nth weekday (Monday = 0)
+#   *          of the month, nth = -1 meaning the last one, at at_sec seconds
+#   *          after midnight. ref tells what at_sec is measured in: "u" - UTC,
+#   *          "s" - local standard time, "w" - local wall clock time.
+#   *
+#   ******************************************************************************
+#   */
+import time
+
+RULES = {
+    # Last Sunday of March to last Sunday of October, 01:00 UTC.
+    "eu": ((3, -1, 6, 3600, "u"), (10, -1, 6, 3600, "u"), 3600),
+    # Second Sunday of March to first Sunday of November, 02:00 local time.
+    "us": ((3, 2, 6, 7200, "w"), (11, 1, 6, 7200, "w"), 3600),
+    # First Sunday of October to first Sunday of April, 02:00 standard time.
+    "au": ((10, 1, 6, 7200, "s"), (4, 1, 6, 7200, "s"), 3600),
+    # Last Sunday of September to first Sunday of April, 02:00 / 03:00 local time.
+    "nz": ((9, -1, 6, 7200, "w"), (4, 1, 6, 10800, "w"), 3600),
+}
+
+
+def days_from_civil(y, m, d):
+    # Days since 1970-01-01 of a proleptic Gregorian date.
+    if m <= 2:
+        y -= 1
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * (m + (-3 if m > 2 else 9)) + 2) // 5 + d - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+# MicroPython ports differ in their epoch (1970 or 2000), same as NTP_DELTA in main.py.
+EPOCH_DAYS = days_from_civil(time.gmtime(0)[0], 1, 1)
+
+
+def nth_weekday(year, month, nth, weekday):
+    # Day of the month of the nth (or last, nth = -1) given weekday.
+    first = days_from_civil(year, month, 1)
+    if nth > 0:
+        return 1 + (weekday - (first + 3)) % 7 + 7 * (nth - 1)
+    next_first = days_from_civil(year + (month == 12), month % 12 + 1, 1)
+    last = next_first - 1
+    return last - first + 1 - ((last + 3) - weekday) % 7
+
+
+class TzEngine:
+    def __init__(self, std_offset_sec=0, rule="eu"):
+        self.std_offset_sec = std_offset_sec
+        if isinstance(rule, str):
+            rule = RULES[rule]
+        self.rule = rule
+        self._year = None
+        self._from = 0 # [_from, _until) is the interval _save is valid for
+        self._until = -1
+        self._save = 0
+        self.recomputes = 0
+
+    def _instant(self, year, spec, save_before):
+        month, nth, weekday, at_sec, ref = spec
+        t = (days_from_civil(year, month, nth_weekday(year, month, nth, weekday)) - EPOCH_DAYS) * 86400 + at_sec
+        if ref != "u":
+            t -= self.std_offset_sec
+            if ref == "w":
+                t -= save_before
+        return t
+
+    def transitions(self, year):
+        # (DST start, DST end) of the year, in seconds since the epoch, UTC.
+        start, end, save = self.rule
+        return self._instant(year, start, 0), self._instant(year, end, save)
+
+    def _recompute(self, now):
+        year = time.gmtime(now)[0]
+        self.recomputes += 1
+        self._year = year
+        year_start = (days_from_civil(year, 1, 1) - EPOCH_DAYS) * 86400
+        year_end = (days_from_civil(year + 1, 1, 1) - EPOCH_DAYS) * 86400
+        start, end = self.transitions(year)
+        save = self.rule[2]
+        if start < end: # northern hemisphere: summer time inside the year
+            edges = ((year_start, start, 0), (start, end, save), (end, year_end, 0))
+        else: # southern hemisphere: summer time over the new year
+            edges = ((year_start, end, save), (end, start, 0), (start, year_end, save))
+        for a, b, s in edges:
+            if a <= now < b:
+                self._from, self._until, self._save = a, b, s
+                return
+
+    def dst_offset(self, now):
+        # Daylight saving seconds to add at the UTC instant now.
+        if self.rule is None:
+            return 0
+        if not (self._from <= now < self._until):
+            self._recompute(now)
+        return self._save
+
+    def offset(self, now):
+        return self.std_offset_sec + self.dst_offset(now)
+
+    def localtime(self, now=None):
+        if now is None:
+            now = time.time()
+        return time.gmtime(now + self.offset(now))
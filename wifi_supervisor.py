@@ -0,0 +1,158 @@
+# /**
+#   ******************************************************************************
+#   * @file    wifi_supervisor.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   WiFi link supervisor: cheap reconnects, backoff, radio reset.
+#   *
+#   *          A background task watches the station interface. When the link
+#   *          drops it first just calls connect() again on the active radio,
+#   *          and only after a few failed tries switches the radio off and on.
+#   *          Between failed tries it waits with an exponential, jittered
+#   *          backoff. Nothing here blocks, so the clock face keeps running
+#   *          meanwhile; state changes are reported through a callback.
+#   *
+#   ******************************************************************************
+#   */
+import compat
+from compat import asyncio
+from backoff import Backoff
+
+DOWN = "down"
+CONNECTING = "connecting"
+UP = "up"
+BACKOFF = "backoff"
+RESET = "reset"
+OFF = "off" # switched off on purpose, see pause()
+
+RESET_PAUSE_MS = 1000 # the radio is kept off this long in a full reset
+STABLE_MS = 60000 # a link that stayed up this long resets the backoff
+
+
+class WifiSupervisor:
+    def __init__(self, network, ssid, password, ip_config=None, connect_timeout_ms=15000, poll_ms=1000,
+                 backoff_min_ms=5000, backoff_max_ms=300000, reset_after=2):
+        # network: the network module (or a stand-in); ip_config goes to
+        # wlan.ifconfig() after each connect(), None to leave it alone.
+        self.network = network
+        self._ssid = ssid
+        self._password = password
+        self.ip_config = ip_config
+        self.connect_timeout_ms = connect_timeout_ms
+        self.poll_ms = poll_ms
+        self.backoff = Backoff(backoff_min_ms, backoff_max_ms, STABLE_MS)
+        self.reset_after = reset_after # failed reconnects before the radio is reset
+        self.wlan = None
+        self.state = DOWN
+        self.status = None # wlan.status() after the last failed try
+        self.up = asyncio.Event() # set while the link is up
+        self.paused = False
+        self._resumed = asyncio.Event()
+        self._failed = 0 # failed reconnects since the last reset
+        self.connects = 0
+        self.failures = 0
+        self.drops = 0
+        self.resets = 0
+
+    def radio_on(self):
+        ap = self.network.WLAN(self.network.AP_IF)
+        ap.active(False)
+        self.wlan = self.network.WLAN(self.network.STA_IF)
+        self.wlan.active(True)
+
+    def reconnect(self):
+        # Drops the link so that it is made again, e.g. when a server is gone
+        # although the link looks fine.
+        self.up.clear()
+        if self.wlan is not None:
+            self.wlan.disconnect()
+
+    def pause(self):
+        # Switches the radio off until resume(), e.g. between scheduled fetches.
+        self.paused = True
+        self.up.clear()
+        self._resumed.clear()
+
+    def resume(self):
+        self.paused = False
+        self._resumed.set()
+
+    def _set(self, state, on_change):
+        if state == self.state:
+            return
+        self.state = state
+        if state == UP:
+            self.up.set()
+        else:
+            self.up.clear()
+        if on_change is not None:
+            on_change(state)
+
+    async def _connect(self):
+        # One cheap reconnect on the radio as it is. True when the link is up.
+        wlan = self.wlan
+        self.connects += 1
+        if wlan.status() != self.network.STAT_CONNECTING: # don't restart a join that is still going
+            wlan.connect(self._ssid, self._password)
+        if self.ip_config is not None:
+            try:
+                wlan.ifconfig(self.ip_config)
+            except OSError:
+                return False
+        start = compat.ticks_ms()
+        while compat.ticks_diff(compat.ticks_ms(), start) < self.connect_timeout_ms:
+            await compat.asleep_ms(self.poll_ms)
+            if wlan.isconnected():
+                return True
+            if wlan.status() < 0:
+                return False # wrong password, no AP, or another failure: no point in waiting
+        return False
+
+    async def _reset(self):
+        # The full radio re-initialisation, only once the cheap reconnects keep failing.
+        self.resets += 1
+        self._failed = 0
+        try:
+            self.wlan.disconnect()
+        except OSError:
+            pass
+        self.wlan.active(False)
+        await compat.asleep_ms(RESET_PAUSE_MS)
+        self.wlan.active(True)
+
+    async def run(self, on_change=None):
+        # Runs forever; on_change(state) is called on every state change.
+        if self.wlan is None:
+            self.radio_on()
+        while True:
+            if self.paused:
+                self._set(OFF, on_change)
+                self.wlan.disconnect()
+                self.wlan.active(False)
+                await self._resumed.wait()
+                self.wlan.active(True)
+                continue
+            if self.wlan.isconnected():
+                if self.state != UP:
+                    self.backoff.up()
+                    self._failed = 0
+                    self._set(UP, on_change)
+                else:
+                    self.backoff.settle()
+                await compat.asleep_ms(self.poll_ms)
+                continue
+            if self.state == UP:
+                self.drops += 1
+            self._set(CONNECTING, on_change)
+            if await self._connect():
+                continue
+            self.failures += 1
+            self._failed += 1
+            self.status = self.wlan.status()
+            if self._failed >= self.reset_after:
+                self._set(RESET, on_change)
+                await self._reset()
+            wait_ms = self.backoff.next_ms()
+            self._set(BACKOFF, on_change)
+            await compat.asleep_ms(wait_ms)
@@ -0,0 +1,121 @@
+# /**
+#   ******************************************************************************
+#   * @file    ws_client.py
+#   * @author  Eugene at sky.community
+#   * @version V1.0.0
+#   * @date    18-October-2026
+#   * @brief   Minimal WebSocket (RFC 6455) framing on uasyncio streams.
+#   *
+#   *          Just enough for one long-lived client connection: the opening
+#   *          handshake, masked text frames out, and frames in - the latter
+#   *          either whole or passed to a sink in small pieces, so a large
+#   *          message never has to sit in RAM.
+#   *
+#   ******************************************************************************
+#   */
+import binascii
+import random
+import struct
+
+from compat import asyncio
+from async_http import parse_url, host_header, read_head, CHUNK_SIZE
+
+OP_CONT = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+MAX_FRAME = 4096 # largest frame read whole; bigger ones need a sink
+
+
+def ws_url(http_url, path="/api/websocket"):
+    # "https://host:8123/api/states/x" -> "wss://host:8123/api/websocket"
+    scheme, host, port, _ = parse_url(http_url)
+    return "%s://%s%s" % ("wss" if scheme == "https" else "ws", host_header(scheme, host, port), path)
+
+
+def _mask(data, key, offset=0):
+    # XORs data with the 4-byte key in place; offset is where data starts in the payload.
+    for i in range(len(data)):
+        data[i] ^= key[(i + offset) & 3]
+
+
+async def write_frame(writer, opcode, payload=b"", mask=True):
+    # Client frames must be masked (mask=True), server frames must not.
+    n = len(payload)
+    if n < 126:
+        head = struct.pack("!BB", 0x80 | opcode, n | (0x80 if mask else 0))
+    elif n < 65536:
+        head = struct.pack("!BBH", 0x80 | opcode, 126 | (0x80 if mask else 0), n)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 127 | (0x80 if mask else 0), n)
+    if mask:
+        key = struct.pack("!I", random.getrandbits(32))
+        payload = bytearray(payload)
+        _mask(payload, key)
+        head += key
+    writer.write(head + payload)
+    await writer.drain()
+
+
+async def read_frame_head(reader, b0=None):
+    # Returns (fin, opcode, length, mask key or None). b0: the first byte of
+    # the frame, if the caller read it already.
+    if b0 is None:
+        b0, b1 = struct.unpack("!BB", await reader.readexactly(2))
+    else:
+        b1 = (await reader.readexactly(1))[0]
+    n = b1 & 0x7F
+    if n == 126:
+        n = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif n == 127:
+        n = struct.unpack("!Q", await reader.readexactly(8))[0]
+    key = await reader.readexactly(4) if b1 & 0x80 else None
+    return b0 & 0x80, b0 & 0x0F, n, key
+
+
+async def read_payload(reader, length, key=None, sink=None):
+    # Returns the payload, or passes it to sink(chunk) and returns None.
+    if sink is None:
+        if length > MAX_FRAME:
+            raise ValueError("websocket frame too large")
+        payload = bytearray(await reader.readexactly(length))
+        if key:
+            _mask(payload, key)
+        return payload
+    done = False
+    offset = 0
+    while offset < length:
+        chunk = bytearray(await reader.readexactly(min(length - offset, CHUNK_SIZE)))
+        if key:
+            _mask(chunk, key, offset)
+        offset += len(chunk)
+        if not done:
+            done = sink(chunk)
+    return None
+
+
+async def connect(url, ssl=None, headers=None):
+    # Opens a WebSocket connection; returns (reader, writer).
+    scheme, host, port, path = parse_url(url)
+    if ssl is None and scheme == "wss":
+        ssl = True
+    reader, writer = await asyncio.open_connection(host, port, ssl=ssl)
+    try:
+        key = binascii.b2a_base64(struct.pack("!IIII", *[random.getrandbits(32) for _ in range(4)])).strip()
+        req = "GET %s HTTP/1.1\r\nHost: %s\r\nUpgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: %s\r\nSec-WebSocket-Version: 13\r\n" % (
+            path, host_header(scheme, host, port), key.decode())
+        if headers:
+            for name in headers:
+                req += "%s: %s\r\n" % (name, headers[name])
+        writer.write(req.encode() + b"\r\n")
+        await writer.drain()
+        status, resp_headers = await read_head(reader)
+        if status != 101 or resp_headers.get("upgrade", "").lower() != "websocket":
+            raise OSError("websocket upgrade refused: %d" % status)
+    except BaseException:
+        writer.close()
+        raise
+    return reader, writer